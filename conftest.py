@@ -0,0 +1,26 @@
+"""
+Shared pytest fixtures: every test gets an empty database kept in its own
+temporary data directory.
+"""
+import pytest
+
+import ums_core
+
+
+def reset_database():
+    ums_core.clear_database()
+    for course in ums_core.database['courses'].values():
+        course['prereq'] = []
+    ums_core.compile_prereqs()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """
+    Opens empty storage in a temporary directory and closes it afterwards.
+    """
+    reset_database()
+    ums_core.open_storage(str(tmp_path))
+    yield str(tmp_path)
+    ums_core.close_storage()
+    reset_database()
@@ -0,0 +1,85 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import ums_core
+from ums_api import ApiHandler
+
+
+@pytest.fixture
+def api(data_dir):
+    """
+    Serves the API on a free local port. Returns request(method, path, body)
+    -> (status, decoded JSON).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ApiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def request(method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=10)
+        try:
+            data = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode()
+            conn.request(method, path, body=data)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            conn.close()
+
+    yield request
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+STUDENT = {'sid': 'S1', 'name': 'Asha', 'email': 'asha@example.com',
+           'phone': '9000000001', 'course': 'BTECH'}
+
+
+def test_create_and_read(api):
+    assert api('POST', '/students', STUDENT) == (201, {'result': None})
+    status, body = api('GET', '/students/S1')
+    assert status == 200
+    assert body['result']['email'] == 'asha@example.com'
+    assert api('GET', '/students') == (200, {'result': ['S1']})
+
+
+def test_refusal_is_400(api):
+    api('POST', '/students', STUDENT)
+    status, body = api('POST', '/students', dict(STUDENT, sid='S2'))
+    assert status == 400
+    assert body['error'] == "Email already registered."
+
+
+@pytest.mark.parametrize('body, error', [
+    (b'{"sid": ', "Invalid JSON."),
+    (b'[]', "Request body must be a JSON object."),
+    (b'{"sid": 1}', "'sid' must be a string."),
+])
+def test_bad_body_is_400(api, body, error):
+    assert api('POST', '/students', body) == (400, {'error': error})
+
+
+@pytest.mark.parametrize('method, path', [
+    ('GET', '/nowhere'),
+    ('DELETE', '/students'),
+    ('GET', '/students/S404'),
+])
+def test_not_found_is_404(api, method, path):
+    assert api(method, path) == (404, {'error': "Not found."})
+
+
+def test_unexpected_error_is_500(api, monkeypatch):
+    def fail(changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ums_core.storage, 'append', fail)
+    status, body = api('POST', '/students', STUDENT)
+    assert status == 500
+    assert "disk full" in body['error']
+    monkeypatch.undo()
+    # The server keeps answering and nothing half-saved is left behind
+    assert api('GET', '/students') == (200, {'result': []})
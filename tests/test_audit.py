@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+import ums_core
+from ums_core import AuditLog, audit_events
+
+
+def event(n):
+    return f'{{"op": "add_student", "sid": "S{n}"}}\n'
+
+
+def fail_fsync(monkeypatch):
+    def fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ums_core.os, 'fsync', fsync)
+
+
+def test_failed_write_keeps_lines(tmp_path, monkeypatch):
+    log = AuditLog(str(tmp_path))
+    os.makedirs(log.folder)
+    log.append([event(1), event(2)])
+    fail_fsync(monkeypatch)
+    with pytest.raises(OSError):
+        log.flush()
+    log.append([event(3)])
+    assert list(log.buffer) == [event(1), event(2), event(3)]
+    monkeypatch.undo()
+    log.flush()
+    # The failed write was cut off; every line is read back once
+    assert [e['sid'] for e in audit_events(str(tmp_path))] == ['S1', 'S2', 'S3']
+
+
+def test_buffer_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(ums_core, 'AUDIT_BUFFER_MAX', 3)
+    log = AuditLog(str(tmp_path))
+    log.append([event(n) for n in range(5)])
+    assert list(log.buffer) == [event(2), event(3), event(4)]
+    assert log.dropped == 2
+
+
+def test_writer_survives_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(ums_core, 'AUDIT_FLUSH_INTERVAL', 0.01)
+    log = AuditLog(str(tmp_path))
+    log.open()
+    fail_fsync(monkeypatch)
+    log.append([event(1)])
+    time.sleep(0.1)
+    assert log.writer.is_alive() and log.error is not None
+    monkeypatch.undo()
+    log.append([event(2)])
+    time.sleep(0.1)
+    assert log.error is None
+    log.close()
+    assert [e['sid'] for e in audit_events(str(tmp_path))] == ['S1', 'S2']
+
+
+def test_close_reports_failed_write(tmp_path, monkeypatch):
+    log = AuditLog(str(tmp_path))
+    log.open()
+    fail_fsync(monkeypatch)
+    log.append([event(1)])
+    with pytest.raises(OSError, match="disk full"):
+        log.close()
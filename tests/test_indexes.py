@@ -0,0 +1,19 @@
+from ums_core import add_student, index_phone, search_students
+
+
+def test_index_phone_compares_ids_by_value():
+    phones = {}
+    index_phone(phones, '9000000001', 'S1')
+    # An equal ID built at run time is a different str object
+    index_phone(phones, '9000000001', ''.join(['S', '1']))
+    assert phones == {'9000000001': 'S1'}
+    index_phone(phones, '9000000001', 'S2')
+    index_phone(phones, '9000000001', ''.join(['S', '2']))
+    index_phone(phones, '9000000001', 'S3')
+    assert phones == {'9000000001': ['S1', 'S2', 'S3']}
+
+
+def test_shared_phone_finds_every_student(data_dir):
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+    add_student('S2', 'Ravi', 'ravi@example.com', '9000000001', 'BCA')
+    assert set(search_students('9000000001')) == {'S1', 'S2'}
@@ -0,0 +1,51 @@
+import pytest
+
+from ums_core import (add_student, database, enroll, missing_prereqs,
+                      set_course_capacity, set_prereqs)
+
+
+def test_duplicate_email_refused(data_dir):
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+    with pytest.raises(ValueError, match="Email already registered"):
+        add_student('S2', 'Asha K', 'ASHA@example.com', '9000000002', 'BCA')
+    assert list(database['students']) == ['S1']
+
+
+def test_duplicate_id_refused(data_dir):
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+    with pytest.raises(ValueError, match="Student ID already exists"):
+        add_student('S1', 'Ravi', 'ravi@example.com', '9000000002', 'BCA')
+
+
+def test_seat_limit_refused(data_dir):
+    set_course_capacity('BCA', 1)
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BCA')
+    add_student('S2', 'Ravi', 'ravi@example.com', '9000000002', 'BTECH')
+    with pytest.raises(ValueError, match="Course is full"):
+        add_student('S3', 'Meena', 'meena@example.com', '9000000003', 'BCA')
+    with pytest.raises(ValueError, match="Course is full"):
+        enroll('S2', 'BCA')
+    assert list(database['courses']['BCA']['students']) == ['S1']
+    # Removing the limit lets them in
+    set_course_capacity('BCA', 0)
+    assert enroll('S2', 'BCA')
+
+
+def test_prerequisite_cycle_refused(data_dir):
+    set_prereqs('MBA', ['BCOM'])
+    set_prereqs('BCOM', ['BCA'])
+    with pytest.raises(ValueError, match="Prerequisite cycle"):
+        set_prereqs('BCA', ['MBA'])
+    with pytest.raises(ValueError, match="Prerequisite cycle"):
+        set_prereqs('BCA', ['BCA'])
+    assert database['courses']['BCA']['prereq'] == []
+    assert set(missing_prereqs((), 'MBA')) == {'BCA', 'BCOM'}
+
+
+def test_missing_prerequisite_refused(data_dir):
+    set_prereqs('MBA', ['BCOM'])
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+    with pytest.raises(ValueError, match="Missing prerequisites: BCOM"):
+        enroll('S1', 'MBA')
+    assert enroll('S1', 'BCOM')
+    assert enroll('S1', 'MBA')
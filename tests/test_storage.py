@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import ums_core
+from conftest import reset_database
+from ums_core import add_student, database, enroll, record_payment, student_details
+
+
+def reopen(data_dir, compact=True):
+    """
+    Closes storage (compacting it, or dropping it as a crash would) and
+    loads it again into an empty database.
+    """
+    if compact:
+        ums_core.close_storage()
+    else:
+        ums_core.storage.close()
+        ums_core.storage = None
+        ums_core.close_enquiry_queue()
+        ums_core.close_audit_log()
+    reset_database()
+    ums_core.open_storage(data_dir)
+
+
+def add_sample():
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+    add_student('S2', 'Ravi', 'ravi@example.com', '9000000002', 'BCA')
+    enroll('S2', 'BCOM')
+    record_payment('S1', 'BTECH', 1000)
+
+
+@pytest.mark.parametrize('compact', [True, False], ids=['snapshot', 'log'])
+def test_round_trip(data_dir, compact):
+    add_sample()
+    before = [student_details(sid) for sid in ('S1', 'S2')]
+    reopen(data_dir, compact)
+    assert [student_details(sid) for sid in ('S1', 'S2')] == before
+    assert set(database['courses']['BCOM']['students']) == {'S2'}
+
+
+def test_torn_log_tail_is_dropped(data_dir):
+    add_sample()
+    reopen(data_dir, compact=False)
+    # A crash part-way through an append leaves half a line at the end
+    with open(os.path.join(data_dir, "changes.log"), "a", encoding="utf-8") as f:
+        f.write('{"op": "add_student", "sid": "S3"')
+    reopen(data_dir, compact=False)
+    assert list(database['students']) == ['S1', 'S2']
+    # Changes written after recovery must survive the next load too
+    add_student('S4', 'Meena', 'meena@example.com', '9000000004', 'MBA')
+    reopen(data_dir, compact=False)
+    assert list(database['students']) == ['S1', 'S2', 'S4']
+
+
+def test_failed_write_changes_nothing(data_dir, monkeypatch):
+    add_student('S1', 'Asha', 'asha@example.com', '9000000001', 'BTECH')
+
+    def fail(changes):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ums_core.storage, 'append', fail)
+    with pytest.raises(OSError):
+        add_student('S2', 'Ravi', 'ravi@example.com', '9000000002', 'BCA')
+    assert list(database['students']) == ['S1']
+    monkeypatch.undo()
+    add_student('S2', 'Ravi', 'ravi@example.com', '9000000002', 'BCA')
+    reopen(data_dir, compact=False)
+    assert list(database['students']) == ['S1', 'S2']
@@ -0,0 +1,190 @@
+"""
+HTTP API of the University Management System over the service layer in
+ums_core.
+"""
+import json
+import re
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+from ums_core import (
+    FACULTY_MAX_LOAD, SEARCH_KINDS, actor, add_classroom, add_enquiry, add_faculty,
+    add_room, add_section, add_student, answer_enquiry, assign_course, assign_hostel,
+    assign_section, auto_allocate, auto_assign_sections, course_roster,
+    dashboard_totals, enquiry_details, enquiry_stats, enroll, faculty_workload,
+    fee_report, fuzzy_search, list_enquiries, list_faculty, list_sections,
+    list_students, occupancy_report, plan_timetable, record_payment, schedule_section,
+    search_students, set_course_capacity, set_prereqs, student_details, sync_storage,
+    timetable_entries, timetable_problems, unenroll, update_faculty,
+)
+
+# --- HTTP API ---
+# JSON front-end over the service layer so scripts, other systems and load
+# generators can use the same operations as the GUI, concurrently.
+HTTP_PORT = 8000
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """
+    Routes JSON requests to service-layer functions.
+    ValueError from a service becomes 400 (or 404 for missing records), and
+    so does a body that is not an object or has fields of the wrong type;
+    any other error becomes 500.
+    """
+    protocol_version = "HTTP/1.1"  # keep connections alive between requests
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    # Body fields that must be strings, lists of strings and booleans;
+    # numbers (capacity, hours, amount, ...) may be given either way
+    text_fields = {'sid', 'name', 'email', 'phone', 'course', 'fid', 'cid', 'room',
+                   'day', 'hostel', 'hostel_name', 'room_no', 'query'}
+    list_fields = {'qualified', 'prereqs', 'sids', 'sections'}
+    flag_fields = {'rebalance', 'rebuild', 'match_course'}
+
+    # (method, path pattern, handler(match, body)) checked in order
+    routes = [
+        ('GET', r'/students', lambda m, q: list_students()),
+        ('POST', r'/students', lambda m, b: add_student(
+            b.get('sid', ''), b.get('name', ''), b.get('email', ''),
+            b.get('phone', ''), b.get('course', ''))),
+        ('GET', r'/students/search', lambda m, q: search_students(q.get('q', ''))),
+        ('GET', r'/search', lambda m, q: fuzzy_search(
+            q.get('q', ''), SEARCH_KINDS if q.get('kind', 'all') == 'all' else (q['kind'],))),
+        ('GET', r'/students/([^/]+)', lambda m, q: student_details(m[1])),
+        ('GET', r'/faculty', lambda m, q: list_faculty()),
+        ('POST', r'/faculty', lambda m, b: add_faculty(
+            b.get('fid', ''), b.get('name', ''), b.get('qualified', []),
+            b.get('max_load', FACULTY_MAX_LOAD))),
+        ('GET', r'/faculty/workload', lambda m, q: faculty_workload()),
+        ('PUT', r'/faculty/([^/]+)', lambda m, b: update_faculty(
+            m[1], b.get('qualified', []), b.get('max_load', FACULTY_MAX_LOAD))),
+        ('GET', r'/sections', lambda m, q: list_sections()),
+        ('POST', r'/sections', lambda m, b: add_section(b.get('course', ''), b.get('hours', ''))),
+        ('POST', r'/sections/assign', lambda m, b: auto_assign_sections(b.get('rebalance', False))),
+        ('PUT', r'/sections/([^/]+)/faculty', lambda m, b: assign_section(m[1], b.get('fid'))),
+        ('PUT', r'/sections/([^/]+)/schedule', lambda m, b: schedule_section(
+            m[1], b.get('room'), b.get('day'), b.get('hour'))),
+        ('POST', r'/classrooms', lambda m, b: add_classroom(b.get('room', ''), b.get('capacity', ''))),
+        ('GET', r'/timetable', lambda m, q: timetable_entries()),
+        ('GET', r'/timetable/conflicts', lambda m, q: timetable_problems()),
+        ('POST', r'/timetable/plan', lambda m, b: plan_timetable(
+            b.get('rebuild', False), b.get('sections', ()))),
+        ('PUT', r'/courses/([^/]+)/faculty', lambda m, b: assign_course(m[1], b.get('fid'))),
+        ('GET', r'/courses/([^/]+)/students', lambda m, q: course_roster(m[1])),
+        ('PUT', r'/courses/([^/]+)/prereqs', lambda m, b: set_prereqs(m[1], b.get('prereqs', []))),
+        ('PUT', r'/courses/([^/]+)/capacity', lambda m, b: set_course_capacity(
+            m[1], b.get('capacity'))),
+        ('POST', r'/enrollments', lambda m, b: enroll(b.get('sid', ''), b.get('cid', ''))),
+        ('DELETE', r'/enrollments/([^/]+)/([^/]+)', lambda m, b: unenroll(m[1], m[2])),
+        ('PUT', r'/hostel/([^/]+)', lambda m, b: assign_hostel(
+            m[1], b.get('hostel_name', ''), b.get('room_no', ''))),
+        ('POST', r'/payments', lambda m, b: record_payment(
+            b.get('sid', ''), b.get('cid', ''), b.get('amount', ''))),
+        ('GET', r'/reports/fees', lambda m, q: fee_report()),
+        ('POST', r'/rooms', lambda m, b: add_room(
+            b.get('hostel', ''), b.get('room', ''), b.get('capacity', ''), b.get('course', ''))),
+        ('POST', r'/rooms/allocate', lambda m, b: auto_allocate(
+            b.get('sids'), b.get('match_course', True))),
+        ('GET', r'/reports/hostel', lambda m, q: occupancy_report()),
+        ('GET', r'/enquiries', lambda m, q: list_enquiries(
+            q.get('status', 'open'), q.get('q', ''))),
+        ('POST', r'/enquiries', lambda m, b: add_enquiry(
+            b.get('name', ''), b.get('email', ''), b.get('query', ''))),
+        ('GET', r'/enquiries/stats', lambda m, q: enquiry_stats()),
+        ('GET', r'/dashboard', lambda m, q: dashboard_totals()),
+        ('GET', r'/enquiries/([^/]+)', lambda m, q: enquiry_details(m[1])),
+        ('POST', r'/enquiries/([^/]+)/answer', lambda m, b: answer_enquiry(m[1])),
+    ]
+
+    def body_error(self, body):
+        """
+        Returns why a request body cannot be used, or None if it can.
+        """
+        if not isinstance(body, dict):
+            return "Request body must be a JSON object."
+        for field, value in body.items():
+            if value is None:
+                continue
+            if field in self.text_fields and not isinstance(value, str):
+                return f"'{field}' must be a string."
+            if field in self.list_fields and not (
+                    isinstance(value, list) and all(isinstance(v, str) for v in value)):
+                return f"'{field}' must be a list of strings."
+            if field in self.flag_fields and not isinstance(value, bool):
+                return f"'{field}' must be true or false."
+        return None
+
+    def handle_method(self, method):
+        # Changes made by this request are audited under the client address
+        actor.user = f"api@{self.client_address[0]}"
+        path, _, query_string = self.path.partition('?')
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                break
+        else:
+            return self.send_json(404, {'error': "Not found."})
+        if method == 'GET':
+            arg = dict(parse_qsl(query_string))
+        else:
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                arg = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self.send_json(400, {'error': "Invalid JSON."})
+            error = self.body_error(arg)
+            if error:
+                return self.send_json(400, {'error': error})
+        try:
+            sync_storage()
+            result = handler(match, arg)
+        except ValueError as e:
+            status = 404 if str(e) == "Not found." else 400
+            return self.send_json(status, {'error': str(e)})
+        except (TypeError, AttributeError) as e:
+            # A field the checks above do not cover had an unusable value
+            return self.send_json(400, {'error': f"Invalid request: {e}"})
+        except Exception as e:
+            # Answer rather than drop the keep-alive connection
+            traceback.print_exc()
+            return self.send_json(500, {'error': f"Internal error: {e}"})
+        self.send_json(201 if method == 'POST' else 200, {'result': result})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.handle_method('GET')
+
+    def do_POST(self):
+        self.handle_method('POST')
+
+    def do_PUT(self):
+        self.handle_method('PUT')
+
+    def do_DELETE(self):
+        self.handle_method('DELETE')
+
+    def log_message(self, format, *args):
+        pass  # no per-request console output
+
+
+def serve_http(port=HTTP_PORT, host="127.0.0.1"):
+    """
+    Serves the HTTP API until interrupted (storage must already be open).
+    Requests are not signed in, so it only listens on this machine.
+    """
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    print(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,3169 @@
+"""
+Core of the University Management System: storage, indexes and the
+service layer, with no Tk code. The GUI, the HTTP API, benchmarks and
+tests import it.
+"""
+import time
+import array
+import bisect
+import csv
+import datetime
+import gc
+import gzip
+import hashlib
+import heapq
+import hmac
+import io
+import json
+import math
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import traceback
+import zlib
+from collections import Counter, defaultdict, deque
+from functools import wraps
+from itertools import compress, islice, repeat
+from operator import add, attrgetter, itemgetter
+
+# --- Data Storage ---
+# One shared tuple per distinct combination of courses
+course_tuples = {}
+
+def intern_courses(courses):
+    """
+    Returns the shared tuple of these course IDs (in this order).
+    """
+    courses = tuple(map(sys.intern, courses))
+    return course_tuples.setdefault(courses, courses)
+
+
+class Student:
+    """
+    One student. __slots__ records have no per-record attribute dict, and
+    `courses` is a shared tuple of course IDs in enrollment order rather
+    than a dict per student (see --bench memory).
+    """
+    __slots__ = ('name', 'email', 'phone', 'courses')
+
+    def __init__(self, name, email, phone, courses=()):
+        self.name = name
+        self.email = email
+        self.phone = phone
+        self.courses = intern_courses(courses)
+
+
+# Weekly teaching hours a faculty member may take unless set otherwise
+FACULTY_MAX_LOAD = 16
+
+
+class Faculty:
+    """
+    One faculty member (see Student). `courses` are the courses they lead,
+    `qualified` the courses they may teach (empty = any course) and
+    `max_load` their weekly teaching hours.
+    """
+    __slots__ = ('name', 'courses', 'qualified', 'max_load')
+
+    def __init__(self, name, courses=(), qualified=(), max_load=FACULTY_MAX_LOAD):
+        self.name = name
+        self.courses = intern_courses(courses)
+        self.qualified = intern_courses(qualified)
+        self.max_load = max_load
+
+
+# In-memory "database" dictionaries to store students, faculty, courses, and hostel info
+database = {
+    'students': {},  # key: student ID, value: Student
+    'faculty': {},   # key: faculty ID, value: Faculty
+    # Enrollment is kept on both sides: students[sid].courses is a short
+    # tuple, and courses[cid]['students'] is an ordered set (dict with None
+    # values) for O(1) membership, add and remove; len() is the head-count.
+    # predefined courses with fields: name, enrolled students set, assigned
+    # faculty, prerequisites and seat limit (None = no limit)
+    'courses': {
+        'BTECH':   {'name': 'B.Tech',      'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+        'BPHARMA': {'name': 'B.Pharmacy',  'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+        'MBA':     {'name': 'MBA',         'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+        'BUSINESS':{'name': 'Business',    'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+        'BCA':     {'name': 'BCA',         'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+        'BCOM':    {'name': 'B.Com',       'students': {}, 'faculty': None, 'prereq': [], 'capacity': None},
+    },
+    'hostel': {},  # key: student ID, value: dict with hostel_name and room_no
+    'rooms': {},   # key: "hostel/room", value: dict with hostel, room, capacity,
+                   # course preference ('' = any) and occupants set
+    'sections': {},  # key: section ID, value: dict with course, weekly hours,
+                     # assigned faculty ID (None = unassigned) and timetable
+                     # room and start slot (None = unscheduled)
+    'classrooms': {} # key: teaching room name, value: dict with capacity
+}
+
+# Mapping from course ID to fee amount
+course_fee_map = {
+    'BTECH':   180000,
+    'BPHARMA': 120000,
+    'MBA':     300000,
+    'BUSINESS':160000,
+    'BCOM':    125000,
+    'BCA':     130000,
+}
+
+# --- Persistent Storage ---
+# Folder that holds the snapshot and write-ahead log (next to this script)
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ums_data")
+# Fold the write-ahead log into a fresh snapshot after this many changes
+# (or after as many changes as there are students, whichever is larger, so
+# rewriting the snapshot stays proportional to the writes made)
+SNAPSHOT_EVERY = 5000
+# Tables saved in the snapshot
+TABLES = ('students', 'faculty', 'courses', 'hostel', 'rooms', 'sections', 'classrooms')
+# Tables whose records are instances of a __slots__ class instead of dicts
+RECORD_CLASSES = {'students': Student, 'faculty': Faculty}
+
+
+def to_columns(records):
+    """
+    Converts a table {key: {field: value}} to column lists for the snapshot.
+    Parsing a few long lists is much faster than parsing one dict per record.
+    """
+    fields = list(next(iter(records.values()), {}))
+    columns = {'_key': list(records)}
+    for field in fields:
+        columns[field] = [r[field] for r in records.values()]
+    return columns
+
+def from_columns(columns):
+    """
+    Converts snapshot column lists back to a table {key: {field: value}}.
+    """
+    keys = columns.pop('_key')
+    fields = list(columns)
+    rows = zip(*(columns[f] for f in fields))
+    return dict(zip(keys, map(dict, map(zip, repeat(fields), rows))))
+
+def records_to_columns(records, cls):
+    """
+    Converts a table {key: cls instance} to column lists for the snapshot.
+    """
+    columns = {'_key': list(records)}
+    for field in cls.__slots__:
+        columns[field] = list(map(attrgetter(field), records.values()))
+    return columns
+
+def records_from_columns(columns, cls):
+    """
+    Converts snapshot column lists back to a table {key: cls instance}.
+    Older snapshots stored course sets as objects; their keys are used.
+    Fields added since (last in __slots__) are missing and keep their defaults.
+    """
+    keys = columns.pop('_key')
+    fields = [f for f in cls.__slots__ if f in columns]
+    return dict(zip(keys, map(cls, *(columns[f] for f in fields))))
+
+
+def read_log(path):
+    """
+    Yields the records of an append-only log of JSON lines. A last line cut
+    short by a crash is dropped and cut off the file, so the next append
+    starts on a fresh line instead of being glued onto the fragment.
+    """
+    good = 0  # bytes up to the end of the last complete line
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            good += len(line)
+            yield record
+    if os.path.getsize(path) > good:
+        os.truncate(path, good)
+
+
+class LogStorage:
+    """
+    Default storage backend: a JSON snapshot of the whole database plus an
+    append-only write-ahead log with one JSON line per change.
+    Adding a record costs one small append; the log is compacted into a new
+    snapshot every SNAPSHOT_EVERY changes and when the app closes.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, "snapshot.json")
+        self.log_path = os.path.join(data_dir, "changes.log")
+        self.log_file = None
+        self.seq = 0            # sequence number of the last change written
+        self.pending = 0        # changes appended since the last snapshot
+
+    def load(self):
+        """
+        Reads the snapshot (if any) and the changes logged after it.
+        Returns (snapshot_tables_or_None, list_of_changes).
+        """
+        os.makedirs(self.data_dir, exist_ok=True)
+        snapshot = None
+        self.seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.seq = snapshot.pop('seq', 0)
+        changes = []
+        if os.path.exists(self.log_path):
+            for change in read_log(self.log_path):
+                # Skip changes already folded into the snapshot
+                if change['seq'] > self.seq:
+                    changes.append(change)
+                    self.seq = change['seq']
+        self.pending = len(changes)
+        if self.log_file:
+            self.log_file.close()  # loading again after a failed commit
+        self.log_file = open(self.log_path, "a", encoding="utf-8")
+        return snapshot, changes
+
+    def append(self, changes):
+        """
+        Appends changes to the log in a single write and flushes it.
+        Returns the JSON lines written.
+        """
+        lines = []
+        for change in changes:
+            self.seq += 1
+            change['seq'] = self.seq
+            lines.append(json.dumps(change, separators=(',', ':')) + "\n")
+        size = self.log_file.tell()
+        try:
+            self.log_file.write("".join(lines))
+            self.log_file.flush()
+        except BaseException:
+            # Cut off whatever part of the batch reached the file, so a
+            # failed commit leaves none of its changes in the log
+            try:
+                self.log_file.close()
+            except OSError:
+                pass
+            os.truncate(self.log_path, size)
+            self.log_file = open(self.log_path, "a", encoding="utf-8")
+            raise
+        self.pending += len(changes)
+        return lines
+
+    def compact(self, tables):
+        """
+        Writes a new snapshot of column tables atomically and truncates the log.
+        """
+        state = dict(tables, seq=self.seq)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # json.dumps uses the C encoder; json.dump to a file does not
+            f.write(json.dumps(state, separators=(',', ':')))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Changes in the old log are now in the snapshot (seq guards a crash here)
+        self.log_file.close()
+        self.log_file = open(self.log_path, "w", encoding="utf-8")
+        self.pending = 0
+
+    def changed(self):
+        """
+        Only this process writes the local log, so there is never news to read.
+        """
+        return False
+
+    def begin(self):
+        """
+        Starts a write. Returns changes other clients made meanwhile, as
+        (snapshot_or_None, changes); with a local log there are none.
+        """
+        return None, []
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        if self.log_file:
+            self.log_file.close()
+            self.log_file = None
+
+
+# Seconds a shared-database client waits for another client's write to finish
+SQLITE_TIMEOUT = 30
+
+
+class SqliteStorage:
+    """
+    Shared storage backend (--shared-db): the change log and snapshot kept
+    in one SQLite database in WAL mode, so several desks can work on the
+    same data at once. Each desk still holds the whole database in memory
+    and catches up by reading the changes the others appended. Writes are
+    optimistic: a commit takes the write lock, applies what arrived since
+    this desk last read, and is refused (WriteConflict) if that touched the
+    records it was validated against.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.seq = 0            # sequence number of the last change applied here
+        self.pending = 0        # changes in the log since the last snapshot
+        self.pool = queue.LifoQueue()  # idle connections, shared by all threads
+        self.writer = None      # connection holding the open write transaction
+
+    def connect(self):
+        """
+        Takes an idle connection from the pool, opening one if none is free.
+        """
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            pass
+        # isolation_level=None: transactions are begun explicitly below
+        conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Like the local log, a commit survives the app crashing without a
+        # disk sync per write; WAL keeps the database intact on power loss
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def release(self, conn):
+        self.pool.put(conn)
+
+    def load(self):
+        """
+        Creates the tables if needed and reads the snapshot and the changes
+        after it. Returns (snapshot_tables_or_None, list_of_changes).
+        """
+        conn = self.connect()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS changes "
+                         "(seq INTEGER PRIMARY KEY, change TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS snapshot (id INTEGER PRIMARY KEY "
+                         "CHECK (id = 1), seq INTEGER NOT NULL, tables TEXT NOT NULL)")
+            self.seq = 0
+            return self.read(conn, reload=True)
+        finally:
+            self.release(conn)
+
+    def latest(self, conn):
+        """
+        Returns the sequence number of the newest change any client saved.
+        """
+        return conn.execute("SELECT max(seq) FROM (SELECT max(seq) AS seq FROM changes "
+                            "UNION ALL SELECT seq FROM snapshot)").fetchone()[0] or 0
+
+    def read(self, conn, reload=False):
+        """
+        Reads the changes saved after the last one applied here, in one read
+        transaction unless conn already holds the write transaction.
+        Returns (snapshot_or_None, changes); the snapshot is only read on
+        load, or when changes this desk missed were compacted away.
+        """
+        own = not conn.in_transaction
+        if own:
+            conn.execute("BEGIN")
+        try:
+            row = conn.execute("SELECT seq FROM snapshot").fetchone()
+            snapshot_seq = row[0] if row else 0
+            first = conn.execute("SELECT min(seq) FROM changes").fetchone()[0]
+            snapshot = None
+            missed = self.seq < snapshot_seq and (first is None or first > self.seq + 1)
+            if row and (reload or missed):
+                snapshot = json.loads(conn.execute("SELECT tables FROM snapshot").fetchone()[0])
+                self.seq = snapshot_seq
+            changes = [json.loads(text) for (text,) in conn.execute(
+                "SELECT change FROM changes WHERE seq > ? ORDER BY seq", (self.seq,))]
+        finally:
+            if own:
+                conn.execute("COMMIT")
+        if changes:
+            self.seq = changes[-1]['seq']
+        self.pending = self.seq - snapshot_seq
+        return snapshot, changes
+
+    def changed(self):
+        """
+        True if another desk saved changes not yet read here. Needs no lock:
+        it runs on a pooled connection and only reads self.seq.
+        """
+        conn = self.connect()
+        try:
+            return self.latest(conn) > self.seq
+        finally:
+            self.release(conn)
+
+    def poll(self):
+        """
+        Returns the changes other desks saved since the last read, as read().
+        """
+        conn = self.connect()
+        try:
+            return self.read(conn)
+        finally:
+            self.release(conn)
+
+    def begin(self):
+        """
+        Opens the write transaction, waiting while another desk writes, and
+        returns the changes saved since this desk last read, as read().
+        append() commits the transaction and rollback() abandons it.
+        """
+        self.writer = self.connect()
+        try:
+            self.writer.execute("BEGIN IMMEDIATE")
+            return self.read(self.writer)
+        except BaseException:
+            self.rollback()
+            raise
+
+    def append(self, changes):
+        """
+        Adds changes to the log and commits the write transaction.
+        Returns the JSON lines written.
+        """
+        lines = []
+        for change in changes:
+            self.seq += 1
+            change['seq'] = self.seq
+            lines.append(json.dumps(change, separators=(',', ':')) + "\n")
+        self.writer.executemany("INSERT INTO changes (seq, change) VALUES (?, ?)",
+                                zip(map(itemgetter('seq'), changes), lines))
+        self.writer.execute("COMMIT")
+        self.release(self.writer)
+        self.writer = None
+        self.pending += len(changes)
+        return lines
+
+    def rollback(self):
+        if self.writer is not None:
+            if self.writer.in_transaction:
+                self.writer.execute("ROLLBACK")
+            self.release(self.writer)
+            self.writer = None
+
+    def compact(self, tables):
+        """
+        Saves column tables as the snapshot and drops the changes it covers.
+        Skipped if another desk has saved a change since (a later commit
+        compacts instead), as the tables would then be out of date.
+        """
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if self.latest(conn) > self.seq:
+                conn.execute("ROLLBACK")
+                return
+            conn.execute("INSERT OR REPLACE INTO snapshot (id, seq, tables) VALUES (1, ?, ?)",
+                         (self.seq, json.dumps(tables, separators=(',', ':'))))
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (self.seq,))
+            conn.execute("COMMIT")
+            self.pending = 0
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        self.rollback()
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Active storage backend (set by open_storage)
+storage = None
+# Shared SQLite database to use instead of the local log (set by --shared-db)
+shared_db_path = None
+# Guards database, indexes and storage when background threads write
+db_lock = threading.RLock()
+
+# --- Secondary Indexes ---
+# Kept in sync by apply_change so lookups never scan database['students']
+indexes = {
+    'student_email': {},   # lowercase email -> student ID (emails are unique)
+    'student_phone': {},   # phone -> student ID, or a list if several share it
+    'student_name': [],    # sorted list of (lowercase name, student ID)
+    'faculty_name': [],    # sorted list of (lowercase name, faculty ID)
+}
+# New names wait in a small sorted buffer per name index and are merged into
+# the main list in bulk, so inserting stays cheap however large the index is
+NAME_BUFFER = 2000
+name_buffers = {'student_name': [], 'faculty_name': []}
+
+def insert_name(index_name, name, key):
+    """
+    Adds (name, key) to a sorted name index via its insert buffer.
+    """
+    buffer = name_buffers[index_name]
+    bisect.insort(buffer, (name.lower(), key))
+    if len(buffer) >= NAME_BUFFER:
+        names = indexes[index_name]
+        names.extend(buffer)
+        names.sort()  # two sorted runs: timsort merges them in one pass
+        buffer.clear()
+
+def index_phone(phones, phone, sid):
+    """
+    Adds a student to a phone index. Most phones belong to one student, so
+    the ID is stored directly; a list is only made once a phone is shared.
+    """
+    other = phones.setdefault(phone, sid)
+    # IDs are compared by value: equal strings need not be the same object
+    if isinstance(other, list):
+        if sid not in other:
+            phones[phone] = other + [sid]
+    elif other != sid:
+        phones[phone] = [other, sid]
+
+def index_student(sid, s):
+    """
+    Adds one student to the secondary indexes.
+    """
+    indexes['student_email'][s.email.lower()] = sid
+    index_phone(indexes['student_phone'], s.phone, sid)
+    insert_name('student_name', s.name, sid)
+
+def index_faculty(fid, f):
+    """
+    Adds one faculty member to the secondary indexes.
+    """
+    insert_name('faculty_name', f.name, fid)
+
+def rebuild_indexes():
+    """
+    Rebuilds every secondary index from scratch (after loading a snapshot).
+    Sorting once is much faster than inserting records one by one.
+    """
+    sids = list(database['students'])
+    records = list(database['students'].values())
+    emails = map(str.lower, map(attrgetter('email'), records))
+    indexes['student_email'] = dict(zip(emails, sids))
+    phones = dict(zip(map(attrgetter('phone'), records), sids))
+    if len(phones) < len(sids):
+        # Some phones are shared: add students one by one to keep them all
+        phones = {}
+        for phone, sid in zip(map(attrgetter('phone'), records), sids):
+            index_phone(phones, phone, sid)
+    indexes['student_phone'] = phones
+    names = map(str.lower, map(attrgetter('name'), records))
+    indexes['student_name'] = sorted(zip(names, sids))
+    indexes['faculty_name'] = sorted((f.name.lower(), fid)
+                                     for fid, f in database['faculty'].items())
+    for buffer in name_buffers.values():
+        buffer.clear()
+
+def find_by_name_prefix(index_name, prefix, limit=100):
+    """
+    Returns up to `limit` IDs whose name starts with `prefix` (case-insensitive),
+    using binary search on a sorted name index and its insert buffer.
+    """
+    prefix = prefix.lower()
+    matches = []
+    for names in (indexes[index_name], name_buffers[index_name]):
+        i = bisect.bisect_left(names, (prefix,))
+        end = min(len(names), i + limit)
+        while i < end and names[i][0].startswith(prefix):
+            matches.append(names[i])
+            i += 1
+    matches.sort()
+    return [key for name, key in matches[:limit]]
+
+def search_students(text, limit=100):
+    """
+    Looks up students by exact email, exact phone, or name prefix.
+    Returns a list of student IDs.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if '@' in text:
+        sid = indexes['student_email'].get(text.lower())
+        return [sid] if sid else []
+    if text.lstrip('+').isdigit():
+        found = indexes['student_phone'].get(text, [])
+        return found[:limit] if isinstance(found, list) else [found]
+    return find_by_name_prefix('student_name', text, limit)
+
+# --- Fee Ledger ---
+# One row per (student, course) enrollment, kept as parallel columns so
+# reports add up whole columns instead of looping over student dicts.
+# Unenrolling keeps the row (and its payments) but marks it inactive.
+ledger = {
+    'sid': [],                  # student ID of each row
+    'course': array.array('i'), # course number of each row (see ledger_courses)
+    'due': array.array('q'),    # fee due in INR
+    'paid': array.array('q'),   # total paid in INR
+    'active': bytearray(),      # 1 while the student is enrolled, else 0
+}
+ledger_courses = []             # course number -> course ID
+ledger_course_numbers = {}      # course ID -> course number
+ledger_rows = {}                # (student ID, course ID) -> row number
+
+def add_ledger_row(sid, cid, due):
+    """
+    Records the fee due for a new enrollment (re-enrolling reactivates the
+    old row).
+    """
+    row = ledger_rows.get((sid, cid))
+    if row is not None:
+        ledger['active'][row] = 1
+        return
+    if cid not in ledger_course_numbers:
+        ledger_course_numbers[cid] = len(ledger_courses)
+        ledger_courses.append(cid)
+    ledger_rows[(sid, cid)] = len(ledger['sid'])
+    ledger['sid'].append(sid)
+    ledger['course'].append(ledger_course_numbers[cid])
+    ledger['due'].append(due)
+    ledger['paid'].append(0)
+    ledger['active'].append(1)
+
+def deactivate_ledger_row(sid, cid):
+    """
+    Leaves an unenrolled course's row out of fee reports.
+    """
+    row = ledger_rows.get((sid, cid))
+    if row is not None:
+        ledger['active'][row] = 0
+
+def clear_ledger():
+    for column in ledger.values():
+        del column[:]
+    ledger_courses.clear()
+    ledger_course_numbers.clear()
+    ledger_rows.clear()
+
+def ledger_tables():
+    """
+    Returns the ledger in column form for the snapshot.
+    """
+    return {'sid': ledger['sid'],
+            'course': [ledger_courses[c] for c in ledger['course']],
+            'due': ledger['due'].tolist(),
+            'paid': ledger['paid'].tolist(),
+            'active': list(ledger['active'])}
+
+def restore_ledger(columns):
+    """
+    Replaces the ledger with snapshot columns, building each column and
+    the row index in bulk rather than adding rows one by one.
+    """
+    clear_ledger()
+    cids = columns['course']
+    ledger_courses.extend(dict.fromkeys(cids))
+    ledger_course_numbers.update(zip(ledger_courses, range(len(ledger_courses))))
+    ledger['sid'] = list(columns['sid'])
+    ledger['course'] = array.array('i', map(ledger_course_numbers.__getitem__, cids))
+    ledger['due'] = array.array('q', columns['due'])
+    ledger['paid'] = array.array('q', columns['paid'])
+    # Snapshots from before unenrolling kept rows inactive have every row active
+    ledger['active'] = bytearray(columns.get('active') or b"\x01" * len(cids))
+    ledger_rows.update(zip(zip(ledger['sid'], cids), range(len(cids))))
+
+def fee_report():
+    """
+    Totals the ledger per course.
+    Returns a list of dicts (course, enrollments, due, paid, outstanding,
+    with_dues, rate) ending with a 'TOTAL' row. Uses NumPy when it is installed.
+    """
+    with db_lock:
+        count = len(ledger_courses)
+        try:
+            import numpy as np  # optional dependency, only speeds this up
+        except ImportError:
+            np = None
+        if np is not None:
+            active = np.frombuffer(ledger['active'], dtype=np.bool_)
+            course = np.frombuffer(ledger['course'], dtype=np.int32)[active]
+            due = np.frombuffer(ledger['due'], dtype=np.int64)[active]
+            paid = np.frombuffer(ledger['paid'], dtype=np.int64)[active]
+            owing = np.maximum(due - paid, 0)
+            enrollments = np.bincount(course, minlength=count).tolist()
+            dues = np.bincount(course, weights=due, minlength=count).tolist()
+            paids = np.bincount(course, weights=paid, minlength=count).tolist()
+            outstanding = np.bincount(course, weights=owing, minlength=count).tolist()
+            with_dues = np.bincount(course, weights=owing > 0, minlength=count).tolist()
+        else:
+            enrollments, dues, paids = [0] * count, [0] * count, [0] * count
+            outstanding, with_dues = [0] * count, [0] * count
+            for c, d, p in compress(zip(ledger['course'], ledger['due'], ledger['paid']),
+                                    ledger['active']):
+                enrollments[c] += 1
+                dues[c] += d
+                paids[c] += p
+                if d > p:
+                    outstanding[c] += d - p
+                    with_dues[c] += 1
+        courses = list(ledger_courses)
+
+    rows = []
+    for i, cid in enumerate(courses):
+        rows.append({'course': cid, 'enrollments': int(enrollments[i]), 'due': int(dues[i]),
+                     'paid': int(paids[i]), 'outstanding': int(outstanding[i]),
+                     'with_dues': int(with_dues[i])})
+    rows.sort(key=itemgetter('course'))
+    total = {'course': 'TOTAL'}
+    for field in ('enrollments', 'due', 'paid', 'outstanding', 'with_dues'):
+        total[field] = sum(r[field] for r in rows)
+    rows.append(total)
+    for r in rows:
+        r['rate'] = r['paid'] / r['due'] if r['due'] else 0.0
+    return rows
+
+def export_fee_report(path):
+    """
+    Writes the fee report to a CSV file.
+    """
+    rows = fee_report()
+    fields = ['course', 'enrollments', 'due', 'paid', 'outstanding', 'with_dues', 'rate']
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        out = csv.DictWriter(f, fieldnames=fields)
+        out.writeheader()
+        for r in rows:
+            out.writerow(dict(r, rate=f"{r['rate']:.4f}"))
+
+# --- Hostel Rooms ---
+# Rooms with at least one free bed, as a heap of room keys per course
+# preference ('' = open to any course). The smallest key is the next room to
+# fill, so finding a bed is O(log n). Entries for rooms that have filled up
+# are dropped lazily when they reach the top.
+free_beds = {}
+free_bed_keys = set()  # room keys currently in one of the heaps
+# Beds in all rooms and how many are taken, kept by apply_change so the
+# Dashboard never sums over rooms
+bed_counts = {'beds': 0, 'occupied': 0}
+
+def room_key(hostel_name, room_no):
+    return f"{hostel_name}/{room_no}"
+
+def push_free_room(key):
+    """
+    Makes a room with a free bed findable again.
+    """
+    room = database['rooms'][key]
+    if key not in free_bed_keys and len(room['occupants']) < room['capacity']:
+        heapq.heappush(free_beds.setdefault(room['course'], []), key)
+        free_bed_keys.add(key)
+
+def next_free_room(course='', taken=None):
+    """
+    Returns the key of the first room with a free bed for this course
+    preference, or None. `taken` counts beds already promised per room
+    by an allocation that has not been committed yet; rooms it fills are
+    dropped too, so the caller must push them back if the commit fails.
+    """
+    heap = free_beds.get(course)
+    while heap:
+        key = heap[0]
+        room = database['rooms'][key]
+        used = len(room['occupants']) + (taken[key] if taken else 0)
+        if used < room['capacity']:
+            return key
+        heapq.heappop(heap)
+        free_bed_keys.discard(key)
+    return None
+
+def count_beds():
+    """
+    Counts beds and occupied beds over every room (see bed_counts).
+    """
+    rooms = database['rooms'].values()
+    return {'beds': sum(room['capacity'] for room in rooms),
+            'occupied': sum(len(room['occupants']) for room in rooms)}
+
+def rebuild_free_beds():
+    free_beds.clear()
+    free_bed_keys.clear()
+    for key in database['rooms']:
+        push_free_room(key)
+    bed_counts.update(count_beds())
+
+def occupancy_report():
+    """
+    Returns per-hostel room counts: list of dicts (hostel, rooms, capacity,
+    occupied, free) ending with a 'TOTAL' row.
+    """
+    with db_lock:
+        totals = {}
+        for room in database['rooms'].values():
+            t = totals.setdefault(room['hostel'], {'hostel': room['hostel'], 'rooms': 0,
+                                                   'capacity': 0, 'occupied': 0})
+            t['rooms'] += 1
+            t['capacity'] += room['capacity']
+            t['occupied'] += len(room['occupants'])
+    rows = [totals[h] for h in sorted(totals)]
+    total = {'hostel': 'TOTAL'}
+    for field in ('rooms', 'capacity', 'occupied'):
+        total[field] = sum(r[field] for r in rows)
+    rows.append(total)
+    for r in rows:
+        r['free'] = r['capacity'] - r['occupied']
+    return rows
+
+# --- Teaching Workload ---
+# Weekly hours assigned to each faculty member, kept in sync by apply_change
+faculty_load = defaultdict(int)
+
+def rebuild_workload():
+    faculty_load.clear()
+    for section in database['sections'].values():
+        if section['faculty']:
+            faculty_load[section['faculty']] += section['hours']
+
+def is_qualified(f, cid):
+    return not f.qualified or cid in f.qualified
+
+def overloaded_faculty():
+    """
+    Returns the IDs of faculty assigned more hours than their max_load.
+    """
+    faculty = database['faculty']
+    return [fid for fid, load in faculty_load.items() if load > faculty[fid].max_load]
+
+def balance_sections(section_ids, loads):
+    """
+    Picks a faculty member for each section, starting from `loads`
+    {faculty ID: hours} (updated in place). Each section goes to the
+    qualified faculty member with the lowest load relative to their
+    max_load who still has room for it; longer sections, then those with
+    fewer qualified faculty, are placed first.
+    Returns ({section ID: faculty ID}, [section IDs nobody could take]).
+    """
+    faculty = database['faculty']
+    sections = database['sections']
+    # One heap of (relative load, faculty ID) per course, '' holding faculty
+    # qualified for any course. Entries whose load has since changed are
+    # dropped when they reach the top.
+    heaps = defaultdict(list)
+    for fid, f in faculty.items():
+        for cid in f.qualified or ('',):
+            heaps[cid].append((loads[fid] / f.max_load, fid))
+    for heap in heaps.values():
+        heapq.heapify(heap)
+    order = sorted(section_ids, key=lambda s: (
+        -sections[s]['hours'], len(heaps.get(sections[s]['course'], ())) + len(heaps.get('', ()))))
+    shortest = min((sections[s]['hours'] for s in order), default=0)
+
+    def top(heap):
+        while heap:
+            ratio, fid = heap[0]
+            f = faculty[fid]
+            if ratio != loads[fid] / f.max_load or f.max_load - loads[fid] < shortest:
+                heapq.heappop(heap)  # stale, or too full for any section
+                continue
+            return heap[0]
+        return None
+
+    chosen, unassigned = {}, []
+    for sec in order:
+        cid, hours = sections[sec]['course'], sections[sec]['hours']
+        candidates = [heaps[c] for c in (cid, '') if heaps.get(c)]
+        skipped = []  # least-loaded faculty without room for this section
+        fid = None
+        while True:
+            best = min(((entry, heap) for heap in candidates
+                        for entry in [top(heap)] if entry), default=None)
+            if best is None:
+                break
+            (ratio, candidate), heap = best
+            if loads[candidate] + hours <= faculty[candidate].max_load:
+                fid = candidate
+                break
+            skipped.append((heap, heapq.heappop(heap)))
+        for heap, entry in skipped:
+            heapq.heappush(heap, entry)
+        if fid is None:
+            unassigned.append(sec)
+            continue
+        chosen[sec] = fid
+        loads[fid] += hours
+        f = faculty[fid]
+        for c in f.qualified or ('',):
+            heapq.heappush(heaps[c], (loads[fid] / f.max_load, fid))
+    return chosen, unassigned
+
+# --- Timetable ---
+# The teaching week is a grid of one-hour slots, slot = day * SLOTS_PER_DAY +
+# hour. A scheduled section meets once a week for its `hours` consecutive
+# slots on one day, so its time is a bitmask and two bookings clash exactly
+# when their masks share a bit: one AND per room, faculty member or course.
+DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri')
+DAY_START = 9      # hour the first slot starts
+SLOTS_PER_DAY = 8  # 9:00 to 17:00
+# Soft preferences: penalty points the planner keeps as low as it can
+EMPTY_SEAT_PENALTY = 0.1  # per empty seat in the room
+LATE_PENALTY = 1          # per hour the section starts after the first slot
+SAME_DAY_PENALTY = 5      # if another section of the course meets that day
+# A section that does not fit may bump this many placed sections...
+MAX_BUMPED = 2
+# ...and a section can be bumped this often before it stays unplaced
+BUMP_LIMIT = 3
+# Time booked per resource, kept in sync by apply_change:
+# ('room', name) / ('faculty', fid) / ('course', cid) -> {section ID: mask}
+bookings = defaultdict(dict)
+
+def slot_mask(start, hours):
+    return ((1 << hours) - 1) << start
+
+def slot_label(start, hours):
+    day, hour = divmod(start, SLOTS_PER_DAY)
+    return f"{DAYS[day]} {DAY_START + hour}:00-{DAY_START + hour + hours}:00"
+
+def section_resources(sec):
+    """
+    Resource keys a scheduled section books.
+    """
+    keys = [('room', sec['room']), ('course', sec['course'])]
+    if sec['faculty']:
+        keys.append(('faculty', sec['faculty']))
+    return keys
+
+def book_section(section, sec):
+    if sec['start'] is not None:
+        mask = slot_mask(sec['start'], sec['hours'])
+        for key in section_resources(sec):
+            bookings[key][section] = mask
+
+def unbook_section(section, sec):
+    if sec['start'] is not None:
+        for key in section_resources(sec):
+            bookings[key].pop(section, None)
+
+def rebuild_timetable():
+    bookings.clear()
+    for section, sec in database['sections'].items():
+        # Sections saved before scheduling existed are unscheduled
+        sec.setdefault('room', None)
+        sec.setdefault('start', None)
+        book_section(section, sec)
+
+def busy_mask(key, exclude=()):
+    """
+    Returns the slots a resource is booked for, ignoring sections in `exclude`.
+    A room or person has at most one booking per slot, so this is short.
+    """
+    mask = 0
+    for section, booked in bookings.get(key, {}).items():
+        if section not in exclude:
+            mask |= booked
+    return mask
+
+def course_conflicts():
+    """
+    Returns {course ID: set of other course IDs sharing a student}.
+    Enrollment is per course, so a section must not overlap any section of
+    these courses; sections of the same course are alternatives and may.
+    Students with the same courses share one tuple, so each distinct
+    combination is looked at once.
+    """
+    graph = defaultdict(set)
+    for combo in {s.courses for s in database['students'].values()}:
+        for cid in combo:
+            graph[cid].update(combo)
+    for cid, others in graph.items():
+        others.discard(cid)
+    return graph
+
+def section_sizes():
+    """
+    Returns {course ID: expected students per section}, the enrolled
+    students split evenly over the course's sections.
+    """
+    counts = defaultdict(int)
+    for sec in database['sections'].values():
+        counts[sec['course']] += 1
+    courses = database['courses']
+    return {cid: -(-len(courses[cid]['students']) // n) for cid, n in counts.items()}
+
+def timetable_conflicts(conflicts=None):
+    """
+    Checks every scheduled section against the hard constraints.
+    Returns {section ID: reason} for those breaking one.
+    """
+    if conflicts is None:
+        conflicts = course_conflicts()
+    sizes = section_sizes()
+    classrooms = database['classrooms']
+    problems = {}
+    for section, sec in database['sections'].items():
+        if sec['start'] is None:
+            continue
+        mask = slot_mask(sec['start'], sec['hours'])
+        others = (section,)
+        room = classrooms.get(sec['room'])
+        if room is None:
+            problems[section] = f"Unknown room {sec['room']}"
+        elif room['capacity'] < sizes[sec['course']]:
+            problems[section] = f"Room {sec['room']} is too small"
+        elif sec['start'] % SLOTS_PER_DAY + sec['hours'] > SLOTS_PER_DAY:
+            problems[section] = "Runs past the end of the day"
+        elif busy_mask(('room', sec['room']), others) & mask:
+            problems[section] = f"Room {sec['room']} is double-booked"
+        elif sec['faculty'] and busy_mask(('faculty', sec['faculty']), others) & mask:
+            problems[section] = f"{sec['faculty']} is double-booked"
+        elif any(busy_mask(('course', cid)) & mask for cid in conflicts.get(sec['course'], ())):
+            problems[section] = "Students have another class then"
+    return problems
+
+def place_sections(section_ids, conflicts, exclude):
+    """
+    Picks a room and start slot for each section around the bookings of
+    everything outside `exclude`. Each section takes the placement with the
+    lowest soft-preference penalty that breaks no hard constraint; sections
+    whose students take the most other courses, then longer and larger
+    ones, are placed first. A section with no free placement may bump up
+    to MAX_BUMPED sections whose faculty or students stand in its way;
+    those go back in the queue, and each section can be bumped only
+    BUMP_LIMIT times so the search always ends.
+    Returns ({section ID: (room, start)} for each section placed or moved,
+    [section IDs that did not fit]).
+    """
+    sections = database['sections']
+    sizes = section_sizes()
+    # Rooms smallest first, so the first free one that fits wastes least
+    rooms = sorted((c['capacity'], r) for r, c in database['classrooms'].items())
+    capacities = [capacity for capacity, _ in rooms]
+    # Bookings and busy slots per resource, read on first use and updated
+    # as sections are placed or bumped
+    booked, busy = {}, {}
+    where = {}  # current (room, start) of sections placed or bumped here
+    bumps = defaultdict(int)
+
+    def booked_for(key):
+        if key not in booked:
+            booked[key] = {s: m for s, m in bookings.get(key, {}).items() if s not in exclude}
+            busy[key] = 0
+            for m in booked[key].values():
+                busy[key] |= m
+        return booked[key]
+
+    def busy_for(key):
+        booked_for(key)
+        return busy[key]
+
+    def keys_for(section, room):
+        return section_resources(dict(sections[section], room=room))
+
+    def book(section, room, start):
+        where[section] = (room, start)
+        mask = slot_mask(start, sections[section]['hours'])
+        for key in keys_for(section, room):
+            booked_for(key)[section] = mask
+            busy[key] |= mask
+
+    def unbook(section):
+        room, start = where.get(section) or (sections[section]['room'], sections[section]['start'])
+        where[section] = (None, None)
+        for key in keys_for(section, room):
+            booked_for(key).pop(section, None)
+            busy[key] = 0
+            for m in booked[key].values():
+                busy[key] |= m
+
+    def best_placement(section, bump):
+        # (penalty, start, room, sections to bump) of the cheapest placement
+        sec = sections[section]
+        cid, hours, need = sec['course'], sec['hours'], sizes[sec['course']]
+        people = [('course', other) for other in conflicts.get(cid, ())]
+        if sec['faculty']:
+            people.append(('faculty', sec['faculty']))
+        # Slots the faculty member or any of the students are busy
+        blocked = 0
+        for key in people:
+            blocked |= busy_for(key)
+        own = busy_for(('course', cid))
+        first = bisect.bisect_left(capacities, need)
+        best = None
+        for day in range(len(DAYS)):
+            same_day = SAME_DAY_PENALTY if own & slot_mask(day * SLOTS_PER_DAY, SLOTS_PER_DAY) else 0
+            for hour in range(SLOTS_PER_DAY - hours + 1):
+                penalty = same_day + LATE_PENALTY * hour
+                start = day * SLOTS_PER_DAY + hour
+                mask = slot_mask(start, hours)
+                in_way = ()
+                if blocked & mask:
+                    if not bump:
+                        continue
+                    in_way = {s for key in people for s, m in booked_for(key).items() if m & mask}
+                    if len(in_way) > MAX_BUMPED or any(bumps[s] >= BUMP_LIMIT for s in in_way):
+                        continue
+                # Fewest bumped sections first, then lowest penalty
+                if best is not None and (len(in_way), penalty) >= (len(best[3]), best[0]):
+                    if not in_way:
+                        break  # later hours only cost more
+                    continue
+                for i in range(first, len(rooms)):
+                    capacity, room = rooms[i]
+                    if not busy_for(('room', room)) & mask:
+                        penalty += EMPTY_SEAT_PENALTY * (capacity - need)
+                        if best is None or (len(in_way), penalty) < (len(best[3]), best[0]):
+                            best = (penalty, start, room, in_way)
+                        break
+        return best
+
+    queue = deque(sorted(section_ids, key=lambda s: (
+        -len(conflicts.get(sections[s]['course'], ())), -sections[s]['hours'],
+        -sizes[sections[s]['course']])))
+    unplaced = []
+    while queue:
+        section = queue.popleft()
+        best = best_placement(section, False) or best_placement(section, True)
+        if best is None:
+            unplaced.append(section)
+            continue
+        _, start, room, in_way = best
+        for other in sorted(in_way):
+            unbook(other)
+            bumps[other] += 1
+            queue.append(other)
+        book(section, room, start)
+    placed = {s: spot for s, spot in where.items() if spot[0] is not None}
+    return placed, unplaced
+
+def timetable_penalty():
+    """
+    Returns the total soft-preference penalty of the current timetable.
+    """
+    sizes = section_sizes()
+    classrooms = database['classrooms']
+    days = defaultdict(int)
+    total = 0
+    for sec in database['sections'].values():
+        if sec['start'] is None or sec['room'] not in classrooms:
+            continue
+        day, hour = divmod(sec['start'], SLOTS_PER_DAY)
+        total += (LATE_PENALTY * hour +
+                  EMPTY_SEAT_PENALTY * max(0, classrooms[sec['room']]['capacity'] - sizes[sec['course']]))
+        days[(sec['course'], day)] += 1
+    return total + sum(SAME_DAY_PENALTY * (n - 1) for n in days.values())
+
+# --- Course Prerequisites ---
+# The prerequisite graph is compiled into bitmasks: every course gets a bit,
+# and prereq_closure[cid] has the bits of all its direct and indirect
+# prerequisites. Checking a student is then one AND of two integers,
+# however large the catalog grows.
+course_bits = {}      # course ID -> bit number
+bit_courses = []      # bit number -> course ID
+prereq_closure = {}   # course ID -> bitmask of every course it requires
+
+def find_prereq_cycle(prereqs):
+    """
+    Returns a list of course IDs forming a cycle in {cid: [prereq, ...]},
+    or None if the graph has no cycle.
+    """
+    state = {}  # cid -> 1 while being visited, 2 when done
+    for start in prereqs:
+        if start in state:
+            continue
+        # Iterative depth-first search keeping the current path
+        path, stack = [], [(start, iter(prereqs.get(start, ())))]
+        state[start] = 1
+        path.append(start)
+        while stack:
+            cid, children = stack[-1]
+            for child in children:
+                if state.get(child) == 1:
+                    return path[path.index(child):] + [child]
+                if child not in state:
+                    state[child] = 1
+                    path.append(child)
+                    stack.append((child, iter(prereqs.get(child, ()))))
+                    break
+            else:
+                state[cid] = 2
+                path.pop()
+                stack.pop()
+    return None
+
+def compile_prereqs():
+    """
+    Rebuilds course_bits and prereq_closure from database['courses'].
+    """
+    courses = database['courses']
+    course_bits.clear()
+    bit_courses[:] = courses
+    for i, cid in enumerate(courses):
+        course_bits[cid] = i
+    prereq_closure.clear()
+
+    def closure(cid):
+        if cid not in prereq_closure:
+            mask = 0
+            for pre in courses[cid]['prereq']:
+                if pre in courses:
+                    mask |= (1 << course_bits[pre]) | closure(pre)
+            prereq_closure[cid] = mask
+        return prereq_closure[cid]
+
+    # Visit prerequisites before the courses that need them (the graph is
+    # acyclic, see set_prereqs) so the recursion above stays shallow
+    done = set()
+    for start in courses:
+        stack = [start]
+        while stack:
+            cid = stack[-1]
+            pending = [p for p in courses[cid]['prereq'] if p in courses and p not in done]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if cid not in done:
+                closure(cid)
+                done.add(cid)
+
+def course_mask(course_ids):
+    """
+    Returns the bitmask of a collection of course IDs.
+    """
+    mask = 0
+    for cid in course_ids:
+        mask |= 1 << course_bits[cid]
+    return mask
+
+def missing_prereqs(course_ids, cid):
+    """
+    Returns the prerequisites of `cid` not among `course_ids`, in catalog order.
+    """
+    missing = prereq_closure.get(cid, 0) & ~course_mask(course_ids)
+    result = []
+    while missing:
+        low = missing & -missing  # lowest set bit
+        result.append(bit_courses[low.bit_length() - 1])
+        missing ^= low
+    return result
+
+def eligible_courses_for_all():
+    """
+    Returns {student ID: [course IDs the student may enroll in next]}.
+    Students with the same set of courses share one computed list, so
+    the work grows with the number of distinct course combinations.
+    """
+    with db_lock:
+        students = [(sid, s.courses) for sid, s in database['students'].items()]
+        catalog = [(cid, 1 << course_bits[cid], prereq_closure[cid]) for cid in course_bits]
+    by_mask = {}
+    result = {}
+    for sid, courses in students:
+        mask = course_mask(courses)
+        eligible = by_mask.get(mask)
+        if eligible is None:
+            eligible = by_mask[mask] = [cid for cid, bit, needs in catalog
+                                        if not mask & bit and needs & ~mask == 0]
+        result[sid] = eligible
+    return result
+
+def export_eligibility(path):
+    """
+    Writes every student's eligible courses to a CSV file.
+    """
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        out = csv.writer(f)
+        out.writerow(["Student ID", "Eligible Courses"])
+        for sid, courses in eligible_courses_for_all().items():
+            out.writerow([sid, " ".join(courses)])
+
+def apply_change(change):
+    """
+    Applies one logged change to the in-memory database.
+    Used both for live edits and for replaying the write-ahead log.
+    """
+    op = change['op']
+    if op == 'add_student':
+        database['students'][change['sid']] = Student(change['name'], change['email'],
+                                                      change['phone'], (change['course'],))
+        database['courses'][change['course']]['students'][change['sid']] = None
+        index_student(change['sid'], database['students'][change['sid']])
+        add_ledger_row(change['sid'], change['course'], course_fee_map.get(change['course'], 0))
+    elif op == 'add_faculty':
+        database['faculty'][change['fid']] = Faculty(
+            change['name'], (), change.get('qualified', ()),
+            change.get('max_load', FACULTY_MAX_LOAD))
+        index_faculty(change['fid'], database['faculty'][change['fid']])
+    elif op == 'enroll':
+        s = database['students'][change['sid']]
+        if change['cid'] not in s.courses:
+            s.courses = intern_courses(s.courses + (change['cid'],))
+        database['courses'][change['cid']]['students'][change['sid']] = None
+        add_ledger_row(change['sid'], change['cid'], course_fee_map.get(change['cid'], 0))
+    elif op == 'unenroll':
+        s = database['students'][change['sid']]
+        s.courses = intern_courses(cid for cid in s.courses if cid != change['cid'])
+        database['courses'][change['cid']]['students'].pop(change['sid'], None)
+        deactivate_ledger_row(change['sid'], change['cid'])
+    elif op == 'set_prereqs':
+        database['courses'][change['cid']]['prereq'] = list(change['prereqs'])
+        compile_prereqs()
+    elif op == 'set_capacity':
+        database['courses'][change['cid']]['capacity'] = change['capacity']
+    elif op == 'pay':
+        ledger['paid'][ledger_rows[(change['sid'], change['cid'])]] += change['amount']
+    elif op == 'set_faculty':
+        f = database['faculty'][change['fid']]
+        f.qualified = intern_courses(change['qualified'])
+        f.max_load = change['max_load']
+    elif op == 'add_section':
+        database['sections'][change['section']] = {'course': change['course'],
+                                                   'hours': change['hours'], 'faculty': None,
+                                                   'room': None, 'start': None}
+    elif op == 'assign_section':
+        section = database['sections'][change['section']]
+        unbook_section(change['section'], section)
+        if section['faculty']:
+            faculty_load[section['faculty']] -= section['hours']
+        section['faculty'] = change['fid']
+        if change['fid']:
+            faculty_load[change['fid']] += section['hours']
+        book_section(change['section'], section)
+    elif op == 'schedule':
+        section = database['sections'][change['section']]
+        unbook_section(change['section'], section)
+        section['room'] = change['room']
+        section['start'] = change['start']
+        book_section(change['section'], section)
+    elif op == 'add_classroom':
+        database['classrooms'][change['room']] = {'capacity': change['capacity']}
+    elif op == 'assign_course':
+        course = database['courses'][change['cid']]
+        old = database['faculty'].get(course['faculty'])
+        if old:
+            old.courses = intern_courses(c for c in old.courses if c != change['cid'])
+        course['faculty'] = change['fid']
+        if change['fid']:
+            f = database['faculty'][change['fid']]
+            f.courses = intern_courses(f.courses + (change['cid'],))
+    elif op == 'add_room':
+        key = room_key(change['hostel'], change['room'])
+        database['rooms'][key] = {'hostel': change['hostel'], 'room': change['room'],
+                                  'capacity': change['capacity'],
+                                  'course': change.get('course', ''), 'occupants': {}}
+        bed_counts['beds'] += change['capacity']
+        push_free_room(key)
+    elif op == 'set_hostel':
+        sid = change['sid']
+        # Free the bed in the student's old room
+        old = database['hostel'].get(sid)
+        if old:
+            old_key = room_key(old['hostel_name'], old['room_no'])
+            if old_key in database['rooms']:
+                occupants = database['rooms'][old_key]['occupants']
+                if sid in occupants:
+                    del occupants[sid]
+                    bed_counts['occupied'] -= 1
+                push_free_room(old_key)
+        database['hostel'][sid] = {'hostel_name': change['hostel_name'],
+                                   'room_no': change['room_no']}
+        key = room_key(change['hostel_name'], change['room_no'])
+        if key in database['rooms'] and sid not in database['rooms'][key]['occupants']:
+            database['rooms'][key]['occupants'][sid] = None
+            bed_counts['occupied'] += 1
+    else:
+        raise ValueError(f"Unknown change: {op}")
+
+# Times a service is run again after a WriteConflict before giving up
+TRANSACTION_ATTEMPTS = 5
+# Commits made and refused for conflicts by this process (see --bench contention)
+write_stats = Counter()
+
+
+class WriteConflict(ValueError):
+    """
+    Raised by commit when another desk first saved a change to the records
+    the new one was validated against. A ValueError, so a conflict that is
+    not retried reaches the user like any other refusal.
+    """
+
+    def __init__(self):
+        super().__init__("Another desk changed this record at the same time; try again.")
+
+
+def change_keys(change):
+    """
+    Returns the records a change touches as "kind:id" strings, or None if
+    it may affect any record. Used to tell whether two desks' writes conflict.
+    """
+    op = change['op']
+    if op == 'add_student':
+        return {f"student:{change['sid']}", f"email:{change['email'].lower()}",
+                f"course:{change['course']}"}
+    if op in ('enroll', 'unenroll'):
+        return {f"student:{change['sid']}", f"course:{change['cid']}"}
+    return None
+
+def write_conflict(written, changes):
+    """
+    True if changes other desks saved first (`written`, from catch_up)
+    touch what `changes` were validated against.
+    """
+    if written is not None and not written:
+        return False
+    for change in changes:
+        keys = change_keys(change)
+        if written is None or keys is None:
+            return True
+        for key in keys & written:
+            kind, _, cid = key.partition(':')
+            # Other enrollments only matter where the course has a seat limit
+            if kind != 'course' or database['courses'][cid].get('capacity'):
+                return True
+    return False
+
+def catch_up(snapshot, changes):
+    """
+    Applies a snapshot and/or changes saved by other desks (from storage
+    begin or poll). Returns the keys they touched (see change_keys), or
+    None if that is unknown.
+    """
+    written = set()
+    if snapshot is not None:
+        restore_tables(snapshot)
+        compile_prereqs()
+        publish({'op': 'reset'})
+        written = None
+    for change in changes:
+        apply_change(change)
+        publish(change)
+        keys = change_keys(change)
+        written = None if written is None or keys is None else written | keys
+    return written
+
+def sync_storage():
+    """
+    Applies changes other desks saved to the shared database since this
+    process last looked (the local log has none). Called before each
+    background task and API request so they see current data.
+    """
+    if storage is not None and storage.changed():
+        with db_lock:
+            catch_up(*storage.poll())
+
+def transaction(func):
+    """
+    Decorator for services that validate and then commit, making them
+    optimistic transactions: after a WriteConflict the data has already
+    caught up, so the service runs again (up to TRANSACTION_ATTEMPTS times).
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(TRANSACTION_ATTEMPTS - 1):
+            try:
+                return func(*args, **kwargs)
+            except WriteConflict:
+                pass
+        return func(*args, **kwargs)
+    return wrapper
+
+def commit(change):
+    """
+    Applies a change to the database and records it in storage.
+    """
+    commit_many([change])
+
+def commit_many(changes):
+    """
+    Applies a batch of changes and records them in storage with one write.
+    With a shared database, changes other desks saved first are applied
+    before them, and WriteConflict is raised if those touch the same records.
+    If applying or saving fails, the data is loaded again from storage, so
+    memory never keeps a change that was not saved.
+    """
+    user = acting_user()
+    stamp = datetime.datetime.now().isoformat(timespec='seconds')
+    with db_lock:
+        try:
+            if storage is not None and write_conflict(catch_up(*storage.begin()), changes):
+                write_stats['conflicts'] += 1
+                raise WriteConflict()
+        except BaseException:
+            if storage is not None:
+                storage.rollback()
+            raise
+        try:
+            for change in changes:
+                apply_change(change)
+                change['user'] = user
+                change['time'] = stamp
+            if storage is not None:
+                lines = storage.append(changes)
+        except BaseException:
+            if storage is not None:
+                storage.rollback()
+                reload_database()
+            raise
+        if audit_log is not None and storage is not None:
+            # Same lines as the storage log, so auditing costs no encoding
+            audit_log.append(lines)
+        if storage is not None and storage.pending >= max(SNAPSHOT_EVERY,
+                                                          len(database['students'])):
+            try:
+                storage.compact(snapshot_tables())
+            except Exception:
+                # The changes are saved in the log; compacting is tried
+                # again on the next commit
+                traceback.print_exc()
+        write_stats['commits'] += 1
+        for change in changes:
+            publish(change)
+
+def reload_database():
+    """
+    Replaces the in-memory data with what storage holds, dropping changes
+    that were applied but never saved. Used when a commit fails part way.
+    """
+    try:
+        snapshot, changes = storage.load()
+        clear_database()
+        # Prerequisites come back from the snapshot or the log
+        for course in database['courses'].values():
+            course['prereq'] = []
+        if snapshot is not None:
+            restore_tables(snapshot)
+        compile_prereqs()
+        for change in changes:
+            apply_change(change)
+        publish({'op': 'reset'})
+    except Exception:
+        # Leave the commit's own error to the caller
+        traceback.print_exc()
+
+def course_full(cid, extra=0):
+    """
+    True if a course has a seat limit and no free seat, counting `extra`
+    students about to be added that are not committed yet.
+    """
+    capacity = database['courses'][cid].get('capacity')
+    return bool(capacity) and len(database['courses'][cid]['students']) + extra >= capacity
+
+def validate_student(sid, name, email, phone, course):
+    """
+    Checks a new student against the Add Student rules.
+    Returns an error message, or None if the student can be saved.
+    """
+    # Check all fields filled
+    if not (sid and name and email and phone and course):
+        return "Fill all fields!"
+    # Check if student ID already exists
+    if sid in database['students']:
+        return "Student ID already exists."
+    # Check email is not used by another student (email index)
+    if email.lower() in indexes['student_email']:
+        return "Email already registered."
+    if course not in course_fee_map:
+        return "Unknown course."
+    if course_full(course):
+        return "Course is full."
+    # A new student has no courses yet, so any prerequisite is missing
+    if prereq_closure.get(course):
+        return f"{course} requires: {', '.join(missing_prereqs((), course))}"
+    return None
+
+def open_storage(data_dir=DATA_DIR, db_path=None):
+    """
+    Opens the storage backend and loads the snapshot plus logged changes
+    into the database. With db_path (default: --shared-db) data is kept in
+    that shared SQLite database instead of the log in data_dir, which still
+    holds this desk's enquiry queue and audit log.
+    """
+    global storage
+    db_path = db_path or shared_db_path
+    storage = SqliteStorage(db_path) if db_path else LogStorage(data_dir)
+    # Loading creates millions of small objects; pausing the cyclic
+    # garbage collector roughly halves cold-start time
+    gc.disable()
+    try:
+        snapshot, changes = storage.load()
+        if snapshot is not None:
+            restore_tables(snapshot)
+    finally:
+        gc.enable()
+    compile_prereqs()
+    for change in changes:
+        apply_change(change)
+    open_enquiry_queue(data_dir)
+    open_audit_log(data_dir)
+    publish({'op': 'reset'})
+
+def snapshot_tables():
+    """
+    Returns every table in column form for the snapshot.
+    """
+    tables = {table: records_to_columns(database[table], RECORD_CLASSES[table])
+              if table in RECORD_CLASSES else to_columns(database[table])
+              for table in TABLES}
+    tables['ledger'] = ledger_tables()
+    return tables
+
+def restore_tables(tables):
+    """
+    Replaces the in-memory data with snapshot column tables.
+    """
+    for table in TABLES:
+        if table in RECORD_CLASSES and table in tables:
+            database[table] = records_from_columns(tables[table], RECORD_CLASSES[table])
+        elif table in tables:
+            database[table] = from_columns(tables[table])
+    # Snapshots from before seat limits have none
+    for course in database['courses'].values():
+        course.setdefault('capacity', None)
+    if 'ledger' in tables:
+        restore_ledger(tables['ledger'])
+    rebuild_indexes()
+    rebuild_free_beds()
+    rebuild_workload()
+    rebuild_timetable()
+
+def clear_database():
+    """
+    Empties every table and index (used by benchmarks between runs).
+    """
+    for table in ('students', 'faculty', 'hostel', 'rooms', 'sections', 'classrooms'):
+        database[table] = {}
+    for course in database['courses'].values():
+        course['students'] = {}
+        course['faculty'] = None
+        course['capacity'] = None
+    clear_ledger()
+    rebuild_indexes()
+    rebuild_free_beds()
+    rebuild_workload()
+    rebuild_timetable()
+    compile_prereqs()
+    publish({'op': 'reset'})
+
+def close_storage():
+    """
+    Compacts pending changes into the snapshot and closes storage.
+    """
+    global storage
+    if storage is not None:
+        if storage.pending:
+            storage.compact(snapshot_tables())
+        storage.close()
+        storage = None
+    close_enquiry_queue()
+    close_audit_log()
+
+# --- Enquiry Queue ---
+# Seconds the writer waits to gather submissions into one fsync
+ENQUIRY_FLUSH_INTERVAL = 0.2
+# All enquiries by ID, loaded from the queue log: time, name, email, query, status
+enquiries = {}
+enquiry_counts = {'open': 0}
+enquiry_days = Counter()  # enquiries submitted per date ("YYYY-MM-DD")
+
+
+class EnquiryQueue:
+    """
+    Append-only log of enquiries and status changes.
+    Submissions only join an in-memory batch; a writer thread appends the
+    batch and fsyncs once per ENQUIRY_FLUSH_INTERVAL, so a burst of
+    submissions costs one disk sync rather than one each.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.path = os.path.join(data_dir, "enquiries.log")
+        self.batch = []         # records waiting to be written
+        self.syncs = 0          # number of fsyncs so far
+        self.closed = False
+        self.ready = threading.Condition()
+        self.file = None
+        self.writer = None
+
+    def load(self):
+        """
+        Replays the log into `enquiries` and starts the writer thread.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            for record in read_log(self.path):
+                apply_enquiry(record)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.writer = threading.Thread(target=self.write_batches, daemon=True,
+                                       name="ums-enquiry-writer")
+        self.writer.start()
+
+    def append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self.ready:
+            self.batch.append(line)
+            self.ready.notify()
+        return line
+
+    def write_batches(self):
+        while True:
+            with self.ready:
+                while not self.batch and not self.closed:
+                    self.ready.wait()
+                if self.closed and not self.batch:
+                    return
+            # Let more submissions join this batch before syncing
+            time.sleep(ENQUIRY_FLUSH_INTERVAL)
+            with self.ready:
+                lines, self.batch = self.batch, []
+            self.file.write("".join(lines))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.syncs += 1
+
+    def unflushed(self):
+        return len(self.batch)
+
+    def close(self):
+        """
+        Writes the last batch and stops the writer.
+        """
+        with self.ready:
+            self.closed = True
+            self.ready.notify()
+        self.writer.join()
+        self.file.close()
+
+
+# Open enquiry queue (set by open_enquiry_queue)
+enquiry_queue = None
+
+def apply_enquiry(record):
+    """
+    Applies one enquiry log record to `enquiries`.
+    """
+    if record['op'] == 'enquiry':
+        enquiries[record['id']] = {'time': record['time'], 'name': record['name'],
+                                   'email': record['email'], 'query': record['query'],
+                                   'status': 'open'}
+        enquiry_counts['open'] += 1
+        enquiry_days[record['time'][:10]] += 1
+    elif record['op'] == 'answer':
+        e = enquiries.get(record['id'])
+        if e and e['status'] == 'open':
+            e['status'] = 'answered'
+            enquiry_counts['open'] -= 1
+
+def record_enquiry(record):
+    """
+    Applies an enquiry record and queues it for the log.
+    """
+    record['user'] = acting_user()
+    record.setdefault('time', datetime.datetime.now().isoformat(timespec='seconds'))
+    with db_lock:
+        apply_enquiry(record)
+        if enquiry_queue is not None:
+            line = enquiry_queue.append(record)
+            if audit_log is not None:
+                audit_log.append([line])
+        publish(record)
+
+def open_enquiry_queue(data_dir=DATA_DIR):
+    global enquiry_queue
+    enquiries.clear()
+    enquiry_counts['open'] = 0
+    enquiry_days.clear()
+    enquiry_queue = EnquiryQueue(data_dir)
+    enquiry_queue.load()
+
+def close_enquiry_queue():
+    global enquiry_queue
+    if enquiry_queue is not None:
+        enquiry_queue.close()
+        enquiry_queue = None
+
+# --- Change Stream ---
+# Every committed change is passed to each subscriber, in commit order and
+# while db_lock is held, so subscribers can keep derived data (indexes,
+# reports, exports) up to date without rescanning `database`. A change is
+# the storage log record ('op', its fields, 'seq', 'user', 'time'); enquiry
+# records ('op' 'enquiry' or 'answer') come through too. {'op': 'reset'}
+# means the data was loaded or cleared and derived data should be rebuilt.
+subscribers = []
+
+# Who is making changes: the signed-in GUI user, or set per thread
+# (actor.user) by the HTTP API
+current_user = None
+actor = threading.local()
+
+def acting_user():
+    return getattr(actor, 'user', None) or current_user or 'system'
+
+def subscribe(callback):
+    """
+    Calls callback(change) for every change from now on.
+    Callbacks must be quick: commits wait for them.
+    """
+    subscribers.append(callback)
+    return callback
+
+def unsubscribe(callback):
+    subscribers.remove(callback)
+
+def publish(change):
+    for callback in subscribers:
+        try:
+            callback(change)
+        except Exception:
+            # A broken subscriber must not undo or block a saved change
+            traceback.print_exc()
+
+# --- Fuzzy Search ---
+# Two-level inverted index over students (name and email), faculty (name)
+# and enquiries (name, email and question). Each distinct word gets postings
+# of the documents holding it, and the vocabulary itself is indexed by
+# trigrams (three-letter pieces of the word padded as "  word "), so a
+# misspelled or half-typed query word is matched to similar words first and
+# only their documents are read. Postings are append-only int arrays; the
+# index is built on first use and then kept current from the change stream.
+SEARCH_KINDS = ('student', 'faculty', 'enquiry')
+FUZZY_MIN_MATCH = 0.4     # least similarity (Dice over trigrams) for a word to match...
+FUZZY_SPREAD = 0.3        # ...and at most this far below the query word's best match
+FUZZY_PREFIX_MATCH = 0.9  # similarity of a word the query word is the start of
+FUZZY_MIN_SCORE = 0.5     # least average similarity of a result to the query words
+FUZZY_READ_LIMIT = 100000  # postings read per query word; commoner words are checked per result
+FUZZY_RESCORE = 200       # best candidates checked against those common words
+FUZZY_DEBOUNCE = 250      # ms the Search tab waits after the last keystroke
+fuzzy = {
+    'built': False,
+    'words': {},                  # word -> word number
+    'word_list': [],              # word number -> word
+    'grams': defaultdict(list),   # trigram -> word numbers
+    'postings': [],               # word number -> array of document numbers
+    'kinds': bytearray(),         # document number -> index in SEARCH_KINDS
+    'ids': [],                    # document number -> record ID
+}
+
+def search_words(text):
+    """
+    Returns the set of lowercase words (two letters or more) in text.
+    Digits are left out: IDs, phones and emails have exact lookups.
+    """
+    return set(re.findall(r"[^\W\d_]{2,}", text.lower()))
+
+def word_trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def document_text(kind, key):
+    """
+    Returns the searchable text of a record (kind is an index in SEARCH_KINDS).
+    """
+    if kind == 0:
+        s = database['students'].get(key)
+        return f"{s.name} {s.email}" if s else ""
+    if kind == 1:
+        f = database['faculty'].get(key)
+        return f.name if f else ""
+    e = enquiries.get(key)
+    return f"{e['name']} {e['email']} {e['query']}" if e else ""
+
+def add_document(kind, key, text):
+    words, postings = fuzzy['words'], fuzzy['postings']
+    doc = len(fuzzy['ids'])
+    fuzzy['ids'].append(key)
+    fuzzy['kinds'].append(kind)
+    for word in search_words(text):
+        wid = words.get(word)
+        if wid is None:
+            wid = words[word] = len(postings)
+            fuzzy['word_list'].append(word)
+            postings.append(array.array('i'))
+            for gram in word_trigrams(word):
+                fuzzy['grams'][gram].append(wid)
+        postings[wid].append(doc)
+
+def ensure_search_index():
+    """
+    Builds the search index if it is not built yet.
+    """
+    with db_lock:
+        if fuzzy['built']:
+            return
+        for part in ('words', 'word_list', 'grams', 'postings', 'kinds', 'ids'):
+            fuzzy[part].clear()
+        for sid, s in database['students'].items():
+            add_document(0, sid, f"{s.name} {s.email}")
+        for fid, f in database['faculty'].items():
+            add_document(1, fid, f.name)
+        for eid, e in enquiries.items():
+            add_document(2, eid, f"{e['name']} {e['email']} {e['query']}")
+        fuzzy['built'] = True
+
+def update_search_index(change):
+    """
+    Change-stream subscriber: indexes new records, or drops the index on
+    reset so the next search rebuilds it.
+    """
+    if not fuzzy['built']:
+        return
+    op = change['op']
+    if op == 'reset':
+        fuzzy['built'] = False
+    elif op == 'add_student':
+        add_document(0, change['sid'], f"{change['name']} {change['email']}")
+    elif op == 'add_faculty':
+        add_document(1, change['fid'], change['name'])
+    elif op == 'enquiry':
+        add_document(2, change['id'], f"{change['name']} {change['email']} {change['query']}")
+
+subscribe(update_search_index)
+
+def similar_words(word):
+    """
+    Returns {word number: similarity} for indexed words like `word`.
+    """
+    grams = word_trigrams(word)
+    counts = Counter()
+    for gram in grams:
+        counts.update(fuzzy['grams'].get(gram, ()))
+    word_list = fuzzy['word_list']
+    similar = {}
+    for wid, shared in counts.items():
+        other = word_list[wid]
+        # A padded word of n letters has n + 1 trigrams (fewer if repeated)
+        score = 2 * shared / (len(grams) + len(other) + 1)
+        if shared >= len(grams) - 1 and other.startswith(word):
+            score = max(score, 1.0 if other == word else FUZZY_PREFIX_MATCH)
+        if score >= FUZZY_MIN_MATCH:
+            similar[wid] = score
+    # A close match makes much weaker ones noise
+    floor = max(similar.values(), default=0) - FUZZY_SPREAD
+    return {wid: score for wid, score in similar.items() if score >= floor}
+
+def search_label(kind, key):
+    if kind == 0:
+        s = database['students'][key]
+        return f"{s.name} <{s.email}>"
+    if kind == 1:
+        return database['faculty'][key].name
+    e = enquiries[key]
+    return f"{e['name']}: {e['query'][:80]}"
+
+def fuzzy_search(text, kinds=SEARCH_KINDS, limit=20):
+    """
+    Ranked fuzzy search over names, emails and enquiry text.
+    Returns up to `limit` dicts (kind, id, label, score), best first; score
+    is the average similarity of each query word to its best-matching word
+    in the record (1.0 = every word found exactly).
+    """
+    for kind in kinds:
+        if kind not in SEARCH_KINDS:
+            raise ValueError(f"Kind must be one of: {', '.join(SEARCH_KINDS)}")
+    query = sorted(search_words(text))
+    if not query:
+        return []
+    wanted = {SEARCH_KINDS.index(kind) for kind in kinds}
+    ensure_search_index()
+    with db_lock:
+        postings, kinds_of, ids = fuzzy['postings'], fuzzy['kinds'], fuzzy['ids']
+        matches = [similar_words(word) for word in query]
+        matches.sort(key=lambda m: sum(len(postings[w]) for w in m))
+        # {document: similarity of its best word} per query word, rarest
+        # first; words matching too many documents are only checked below,
+        # unless even the rarest does, when its best-matching documents
+        # up to the limit are read
+        read, rest = [], []
+        for similar in matches:
+            if read and sum(len(postings[w]) for w in similar) > FUZZY_READ_LIMIT:
+                rest.append(similar)
+                continue
+            chosen = []
+            budget = FUZZY_READ_LIMIT
+            for wid, score in sorted(similar.items(), key=itemgetter(1), reverse=True):
+                if budget <= 0:
+                    break
+                chosen.append((score, postings[wid][:budget]))
+                budget -= len(chosen[-1][1])
+            best = {}
+            for score, docs in reversed(chosen):
+                best.update(dict.fromkeys(docs, score))  # better words last
+            read.append(best)
+
+        # Records matching every query word read, then the best partial matches
+        found = set()
+        if len(read) > 1:
+            found = read[0].keys() & read[1].keys()
+            for best in read[2:]:
+                found &= best.keys()
+        if len(found) < limit:
+            for best in read:
+                docs = best if len(wanted) == len(SEARCH_KINDS) else (
+                    doc for doc in best if kinds_of[doc] in wanted)
+                found.update(heapq.nlargest(limit, docs, key=best.get))
+        found = list(found)
+        if len(wanted) < len(SEARCH_KINDS):
+            found = list(compress(found, map(wanted.__contains__, map(kinds_of.__getitem__, found))))
+        # Summed per query word with map() rather than a Python loop per record
+        totals = [0] * len(found)
+        for best in read:
+            totals = list(map(add, totals, map(best.get, found, repeat(0))))
+        candidates = list(zip(totals, found))
+        if rest:
+            # Add the common query words for the best candidates, from each
+            # record's own words
+            word_ids = fuzzy['words']
+            rescored = []
+            for score, doc in heapq.nlargest(FUZZY_RESCORE, candidates):
+                doc_words = [word_ids[w] for w in search_words(document_text(kinds_of[doc], ids[doc]))
+                             if w in word_ids]
+                for similar in rest:
+                    score += max((similar.get(w, 0) for w in doc_words), default=0)
+                rescored.append((score, doc))
+            candidates = rescored
+        results = []
+        for score, doc in heapq.nlargest(limit, candidates):
+            score /= len(query)
+            if score >= FUZZY_MIN_SCORE:
+                kind = kinds_of[doc]
+                results.append({'kind': SEARCH_KINDS[kind], 'id': ids[doc],
+                                'label': search_label(kind, ids[doc]), 'score': round(score, 2)})
+        return results
+
+# --- Audit Log ---
+# Seconds between writes of buffered audit events
+AUDIT_FLUSH_INTERVAL = 1.0
+# Compressed size at which audit.log.gz is renamed and a new one started
+AUDIT_ROTATE_BYTES = 8 * 2 ** 20
+# Rotated audit files kept (oldest are deleted)
+AUDIT_KEEP = 50
+# Most lines buffered while writes fail; the oldest are dropped beyond it
+AUDIT_BUFFER_MAX = 200_000
+
+
+class AuditLog:
+    """
+    Append-only, gzip-compressed log of every change, one JSON line each,
+    in ums_data/audit/. Committing only adds the change's log line to a
+    buffer; a writer thread compresses and writes the buffer every
+    AUDIT_FLUSH_INTERVAL and rotates the file once it reaches
+    AUDIT_ROTATE_BYTES. Unlike the storage log it is never truncated.
+    A file left with an unfinished member by a crash is rotated out on
+    open, since a member appended after it could not be read back.
+    If writing fails the lines stay buffered (up to AUDIT_BUFFER_MAX) and
+    are written once the disk recovers.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.folder = os.path.join(data_dir, "audit")
+        self.path = os.path.join(self.folder, "audit.log.gz")
+        # JSON lines waiting to be written
+        self.buffer = deque(maxlen=AUDIT_BUFFER_MAX)
+        self.buffer_lock = threading.Lock()
+        self.dropped = 0        # lines lost because the buffer was full
+        self.error = None       # last write failure, None once writes work
+        self.closed = threading.Event()
+        self.writer = None
+
+    def open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        self.writer = threading.Thread(target=self.write_loop, daemon=True,
+                                       name="ums-audit-writer")
+        self.writer.start()
+
+    def append(self, lines):
+        with self.buffer_lock:
+            self.keep(self.buffer, lines)
+
+    def keep(self, buffer, lines):
+        # The full deque drops its oldest lines; count them
+        size = len(buffer) + len(lines)
+        buffer.extend(lines)
+        self.dropped += size - len(buffer)
+
+    def write_loop(self):
+        # Checked here rather than in open() so a large file does not
+        # delay startup; changes are buffered meanwhile
+        self.check_file()
+        while not self.closed.wait(AUDIT_FLUSH_INTERVAL):
+            self.try_flush()
+        self.try_flush()
+
+    def check_file(self):
+        try:
+            if os.path.exists(self.path) and not gzip_complete(self.path):
+                self.rotate_file()
+        except Exception:
+            traceback.print_exc()
+
+    def try_flush(self):
+        # A failure must not end the writer: the lines are kept for the
+        # next flush, and only the first of a run of failures is printed
+        if self.error is not None:
+            self.check_file()
+        try:
+            self.flush()
+        except Exception as e:
+            if self.error is None:
+                traceback.print_exc()
+            self.error = e
+        else:
+            self.error = None
+
+    def flush(self):
+        with self.buffer_lock:
+            lines, self.buffer = self.buffer, deque(maxlen=AUDIT_BUFFER_MAX)
+        if not lines:
+            return
+        # Each flush appends one whole gzip member (readers handle several),
+        # so a failed write can be cut off again and the file stays readable
+        with open(self.path, "ab") as f:
+            start = f.tell()
+            try:
+                with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=1) as z:
+                    z.write("".join(lines).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                # Put the lines back ahead of newer ones
+                with self.buffer_lock:
+                    buffer = deque(maxlen=AUDIT_BUFFER_MAX)
+                    self.keep(buffer, lines)
+                    self.keep(buffer, self.buffer)
+                    self.buffer = buffer
+                f.truncate(start)
+                raise
+            size = f.tell()
+        if size >= AUDIT_ROTATE_BYTES:
+            self.rotate_file()
+
+    def rotate_file(self):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        os.replace(self.path, os.path.join(self.folder, f"audit-{stamp}.log.gz"))
+        rotated = sorted(n for n in os.listdir(self.folder) if n.startswith("audit-"))
+        for name in rotated[:-AUDIT_KEEP]:
+            os.remove(os.path.join(self.folder, name))
+
+    def close(self):
+        """
+        Writes the last buffered changes and stops the writer. Raises the
+        error if the last write failed.
+        """
+        self.closed.set()
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+
+def gzip_members(f):
+    """
+    Decompresses the gzip members of an open file in turn, yielding
+    (data, complete) pieces; complete is True once a member has ended.
+    Raises zlib.error where the data is damaged.
+    """
+    # zlib rather than gzip.open: it returns the data of a member that is
+    # still being written instead of raising
+    inflate = zlib.decompressobj(wbits=31)
+    for chunk in iter(lambda: f.read(1 << 20), b""):
+        while chunk:
+            data = inflate.decompress(chunk)
+            chunk = inflate.unused_data
+            yield data, inflate.eof
+            if inflate.eof:
+                inflate = zlib.decompressobj(wbits=31)
+
+def gzip_complete(path):
+    """
+    Tells whether a gzip file ends with a finished member.
+    """
+    complete = True
+    with open(path, "rb") as f:
+        try:
+            for _, complete in gzip_members(f):
+                pass
+        except zlib.error:
+            return False
+    return complete
+
+
+# Open audit log (set by open_audit_log)
+audit_log = None
+
+def open_audit_log(data_dir=DATA_DIR):
+    global audit_log
+    audit_log = AuditLog(data_dir)
+    audit_log.open()
+
+def close_audit_log():
+    global audit_log
+    if audit_log is not None:
+        try:
+            audit_log.close()
+        finally:
+            audit_log = None
+
+def audit_events(data_dir=DATA_DIR):
+    """
+    Yields audit events, oldest first, from the rotated files and the
+    current log. A file is read up to its last complete line: a line cut
+    short by a crash is skipped, and so is everything after damaged data.
+    """
+    folder = os.path.join(data_dir, "audit")
+    if not os.path.isdir(folder):
+        return
+    names = sorted(n for n in os.listdir(folder) if n.startswith("audit-"))
+    for name in names + ["audit.log.gz"]:
+        path = os.path.join(folder, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            pending = b""
+            members = gzip_members(f)
+            while True:
+                try:
+                    data, _ = next(members)
+                except StopIteration:
+                    break
+                except zlib.error:
+                    # The rest of this file cannot be read; later files can
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                try:
+                    events = [json.loads(line) for line in lines]
+                except ValueError:
+                    break
+                yield from events
+
+# --- Bulk Import ---
+# Number of valid rows committed to storage in one write
+IMPORT_BATCH = 5000
+# Accepted header names for each student field (case-insensitive)
+IMPORT_COLUMNS = {
+    'sid': ('student id', 'id', 'sid'),
+    'name': ('name',),
+    'email': ('email',),
+    'phone': ('phone',),
+    'course': ('course', 'course id'),
+}
+
+def read_import_rows(path):
+    """
+    Streams rows from a CSV or XLSX file without loading it into memory.
+    Yields (header, None) first, then (row, fraction_done) for each row.
+    """
+    if path.lower().endswith(".xlsx"):
+        try:
+            import openpyxl  # optional dependency, only needed for Excel files
+        except ImportError:
+            raise ValueError("Reading .xlsx files needs the openpyxl package.")
+        book = openpyxl.load_workbook(path, read_only=True)
+        try:
+            sheet = book.active
+            total = max(1, sheet.max_row or 1)
+            for i, row in enumerate(sheet.iter_rows(values_only=True)):
+                cells = ["" if v is None else str(v) for v in row]
+                yield cells, (i / total if i else None)
+        finally:
+            book.close()
+    else:
+        size = max(1, os.path.getsize(path))
+        with open(path, "rb") as raw:
+            text = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+            for i, row in enumerate(csv.reader(text)):
+                yield row, (raw.tell() / size if i else None)
+
+def import_students(path, progress=None, cancel=None, batch_size=IMPORT_BATCH):
+    """
+    Imports students from a CSV/XLSX file with the same rules as save_student.
+    Valid rows are committed in batches; rejected rows are written with the
+    reason to `<file>.errors.csv`. `progress(fraction, imported, rejected)` is
+    called after each batch and a set `cancel` event stops after the current
+    batch. Returns a dict of counts.
+    """
+    rows = read_import_rows(path)
+    raw_header = next(rows, ([], None))[0]
+    header = [h.strip().lower() for h in raw_header]
+    positions = {}
+    for field, names in IMPORT_COLUMNS.items():
+        for name in names:
+            if name in header:
+                positions[field] = header.index(name)
+                break
+        else:
+            raise ValueError(f"Missing column: {names[0].title()}")
+
+    error_path = os.path.splitext(path)[0] + ".errors.csv"
+    stats = {'imported': 0, 'rejected': 0, 'error_file': None, 'cancelled': False}
+    batch, batch_ids, batch_emails = [], set(), set()
+    batch_courses = Counter()
+    fraction = 0.0
+    with open(error_path, "w", newline="", encoding="utf-8") as error_file:
+        errors = csv.writer(error_file)
+        errors.writerow(["row", "error"] + raw_header)
+
+        def flush():
+            commit_many(batch)
+            stats['imported'] += len(batch)
+            batch.clear()
+            batch_ids.clear()
+            batch_emails.clear()
+            batch_courses.clear()
+            if progress:
+                progress(fraction, stats['imported'], stats['rejected'])
+
+        for line_no, (row, fraction) in enumerate(rows, start=2):
+            values = {field: (row[i].strip() if i < len(row) else "")
+                      for field, i in positions.items()}
+            values['course'] = values['course'].upper()
+            error = validate_student(**values)
+            # Also catch duplicates inside the batch not yet committed
+            if not error and values['sid'] in batch_ids:
+                error = "Student ID already exists."
+            if not error and values['email'].lower() in batch_emails:
+                error = "Email already registered."
+            if not error and course_full(values['course'], batch_courses[values['course']]):
+                error = "Course is full."
+            if error:
+                errors.writerow([line_no, error] + row)
+                stats['rejected'] += 1
+                continue
+            batch.append(dict(values, op='add_student'))
+            batch_ids.add(values['sid'])
+            batch_emails.add(values['email'].lower())
+            batch_courses[values['course']] += 1
+            if len(batch) >= batch_size:
+                flush()
+                if cancel is not None and cancel.is_set():
+                    stats['cancelled'] = True
+                    break
+        else:
+            fraction = 1.0
+            flush()
+    if stats['rejected']:
+        stats['error_file'] = error_path
+    else:
+        os.remove(error_path)
+    return stats
+
+
+# --- Export ---
+# Tables that can be exported, with their columns and types. Rows are
+# generated from the live tables and written EXPORT_CHUNK at a time, so an
+# export needs the same memory for a thousand students as for a million.
+EXPORT_TABLES = {
+    'students': [('sid', str), ('name', str), ('email', str), ('phone', str), ('courses', str)],
+    'faculty': [('fid', str), ('name', str), ('courses', str), ('qualified', str),
+                ('max_load', int), ('load', int)],
+    'enrollments': [('sid', str), ('cid', str), ('due', int), ('paid', int)],
+    'hostel': [('sid', str), ('hostel_name', str), ('room_no', str)],
+}
+# File extension per format; 'columns' (one JSON object of column lists per
+# chunk, like the snapshot) stands in for Parquet when pyarrow is missing
+EXPORT_FORMATS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet',
+                  'columns': '.columns.jsonl'}
+EXPORT_CHUNK = 10000
+
+def export_rows(table):
+    """
+    Yields the rows of an export table as tuples, in EXPORT_TABLES column order.
+    """
+    if table == 'students':
+        for sid, s in database['students'].items():
+            yield sid, s.name, s.email, s.phone, " ".join(s.courses)
+    elif table == 'faculty':
+        for fid, f in database['faculty'].items():
+            yield (fid, f.name, " ".join(f.courses), " ".join(f.qualified),
+                   f.max_load, faculty_load.get(fid, 0))
+    elif table == 'enrollments':
+        due, paid = ledger['due'], ledger['paid']
+        for sid, s in database['students'].items():
+            for cid in s.courses:
+                row = ledger_rows.get((sid, cid))
+                if row is None:
+                    yield sid, cid, 0, 0
+                else:
+                    yield sid, cid, due[row], paid[row]
+    elif table == 'hostel':
+        for sid, h in database['hostel'].items():
+            yield sid, h['hostel_name'], h['room_no']
+    else:
+        raise ValueError(f"Unknown table: {table}")
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401 (optional dependency for Parquet export)
+    except ImportError:
+        return False
+    return True
+
+def export_table(table, path, fmt):
+    """
+    Streams one table to `path` in `fmt` (see EXPORT_FORMATS).
+    The file is written under a temporary name and renamed when complete.
+    Holds db_lock so the file is a consistent copy; writes wait meanwhile.
+    Returns the number of rows written.
+    """
+    columns = EXPORT_TABLES[table]
+    names = [name for name, _ in columns]
+    part = path + ".part"
+    count = 0
+    with db_lock:
+        rows = export_rows(table)
+        # Lists of up to EXPORT_CHUNK rows until the table is exhausted
+        chunks = iter(lambda: list(islice(rows, EXPORT_CHUNK)), [])
+        try:
+            if fmt == 'parquet':
+                import pyarrow as pa  # optional dependency
+                import pyarrow.parquet as pq
+                schema = pa.schema([(name, pa.int64() if kind is int else pa.string())
+                                    for name, kind in columns])
+                with pq.ParquetWriter(part, schema) as out:
+                    for chunk in chunks:
+                        # One row group per chunk
+                        out.write_table(pa.Table.from_arrays(
+                            [pa.array(list(values), type=field.type)
+                             for values, field in zip(zip(*chunk), schema)], schema=schema))
+                        count += len(chunk)
+            else:
+                with open(part, "w", newline="", encoding="utf-8") as f:
+                    if fmt == 'csv':
+                        out = csv.writer(f)
+                        out.writerow(names)
+                        for chunk in chunks:
+                            out.writerows(chunk)
+                            count += len(chunk)
+                    elif fmt == 'jsonl':
+                        for chunk in chunks:
+                            f.write("".join(json.dumps(dict(zip(names, row))) + "\n"
+                                            for row in chunk))
+                            count += len(chunk)
+                    elif fmt == 'columns':
+                        for chunk in chunks:
+                            f.write(json.dumps(dict(zip(names, map(list, zip(*chunk))))) + "\n")
+                            count += len(chunk)
+                    else:
+                        raise ValueError(f"Unknown export format: {fmt}")
+        except BaseException:
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+    os.replace(part, path)
+    return count
+
+def export_database(directory, fmt='csv', tables=None):
+    """
+    Exports tables (default all of EXPORT_TABLES) to `<directory>/<table><ext>`.
+    Parquet falls back to the 'columns' format when pyarrow is not installed.
+    Returns {'format': format used, 'files': {table: (path, rows)}}.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet' and not parquet_available():
+        fmt = 'columns'
+    os.makedirs(directory, exist_ok=True)
+    files = {}
+    for table in tables or EXPORT_TABLES:
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        path = os.path.join(directory, table + EXPORT_FORMATS[fmt])
+        files[table] = (path, export_table(table, path, fmt))
+    return {'format': fmt, 'files': files}
+
+
+# --- User Accounts ---
+# Operators sign in with a user ID and password. Passwords are kept as salted
+# scrypt hashes in users.json, each with the cost it was hashed at, so a
+# higher SCRYPT_N applies to a password the next time it is used.
+USERS_FILE = "users.json"
+SCRYPT_N = 2 ** 14  # cost: each hash needs 128 * N * r bytes (16 MiB)
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Tabs each role may open (None = every tab)
+ROLE_TABS = {
+    'admin': None,
+    'registrar': {"Dashboard", "Add Student", "Enroll Student", "View Student Details", "Enquiry",
+                  "Enquiry Triage", "View Faculty", "Teaching", "Timetable",
+                  "View Students", "Search", "Course Rosters", "Reports"},
+    'warden': {"Dashboard", "View Student Details", "Enquiry", "Hostel Details", "View Students",
+               "Search"},
+}
+LOGIN_MAX_FAILURES = 5  # failed attempts in a row before an ID is locked
+LOGIN_LOCKOUT = 60      # seconds the ID then stays locked
+# Failure records kept before those of unknown IDs that are not locked are
+# dropped, so guessing IDs cannot grow login_failures without limit
+LOGIN_FAILURES_KEPT = 10000
+
+users = {}           # user ID -> {'role', 'salt', 'hash', 'n', 'r', 'p'}
+users_path = None    # set when the user store is loaded
+login_failures = {}  # user ID -> (failed attempts in a row, locked until)
+users_lock = threading.Lock()
+
+def hash_password(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r, dklen=32)
+
+def make_user(password, role):
+    """
+    Returns a user record with a freshly salted hash of the password.
+    """
+    salt = os.urandom(16)
+    digest = hash_password(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return {'role': role, 'salt': salt.hex(), 'hash': digest.hex(),
+            'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P}
+
+def load_users(data_dir=DATA_DIR):
+    """
+    Reads the user store. On first run it is created with the default
+    admin account (ID "123", password "admin").
+    """
+    global users_path
+    users_path = os.path.join(data_dir, USERS_FILE)
+    users.clear()
+    try:
+        with open(users_path, encoding="utf-8") as f:
+            users.update(json.load(f))
+    except FileNotFoundError:
+        users['123'] = make_user("admin", 'admin')
+        save_users()
+
+def save_users():
+    """
+    Writes the user store atomically.
+    """
+    os.makedirs(os.path.dirname(users_path), exist_ok=True)
+    tmp_path = users_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, users_path)
+
+def set_user(uid, password, role):
+    """
+    Adds a user, or replaces an existing user's password and role.
+    """
+    if not uid or not password:
+        raise ValueError("User ID and password are required.")
+    if role not in ROLE_TABS:
+        raise ValueError(f"Role must be one of: {', '.join(ROLE_TABS)}")
+    user = make_user(password, role)
+    with users_lock:
+        if users_path is None:
+            load_users()
+        users[uid] = user
+        save_users()
+
+def authenticate(uid, password):
+    """
+    Checks a user ID and password and returns {'id', 'role'}.
+    Raises ValueError for a wrong ID or password, or while the ID is locked
+    after LOGIN_MAX_FAILURES failed attempts in a row.
+    """
+    with users_lock:
+        if users_path is None:
+            load_users()
+        wait = login_failures.get(uid, (0, 0))[1] - time.monotonic()
+        if wait > 0:
+            raise ValueError(f"Too many failed attempts. Try again in {math.ceil(wait)} s.")
+        user = users.get(uid)
+    # Hash outside the lock so logins don't queue behind each other; an
+    # unknown ID is hashed too so it takes as long as a wrong password
+    record = user or {'salt': "00" * 16, 'hash': "", 'n': SCRYPT_N, 'r': SCRYPT_R, 'p': SCRYPT_P}
+    digest = hash_password(password, bytes.fromhex(record['salt']),
+                           record['n'], record['r'], record['p'])
+    with users_lock:
+        if user is None or not hmac.compare_digest(digest.hex(), record['hash']):
+            now = time.monotonic()
+            failures, locked_until = login_failures.get(uid, (0, 0))
+            if locked_until and locked_until <= now:
+                failures = 0  # the lockout is over: start a new count
+            failures += 1
+            locked_until = now + LOGIN_LOCKOUT if failures >= LOGIN_MAX_FAILURES else 0
+            login_failures[uid] = (failures, locked_until)
+            if len(login_failures) > LOGIN_FAILURES_KEPT:
+                for other, (_, until) in list(login_failures.items()):
+                    if other not in users and until <= now:
+                        del login_failures[other]
+            raise ValueError("Incorrect ID or Password")
+        login_failures.pop(uid, None)
+        # Re-hash at the current cost if it has been changed
+        if (record['n'], record['r'], record['p']) != (SCRYPT_N, SCRYPT_R, SCRYPT_P):
+            users[uid] = make_user(password, record['role'])
+            save_users()
+    return {'id': uid, 'role': record['role']}
+
+# --- Service Layer ---
+# Data operations with no Tk code. They raise ValueError with the message to
+# show the user, and run on worker threads (see run_in_background).
+
+@transaction
+def add_student(sid, name, email, phone, course):
+    """
+    Validates and saves a new student enrolled in `course`.
+    """
+    with db_lock:
+        error = validate_student(sid, name, email, phone, course)
+        if error:
+            raise ValueError(error)
+        commit({'op': 'add_student', 'sid': sid, 'name': name,
+                'email': email, 'phone': phone, 'course': course})
+
+def check_faculty_limits(qualified, max_load):
+    """
+    Validates qualified course IDs and a max load.
+    Returns (list of course IDs, max load as int).
+    """
+    qualified = list(dict.fromkeys(c for c in qualified if c))
+    unknown = [c for c in qualified if c not in database['courses']]
+    if unknown:
+        raise ValueError(f"Unknown courses: {', '.join(unknown)}")
+    try:
+        max_load = int(max_load)
+    except (TypeError, ValueError):
+        raise ValueError("Enter valid max hours.")
+    if max_load <= 0:
+        raise ValueError("Enter valid max hours.")
+    return qualified, max_load
+
+@transaction
+def add_faculty(fid, name, qualified=(), max_load=FACULTY_MAX_LOAD):
+    """
+    Validates and saves a new faculty member, with the courses they may
+    teach (none = any course) and their weekly teaching hours.
+    """
+    if not (fid and name):
+        raise ValueError("Fill all fields!")
+    qualified, max_load = check_faculty_limits(qualified, max_load)
+    with db_lock:
+        if fid in database['faculty']:
+            raise ValueError("Faculty ID exists.")
+        commit({'op': 'add_faculty', 'fid': fid, 'name': name,
+                'qualified': qualified, 'max_load': max_load})
+
+@transaction
+def update_faculty(fid, qualified, max_load):
+    """
+    Changes the courses a faculty member may teach and their max hours.
+    Sections they already teach are kept (see faculty_workload for
+    anyone now over-assigned).
+    """
+    qualified, max_load = check_faculty_limits(qualified, max_load)
+    with db_lock:
+        if fid not in database['faculty']:
+            raise ValueError("Invalid Faculty ID.")
+        commit({'op': 'set_faculty', 'fid': fid, 'qualified': qualified,
+                'max_load': max_load})
+
+@transaction
+def add_section(cid, hours):
+    """
+    Adds a section of a course with its weekly teaching hours.
+    Returns the new section ID.
+    """
+    try:
+        hours = int(hours)
+    except (TypeError, ValueError):
+        raise ValueError("Enter valid hours.")
+    if hours <= 0:
+        raise ValueError("Enter valid hours.")
+    with db_lock:
+        if cid not in database['courses']:
+            raise ValueError("Invalid course.")
+        section = f"{cid}-{len(database['sections']) + 1}"
+        commit({'op': 'add_section', 'section': section, 'course': cid, 'hours': hours})
+        return section
+
+@transaction
+def assign_section(section, fid):
+    """
+    Assigns a section to a faculty member ('' or None unassigns it).
+    Refuses faculty not qualified for the course or without enough hours left.
+    """
+    with db_lock:
+        sec = database['sections'].get(section)
+        if sec is None:
+            raise ValueError("Invalid section.")
+        if fid:
+            f = database['faculty'].get(fid)
+            if f is None:
+                raise ValueError("Invalid Faculty ID.")
+            if not is_qualified(f, sec['course']):
+                raise ValueError(f"{fid} is not qualified to teach {sec['course']}.")
+            load = faculty_load[fid] + (sec['hours'] if sec['faculty'] != fid else 0)
+            if load > f.max_load:
+                raise ValueError(f"{fid} would be over-assigned ({load} of {f.max_load} hours).")
+        commit({'op': 'assign_section', 'section': section, 'fid': fid or None})
+
+@transaction
+def assign_course(cid, fid):
+    """
+    Makes a qualified faculty member the lead of a course ('' or None clears it).
+    """
+    with db_lock:
+        if cid not in database['courses']:
+            raise ValueError("Invalid course.")
+        if fid:
+            f = database['faculty'].get(fid)
+            if f is None:
+                raise ValueError("Invalid Faculty ID.")
+            if not is_qualified(f, cid):
+                raise ValueError(f"{fid} is not qualified to teach {cid}.")
+        commit({'op': 'assign_course', 'cid': cid, 'fid': fid or None})
+
+@transaction
+def auto_assign_sections(rebalance=False):
+    """
+    Assigns unassigned sections with the workload balancer, or with
+    rebalance every section from scratch. Returns {'assigned', 'unassigned'
+    (section IDs), 'overloaded' (faculty IDs)}.
+    """
+    with db_lock:
+        sections = database['sections']
+        loads = defaultdict(int)
+        if rebalance:
+            todo = list(sections)
+        else:
+            loads.update(faculty_load)
+            todo = [s for s, sec in sections.items() if not sec['faculty']]
+        chosen, unassigned = balance_sections(todo, loads)
+        changes = [{'op': 'assign_section', 'section': s, 'fid': fid}
+                   for s, fid in chosen.items() if sections[s]['faculty'] != fid]
+        changes += [{'op': 'assign_section', 'section': s, 'fid': None}
+                    for s in unassigned if sections[s]['faculty']]
+        commit_many(changes)
+        return {'assigned': len(chosen), 'unassigned': unassigned,
+                'overloaded': overloaded_faculty()}
+
+def list_sections():
+    """
+    Returns all section IDs in insertion order.
+    """
+    with db_lock:
+        return list(database['sections'])
+
+def faculty_workload():
+    """
+    Returns one dict per faculty member: id, name, load, max_load, over
+    (True if over-assigned), sections, courses led and qualified courses.
+    """
+    with db_lock:
+        taught = defaultdict(list)
+        for section, sec in database['sections'].items():
+            if sec['faculty']:
+                taught[sec['faculty']].append(section)
+        return [{'id': fid, 'name': f.name, 'load': faculty_load[fid],
+                 'max_load': f.max_load, 'over': faculty_load[fid] > f.max_load,
+                 'sections': taught[fid], 'courses': list(f.courses),
+                 'qualified': list(f.qualified)}
+                for fid, f in database['faculty'].items()]
+
+@transaction
+def add_classroom(room, capacity):
+    """
+    Adds a teaching room (or changes its capacity).
+    """
+    try:
+        capacity = int(capacity)
+    except (TypeError, ValueError):
+        raise ValueError("Enter valid capacity.")
+    if not room or capacity <= 0:
+        raise ValueError("Enter room and valid capacity.")
+    with db_lock:
+        commit({'op': 'add_classroom', 'room': room, 'capacity': capacity})
+
+def parse_slot(day, hour, hours):
+    """
+    Converts a day name and start hour (e.g. 'Mon', 9) to a start slot.
+    """
+    if day not in DAYS:
+        raise ValueError("Invalid day.")
+    try:
+        hour = int(hour) - DAY_START
+    except (TypeError, ValueError):
+        raise ValueError("Invalid start hour.")
+    if hour < 0 or hour + hours > SLOTS_PER_DAY:
+        raise ValueError(f"Classes run from {DAY_START}:00 to {DAY_START + SLOTS_PER_DAY}:00.")
+    return DAYS.index(day) * SLOTS_PER_DAY + hour
+
+@transaction
+def schedule_section(section, room, day=None, hour=None):
+    """
+    Puts a section in a room at a day and start hour ('' or None room
+    unschedules it). Refuses a placement that breaks a hard constraint:
+    the room too small or already booked, the faculty member already
+    teaching, or students with another class then.
+    """
+    with db_lock:
+        sec = database['sections'].get(section)
+        if sec is None:
+            raise ValueError("Invalid section.")
+        if not room:
+            commit({'op': 'schedule', 'section': section, 'room': None, 'start': None})
+            return
+        classroom = database['classrooms'].get(room)
+        if classroom is None:
+            raise ValueError("Invalid room.")
+        start = parse_slot(day, hour, sec['hours'])
+        if classroom['capacity'] < section_sizes()[sec['course']]:
+            raise ValueError(f"Room {room} is too small for {section}.")
+        mask = slot_mask(start, sec['hours'])
+        others = (section,)
+        if busy_mask(('room', room), others) & mask:
+            raise ValueError(f"Room {room} is booked then.")
+        if sec['faculty'] and busy_mask(('faculty', sec['faculty']), others) & mask:
+            raise ValueError(f"{sec['faculty']} is teaching then.")
+        clashes = [cid for cid in course_conflicts().get(sec['course'], ())
+                   if busy_mask(('course', cid)) & mask]
+        if clashes:
+            raise ValueError(f"Students have {', '.join(sorted(clashes))} then.")
+        commit({'op': 'schedule', 'section': section, 'room': room, 'start': start})
+
+@transaction
+def plan_timetable(rebuild=False, sections=()):
+    """
+    Schedules sections into rooms and time slots. By default only sections
+    that are unscheduled, break a hard constraint or are listed in
+    `sections` are (re)placed and the rest of the timetable stays as it
+    is; with rebuild every section is placed from scratch.
+    Returns {'placed', 'moved', 'kept', 'unplaced' (section IDs), 'penalty'}.
+    """
+    with db_lock:
+        all_sections = database['sections']
+        conflicts = course_conflicts()
+        if rebuild:
+            todo = set(all_sections)
+        else:
+            todo = set(timetable_conflicts(conflicts))
+            todo.update(s for s, sec in all_sections.items() if sec['start'] is None)
+            todo.update(s for s in sections if s in all_sections)
+        # In table order, so equal-priority sections are always placed alike
+        placed, unplaced = place_sections([s for s in all_sections if s in todo],
+                                          conflicts, todo)
+        changes = [{'op': 'schedule', 'section': s, 'room': room, 'start': start}
+                   for s, (room, start) in placed.items()
+                   if (all_sections[s]['room'], all_sections[s]['start']) != (room, start)]
+        changes += [{'op': 'schedule', 'section': s, 'room': None, 'start': None}
+                    for s in unplaced if all_sections[s]['start'] is not None]
+        commit_many(changes)
+        scheduled = sum(sec['start'] is not None for sec in all_sections.values())
+        return {'placed': len(placed), 'moved': len(changes),
+                'kept': scheduled - len(placed), 'unplaced': unplaced,
+                'penalty': round(timetable_penalty(), 1)}
+
+def list_timetable():
+    """
+    Returns section IDs ordered by start time, unscheduled ones last.
+    """
+    with db_lock:
+        sections = database['sections']
+        return sorted(sections, key=lambda s: (
+            sections[s]['start'] is None, sections[s]['start'] or 0, sections[s]['room'] or ''))
+
+def timetable_entry(section):
+    """
+    Returns a section's timetable row as a dict.
+    """
+    sec = database['sections'][section]
+    scheduled = sec['start'] is not None
+    return {'section': section, 'course': sec['course'], 'faculty': sec['faculty'],
+            'hours': sec['hours'], 'room': sec['room'], 'start': sec['start'],
+            'time': slot_label(sec['start'], sec['hours']) if scheduled else None}
+
+def timetable_entries():
+    """
+    Returns every section's timetable row, ordered as list_timetable.
+    """
+    with db_lock:
+        return [timetable_entry(s) for s in list_timetable()]
+
+def timetable_problems():
+    """
+    Returns {section ID: reason} for scheduled sections breaking a hard constraint.
+    """
+    with db_lock:
+        return timetable_conflicts()
+
+@transaction
+def enroll(sid, cid):
+    """
+    Enrolls a student in a course.
+    Returns False if the student was already enrolled.
+    """
+    with db_lock:
+        if sid not in database['students'] or cid not in database['courses']:
+            raise ValueError("Invalid IDs.")
+        if cid in database['students'][sid].courses:
+            return False
+        if course_full(cid):
+            raise ValueError("Course is full.")
+        missing = missing_prereqs(database['students'][sid].courses, cid)
+        if missing:
+            raise ValueError(f"Missing prerequisites: {', '.join(missing)}")
+        commit({'op': 'enroll', 'sid': sid, 'cid': cid})
+        return True
+
+@transaction
+def set_prereqs(cid, prereqs):
+    """
+    Replaces the prerequisites of a course, refusing unknown courses and
+    changes that would create a cycle.
+    """
+    prereqs = list(dict.fromkeys(p for p in prereqs if p))
+    with db_lock:
+        if cid not in database['courses']:
+            raise ValueError("Invalid course.")
+        unknown = [p for p in prereqs if p not in database['courses']]
+        if unknown:
+            raise ValueError(f"Unknown courses: {', '.join(unknown)}")
+        graph = {c: course['prereq'] for c, course in database['courses'].items()}
+        graph[cid] = prereqs
+        cycle = find_prereq_cycle(graph)
+        if cycle:
+            raise ValueError(f"Prerequisite cycle: {' -> '.join(cycle)}")
+        commit({'op': 'set_prereqs', 'cid': cid, 'prereqs': prereqs})
+
+@transaction
+def unenroll(sid, cid):
+    """
+    Removes a student from a course.
+    Returns False if the student was not enrolled.
+    """
+    with db_lock:
+        if sid not in database['students'] or cid not in database['courses']:
+            raise ValueError("Invalid IDs.")
+        if cid not in database['students'][sid].courses:
+            return False
+        commit({'op': 'unenroll', 'sid': sid, 'cid': cid})
+        return True
+
+@transaction
+def set_course_capacity(cid, capacity):
+    """
+    Sets the most students a course may hold (blank or 0 = no limit).
+    Students already enrolled are kept if it is lowered below them.
+    """
+    try:
+        capacity = int(capacity or 0)
+    except (TypeError, ValueError):
+        raise ValueError("Enter a valid capacity.")
+    if capacity < 0:
+        raise ValueError("Enter a valid capacity.")
+    with db_lock:
+        if cid not in database['courses']:
+            raise ValueError("Invalid course.")
+        commit({'op': 'set_capacity', 'cid': cid, 'capacity': capacity or None})
+
+@transaction
+def add_room(hostel_name, room_no, capacity, course=''):
+    """
+    Adds a hostel room with a number of beds and an optional course preference.
+    """
+    if not (hostel_name and room_no and str(capacity)):
+        raise ValueError("Fill all fields.")
+    try:
+        capacity = int(capacity)
+    except ValueError:
+        raise ValueError("Enter a valid capacity.")
+    if capacity <= 0:
+        raise ValueError("Enter a valid capacity.")
+    if course and course not in database['courses']:
+        raise ValueError("Unknown course.")
+    with db_lock:
+        if room_key(hostel_name, room_no) in database['rooms']:
+            raise ValueError("Room already exists.")
+        commit({'op': 'add_room', 'hostel': hostel_name, 'room': room_no,
+                'capacity': capacity, 'course': course})
+
+@transaction
+def assign_hostel(sid, hostel_name, room_no):
+    """
+    Saves the hostel and room for a student, if the room has a free bed.
+    """
+    if not (sid and hostel_name and room_no):
+        raise ValueError("Fill all fields.")
+    with db_lock:
+        if sid not in database['students']:
+            raise ValueError("Invalid Student ID.")
+        room = database['rooms'].get(room_key(hostel_name, room_no))
+        if room is None:
+            raise ValueError("Unknown room. Add the room first.")
+        if sid not in room['occupants'] and len(room['occupants']) >= room['capacity']:
+            raise ValueError("Room is full.")
+        commit({'op': 'set_hostel', 'sid': sid, 'hostel_name': hostel_name,
+                'room_no': room_no})
+
+@transaction
+def auto_allocate(sids=None, match_course=True):
+    """
+    Assigns a bed to every student in `sids` (default: all students without
+    one) in a single pass. With match_course, rooms reserved for the
+    student's first course are filled before rooms open to any course.
+    Returns (number assigned, list of student IDs left without a bed).
+    """
+    with db_lock:
+        if sids is None:
+            sids = [sid for sid in database['students'] if sid not in database['hostel']]
+        changes, unplaced = [], []
+        taken = defaultdict(int)  # beds promised in this pass, per room
+        placed = set()
+        for sid in sids:
+            if sid not in database['students'] or sid in database['hostel'] or sid in placed:
+                continue
+            key = None
+            if match_course:
+                course = next(iter(database['students'][sid].courses), '')
+                key = next_free_room(course, taken) if course else None
+            if key is None:
+                key = next_free_room('', taken)
+            if key is None:
+                unplaced.append(sid)
+                continue
+            taken[key] += 1
+            placed.add(sid)
+            room = database['rooms'][key]
+            changes.append({'op': 'set_hostel', 'sid': sid, 'hostel_name': room['hostel'],
+                            'room_no': room['room']})
+        try:
+            commit_many(changes)
+        except Exception:
+            # Rooms filled only by this pass were dropped from free_beds
+            for key in taken:
+                push_free_room(key)
+            raise
+        return len(changes), unplaced
+
+@transaction
+def record_payment(sid, cid, amount):
+    """
+    Records a fee payment against a student's enrollment in a course.
+    """
+    try:
+        amount = int(str(amount).replace(',', ''))
+    except ValueError:
+        raise ValueError("Enter a valid amount.")
+    if amount <= 0:
+        raise ValueError("Enter a valid amount.")
+    with db_lock:
+        if (sid, cid) not in ledger_rows:
+            raise ValueError("No fee record for this student and course.")
+        commit({'op': 'pay', 'sid': sid, 'cid': cid, 'amount': amount})
+
+def add_enquiry(name, email, query):
+    """
+    Validates and queues a new enquiry. Returns its ID.
+    """
+    if not (name and email and query):
+        raise ValueError("Fill all fields.")
+    with db_lock:
+        eid = f"E{len(enquiries) + 1}"
+        record_enquiry({'op': 'enquiry', 'id': eid,
+                        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                        'name': name, 'email': email, 'query': query})
+    return eid
+
+def answer_enquiry(eid):
+    """
+    Marks an open enquiry as answered.
+    """
+    with db_lock:
+        e = enquiries.get(eid)
+        if e is None:
+            raise ValueError("Not found.")
+        if e['status'] != 'open':
+            raise ValueError("Enquiry already answered.")
+        record_enquiry({'op': 'answer', 'id': eid})
+
+def list_enquiries(status='open', text=''):
+    """
+    Returns IDs of enquiries with the given status ('open', 'answered' or
+    'all') whose name, email or query contains `text`, newest first.
+    """
+    text = text.lower()
+    with db_lock:
+        items = list(enquiries.items())
+    return [eid for eid, e in reversed(items)
+            if (status == 'all' or e['status'] == status)
+            and (not text or text in e['name'].lower() or text in e['email'].lower()
+                 or text in e['query'].lower())]
+
+def enquiry_details(eid):
+    with db_lock:
+        if eid not in enquiries:
+            raise ValueError("Not found.")
+        return dict(enquiries[eid], id=eid)
+
+def enquiry_stats():
+    """
+    Returns queue-depth figures: open enquiries, total, and records waiting
+    for the next fsync.
+    """
+    return {'open': enquiry_counts['open'], 'total': len(enquiries),
+            'unflushed': enquiry_queue.unflushed() if enquiry_queue else 0}
+
+def dashboard_totals():
+    """
+    Returns the Dashboard figures. Each is a dict size or a counter kept up
+    to date on every change, so this costs the same however much data there
+    is and, like enquiry_stats, needs no lock (figures read mid-commit are
+    at most one change apart).
+    """
+    return {'students': len(database['students']),
+            'faculty': len(database['faculty']),
+            'courses': {cid: len(course['students'])
+                        for cid, course in database['courses'].items()},
+            'housed': len(database['hostel']),
+            'beds': bed_counts['beds'],
+            'occupied': bed_counts['occupied'],
+            'enquiries_today': enquiry_days[datetime.date.today().isoformat()],
+            'open_enquiries': enquiry_counts['open']}
+
+def check_counters():
+    """
+    Recounts the Dashboard counters from the data and corrects any that
+    had drifted. Returns their names (normally none).
+    """
+    with db_lock:
+        drifted = []
+        beds = count_beds()
+        if beds != bed_counts:
+            drifted.append('beds')
+            bed_counts.update(beds)
+        days = Counter(e['time'][:10] for e in enquiries.values())
+        if days != enquiry_days:
+            drifted.append('enquiries per day')
+            enquiry_days.clear()
+            enquiry_days.update(days)
+        still_open = sum(e['status'] == 'open' for e in enquiries.values())
+        if still_open != enquiry_counts['open']:
+            drifted.append('open enquiries')
+            enquiry_counts['open'] = still_open
+    return drifted
+
+def student_details(sid):
+    """
+    Returns a copy of a student's details, with 'id' and 'hostel' (or None).
+    """
+    with db_lock:
+        if sid not in database['students']:
+            raise ValueError("Not found.")
+        s = database['students'][sid]
+        hostel = database['hostel'].get(sid)
+        fees = {cid: (ledger['due'][ledger_rows[(sid, cid)]], ledger['paid'][ledger_rows[(sid, cid)]])
+                for cid in s.courses if (sid, cid) in ledger_rows}
+        return {'id': sid, 'name': s.name, 'email': s.email, 'phone': s.phone,
+                'courses': list(s.courses), 'hostel': dict(hostel) if hostel else None,
+                'fees': fees}
+
+def list_students():
+    """
+    Returns all student IDs in insertion order.
+    """
+    with db_lock:
+        return list(database['students'])
+
+def list_faculty():
+    """
+    Returns all faculty IDs in insertion order.
+    """
+    with db_lock:
+        return list(database['faculty'])
+
+def course_roster(cid):
+    """
+    Returns the IDs of students enrolled in a course.
+    """
+    with db_lock:
+        if cid not in database['courses']:
+            raise ValueError("Invalid course.")
+        return list(database['courses'][cid]['students'])
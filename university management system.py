@@ -1,581 +1,3191 @@
-import tkinter as tk
-from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
-
-# Theme Colors
-PRIMARY_COLOR = "#C8102E"  # NIET Red
-BG_COLOR = "#FFFFFF"       # White
-
-# --- Data Storage ---
-# In-memory "database" dictionaries to store students, faculty, courses, and hostel info
-database = {
-    'students': {},  # key: student ID, value: dict with student details
-    'faculty': {},   # key: faculty ID, value: dict with faculty details
-    'courses': {     # predefined courses with fields: name, enrolled students list, assigned faculty, prerequisites
-        'BTECH':   {'name': 'B.Tech',      'students': [], 'faculty': None, 'prereq': []},
-        'BPHARMA': {'name': 'B.Pharmacy',  'students': [], 'faculty': None, 'prereq': []},
-        'MBA':     {'name': 'MBA',         'students': [], 'faculty': None, 'prereq': []},
-        'BUSINESS':{'name': 'Business',    'students': [], 'faculty': None, 'prereq': []},
-        'BCA':     {'name': 'BCA',         'students': [], 'faculty': None, 'prereq': []},
-        'BCOM':    {'name': 'B.Com',       'students': [], 'faculty': None, 'prereq': []},
-    },
-    'hostel': {}  # key: student ID, value: dict with hostel_name and room_no
-}
-
-# Mapping from course ID to fee amount
-course_fee_map = {
-    'BTECH':   180000,
-    'BPHARMA': 120000,
-    'MBA':     300000,
-    'BUSINESS':160000,
-    'BCOM':    125000,
-    'BCA':     130000,
-}
-
-# --- Main Functions ---
-
-def launch_main_app():
-    """
-    Called after successful login.
-    Destroys the login window and builds the main application GUI.
-    """
-    login_win.destroy()  # close login window
-    build_main_gui()     # open main GUI
-
-def build_main_gui():
-    """
-    Builds and displays the main University Management System GUI.
-    Contains tabs for adding/viewing students and faculty, enrolling students,
-    hostel details, enquiries, etc.
-    """
-    root = tk.Tk()
-    root.title("University Management System")
-    # Reduced window size for cleaner display
-    root.geometry("720x400")
-    # Set root background color to PRIMARY_COLOR so that any blank space shows red
-    root.configure(bg=PRIMARY_COLOR)
-
-    # ---------- STYLING ----------
-    style = ttk.Style()
-    style.theme_use("clam")  # use a clean theme
-
-    # Style for Notebook (tab container)
-    style.configure("TNotebook", background=BG_COLOR)
-    style.configure("TNotebook.Tab",
-                    background=PRIMARY_COLOR,
-                    foreground="white",
-                    padding=(8, 4))
-    style.map("TNotebook.Tab",
-              background=[("selected", PRIMARY_COLOR)],
-              foreground=[("selected", "white")])
-
-    # Style for Buttons
-    style.configure("TButton",
-                    background=PRIMARY_COLOR,
-                    foreground="white",
-                    font=("Arial", 9, "bold"))
-    # Change background slightly when button is active
-    style.map("TButton",
-              background=[("active", "#a50f24")])
-
-    # Style for Labels
-    style.configure("TLabel",
-                    background=BG_COLOR,
-                    foreground="black")
-    # Style for LabelFrame
-    style.configure("TLabelFrame",
-                    background=BG_COLOR,
-                    borderwidth=2,
-                    relief="groove")
-    style.configure("TLabelFrame.Label",
-                    font=("Arial", 11, "bold"),
-                    foreground=PRIMARY_COLOR)
-
-    # ---------- HEADER SECTION ----------
-    header_frame = tk.Frame(root, bg=BG_COLOR)
-    header_frame.pack(pady=8, fill='x', padx=10)
-
-    # Left: NIET title
-    tk.Label(header_frame,
-             text="NIET",
-             font=("Arial", 28, "bold"),
-             fg=PRIMARY_COLOR,
-             bg=BG_COLOR).pack(side='left')
-
-    # Left: Subtitle
-    tk.Label(header_frame,
-             text="UNIVERSITY MANAGEMENT SYSTEM",
-             font=("Arial", 14, "bold"),
-             fg=PRIMARY_COLOR,
-             bg=BG_COLOR).pack(side='left', padx=8)
-
-    # Right: Info frame (contact, slogan)
-    info_frame = tk.Frame(header_frame, bg=BG_COLOR)
-    info_frame.pack(side='right')
-    tk.Label(info_frame,
-             text="GET FUTURE READY!",
-             font=("Arial", 12, "bold"),
-             fg=PRIMARY_COLOR,
-             bg=BG_COLOR).pack()
-    tk.Label(info_frame,
-             text="Contact: +91 4445556667",
-             font=("Arial", 8),
-             fg="black",
-             bg=BG_COLOR).pack()
-
-    # Also place a bold "GET FUTURE READY!" label on top-right corner of root
-    root.update_idletasks()  # ensure geometry is calculated
-    tk.Label(root,
-             text="GET FUTURE READY!",
-             font=("Arial", 16, "bold"),
-             fg="white",
-             bg=PRIMARY_COLOR).place(relx=1.0, rely=0.0,
-                                     anchor='ne', x=-10, y=10)
-
-    # Separator line below header
-    tk.Frame(root, bg=PRIMARY_COLOR, height=2).pack(fill='x', padx=10)
-
-    # ---------- CONTENT FRAME ----------
-    content_frame = tk.Frame(root, bg=BG_COLOR)
-    content_frame.pack(expand=True, fill='both', padx=10, pady=5)
-
-    # ---------- TAB CONTROL ----------
-    tab_control = ttk.Notebook(content_frame)
-
-    def make_tab(title):
-        """
-        Helper to create a new tab with given title.
-        Returns the frame for placing widgets in that tab.
-        """
-        frame = tk.Frame(tab_control, bg=BG_COLOR)
-        tab_control.add(frame, text=title)
-        return frame
-
-    # ----- Add Student Tab -----
-    student_tab = make_tab("Add Student")
-    student_frame = ttk.LabelFrame(student_tab, text="Add New Student")
-    student_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variables for student input fields
-    student_id = tk.StringVar()
-    student_name = tk.StringVar()
-    student_email = tk.StringVar()
-    student_phone = tk.StringVar()
-    student_course = tk.StringVar()
-    student_fees = tk.StringVar()
-
-    # Labels and associated StringVar list
-    labels = ["Student ID", "Name", "Email", "Phone", "Course", "Fees (INR)"]
-    vars = [student_id, student_name, student_email, student_phone, student_course, student_fees]
-
-    # Loop to create label+entry/combobox for each field
-    for i, (lbl, var) in enumerate(zip(labels, vars)):
-        ttk.Label(student_frame, text=lbl + ":").grid(row=i, column=0, sticky='w', padx=8, pady=4)
-        if lbl == "Course":
-            # Course selection via Combobox; values from course_fee_map keys
-            cb = ttk.Combobox(student_frame,
-                              textvariable=var,
-                              values=list(course_fee_map.keys()),
-                              state="readonly",
-                              width=15)
-            cb.grid(row=i, column=1, padx=8, pady=4)
-            # When course selected, update fee field
-            def on_course(e=None):
-                fee = course_fee_map.get(student_course.get(), 0)
-                # Format fee with commas
-                student_fees.set(f"{fee:,}")
-            cb.bind("<<ComboboxSelected>>", on_course)
-        elif lbl == "Fees (INR)":
-            # Read-only entry for fees
-            ttk.Entry(student_frame,
-                      textvariable=var,
-                      state="readonly",
-                      width=17).grid(row=i, column=1, padx=8, pady=4)
-        else:
-            # Regular entry for other fields
-            ttk.Entry(student_frame,
-                      textvariable=var,
-                      width=17).grid(row=i, column=1, padx=8, pady=4)
-
-    def save_student():
-        """
-        Handler for "Add Student" button.
-        Validates inputs, checks duplicate ID, then saves student info and updates database.
-        """
-        sid = student_id.get().strip()
-        name = student_name.get().strip()
-        email = student_email.get().strip()
-        phone = student_phone.get().strip()
-        course = student_course.get()
-        # Check all fields filled
-        if sid and name and email and phone and course:
-            # Check if student ID already exists
-            if sid in database['students']:
-                messagebox.showerror("Error", "Student ID already exists.")
-                return
-            # Save student data
-            database['students'][sid] = {
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'courses': [course]
-            }
-            # Add student to course's student list
-            database['courses'][course]['students'].append(sid)
-            messagebox.showinfo("Success", f"Student {name} added.")
-            # Clear input fields
-            for v in vars:
-                v.set("")
-        else:
-            messagebox.showerror("Error", "Fill all fields!")
-
-    # Button to add student
-    ttk.Button(student_frame,
-               text="Add Student",
-               command=save_student).grid(row=6, columnspan=2, pady=6)
-
-    # ----- Add Faculty Tab -----
-    faculty_tab = make_tab("Add Faculty")
-    faculty_frame = ttk.LabelFrame(faculty_tab, text="Add New Faculty")
-    faculty_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variables for faculty input fields
-    faculty_id = tk.StringVar()
-    faculty_name = tk.StringVar()
-
-    # Faculty ID label+entry
-    ttk.Label(faculty_frame, text="Faculty ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(faculty_frame, textvariable=faculty_id, width=17).grid(row=0, column=1, padx=8, pady=4)
-
-    # Faculty Name label+entry
-    ttk.Label(faculty_frame, text="Name:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(faculty_frame, textvariable=faculty_name, width=17).grid(row=1, column=1, padx=8, pady=4)
-
-    def save_faculty():
-        """
-        Handler for "Add Faculty" button.
-        Validates inputs, checks duplicate ID, then saves faculty info.
-        """
-        fid = faculty_id.get().strip()
-        name = faculty_name.get().strip()
-        if fid and name:
-            # Check if faculty ID exists
-            if fid in database['faculty']:
-                messagebox.showerror("Error", "Faculty ID exists.")
-                return
-            # Save faculty data
-            database['faculty'][fid] = {'name': name, 'courses': []}
-            messagebox.showinfo("Success", "Faculty added.")
-            # Clear fields
-            faculty_id.set("")
-            faculty_name.set("")
-        else:
-            messagebox.showerror("Error", "Fill all fields!")
-
-    # Button to add faculty
-    ttk.Button(faculty_frame,
-               text="Add Faculty",
-               command=save_faculty).grid(row=2, columnspan=2, pady=6)
-
-    # ----- Enroll Student Tab -----
-    enroll_tab = make_tab("Enroll Student")
-    enroll_frame = ttk.LabelFrame(enroll_tab, text="Enroll Student in Course")
-    enroll_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variables for enrollment
-    enroll_student_id = tk.StringVar()
-    enroll_course_id = tk.StringVar()
-
-    # Student ID label+entry
-    ttk.Label(enroll_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(enroll_frame, textvariable=enroll_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
-    # Course ID label+entry
-    ttk.Label(enroll_frame, text="Course ID:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(enroll_frame, textvariable=enroll_course_id, width=17).grid(row=1, column=1, padx=8, pady=4)
-
-    def enroll_student():
-        """
-        Handler for "Enroll" button.
-        Checks if student and course IDs exist; if not already enrolled, adds enrollment.
-        """
-        sid = enroll_student_id.get().strip()
-        cid = enroll_course_id.get().strip()
-        # Validate existence
-        if sid in database['students'] and cid in database['courses']:
-            # Check if already enrolled
-            if cid not in database['students'][sid]['courses']:
-                # Add course to student's list
-                database['students'][sid]['courses'].append(cid)
-                # Add student to course's list
-                database['courses'][cid]['students'].append(sid)
-                messagebox.showinfo("Success", f"Enrolled {sid} in {cid}.")
-                # Clear fields
-                enroll_student_id.set("")
-                enroll_course_id.set("")
-            else:
-                messagebox.showinfo("Info", "Already enrolled.")
-        else:
-            messagebox.showerror("Error", "Invalid IDs.")
-
-    # Button to enroll student
-    ttk.Button(enroll_frame,
-               text="Enroll",
-               command=enroll_student).grid(row=2, columnspan=2, pady=6)
-
-    # ----- View Student Details Tab -----
-    details_tab = make_tab("View Student Details")
-    details_frame = ttk.LabelFrame(details_tab, text="Student Details")
-    details_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variable for student ID to view
-    detail_student_id = tk.StringVar()
-
-    # Label+entry for student ID
-    ttk.Label(details_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(details_frame, textvariable=detail_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
-
-    def show_student_details():
-        """
-        Handler for "Show Details" button.
-        Retrieves and displays student info in a messagebox, including courses and hostel if any.
-        """
-        sid = detail_student_id.get().strip()
-        if sid in database['students']:
-            s = database['students'][sid]
-            # Build info string
-            courses = ', '.join(s['courses'])
-            info = (
-                f"ID: {sid}\n"
-                f"Name: {s['name']}\n"
-                f"Email: {s['email']}\n"
-                f"Phone: {s['phone']}\n"
-                f"Courses: {courses}"
-            )
-            # If hostel info exists for this student, append it
-            if sid in database['hostel']:
-                h = database['hostel'][sid]
-                info += f"\nHostel: {h.get('hostel_name')} Room: {h.get('room_no')}"
-            # Show info
-            messagebox.showinfo("Details", info)
-        else:
-            messagebox.showerror("Error", "Not found.")
-
-    # Button to show student details
-    ttk.Button(details_frame,
-               text="Show Details",
-               command=show_student_details).grid(row=1, columnspan=2, pady=6)
-
-    # ----- Enquiry Tab -----
-    enquiry_tab = make_tab("Enquiry")
-    enquiry_frame = ttk.LabelFrame(enquiry_tab, text="Submit Enquiry")
-    enquiry_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variables and Text widget for enquiry
-    enquiry_name = tk.StringVar()
-    enquiry_email = tk.StringVar()
-
-    # Name label+entry
-    ttk.Label(enquiry_frame, text="Name:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(enquiry_frame, textvariable=enquiry_name, width=17).grid(row=0, column=1, padx=8, pady=4)
-    # Email label+entry
-    ttk.Label(enquiry_frame, text="Email:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(enquiry_frame, textvariable=enquiry_email, width=17).grid(row=1, column=1, padx=8, pady=4)
-    # Query label+text area
-    ttk.Label(enquiry_frame, text="Query:").grid(row=2, column=0, sticky='nw', padx=8, pady=4)
-    enquiry_query = tk.Text(enquiry_frame, width=30, height=4)
-    enquiry_query.grid(row=2, column=1, padx=8, pady=4)
-
-    def submit_enquiry():
-        """
-        Handler for "Submit" button in Enquiry tab.
-        Validates fields and shows confirmation. No storage in this version.
-        """
-        name = enquiry_name.get().strip()
-        email = enquiry_email.get().strip()
-        query = enquiry_query.get("1.0", tk.END).strip()
-        if name and email and query:
-            messagebox.showinfo("Received", "Enquiry submitted.")
-            # Clear fields after submission
-            enquiry_name.set("")
-            enquiry_email.set("")
-            enquiry_query.delete("1.0", tk.END)
-        else:
-            messagebox.showerror("Error", "Fill all fields.")
-
-    # Button to submit enquiry
-    ttk.Button(enquiry_frame,
-               text="Submit",
-               command=submit_enquiry).grid(row=3, columnspan=2, pady=6)
-
-    # ----- Hostel Details Tab -----
-    hostel_tab = make_tab("Hostel Details")
-    hostel_frame = ttk.LabelFrame(hostel_tab, text="Hostel Info")
-    hostel_frame.pack(padx=5, pady=5, fill='x')
-
-    # Variables for hostel assignment
-    hostel_student_id = tk.StringVar()
-    hostel_name_var = tk.StringVar()
-    room_no_var = tk.StringVar()
-
-    # Student ID label+entry
-    ttk.Label(hostel_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(hostel_frame, textvariable=hostel_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
-    # Hostel Name label+entry
-    ttk.Label(hostel_frame, text="Hostel Name:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(hostel_frame, textvariable=hostel_name_var, width=17).grid(row=1, column=1, padx=8, pady=4)
-    # Room No label+entry
-    ttk.Label(hostel_frame, text="Room No:").grid(row=2, column=0, sticky='w', padx=8, pady=4)
-    ttk.Entry(hostel_frame, textvariable=room_no_var, width=17).grid(row=2, column=1, padx=8, pady=4)
-
-    def save_hostel():
-        """
-        Handler for "Save" button in Hostel Details tab.
-        Validates student exists, then saves hostel info.
-        """
-        sid = hostel_student_id.get().strip()
-        hname = hostel_name_var.get().strip()
-        rno = room_no_var.get().strip()
-        if sid and hname and rno:
-            # Check student exists
-            if sid not in database['students']:
-                messagebox.showerror("Error", "Invalid Student ID.")
-                return
-            # Save hostel info
-            database['hostel'][sid] = {'hostel_name': hname, 'room_no': rno}
-            messagebox.showinfo("Saved", "Hostel details saved.")
-            # Clear fields
-            hostel_student_id.set("")
-            hostel_name_var.set("")
-            room_no_var.set("")
-        else:
-            messagebox.showerror("Error", "Fill all fields.")
-
-    # Button to save hostel info
-    ttk.Button(hostel_frame,
-               text="Save",
-               command=save_hostel).grid(row=3, columnspan=2, pady=6)
-
-    # ----- View Faculty Tab -----
-    view_faculty_tab = make_tab("View Faculty")
-    vf_frame = ttk.LabelFrame(view_faculty_tab, text="Faculty List")
-    vf_frame.pack(padx=5, pady=5, fill='both', expand=True)
-
-    # Listbox to display faculty entries
-    faculty_listbox = tk.Listbox(vf_frame)
-    faculty_listbox.pack(fill='both', expand=True, padx=8, pady=4)
-
-    def refresh_faculty_list():
-        """
-        Clears and repopulates the faculty listbox with current faculty data.
-        """
-        faculty_listbox.delete(0, tk.END)
-        for fid, data in database['faculty'].items():
-            faculty_listbox.insert(tk.END, f"ID: {fid} | Name: {data['name']}")
-
-    # Button to refresh faculty list display
-    ttk.Button(vf_frame,
-               text="Refresh",
-               command=refresh_faculty_list).pack(pady=5)
-
-    # ----- View Students Tab -----
-    view_students_tab = make_tab("View Students")
-    vs_frame = ttk.LabelFrame(view_students_tab, text="Student List")
-    vs_frame.pack(padx=5, pady=5, fill='both', expand=True)
-
-    # Listbox to display student entries
-    student_listbox = tk.Listbox(vs_frame)
-    student_listbox.pack(fill='both', expand=True, padx=8, pady=4)
-
-    def refresh_student_list():
-        """
-        Clears and repopulates the student listbox with current student data.
-        """
-        student_listbox.delete(0, tk.END)
-        for sid, data in database['students'].items():
-            student_listbox.insert(tk.END, f"ID: {sid} | Name: {data['name']}")
-
-    # Button to refresh student list display
-    ttk.Button(vs_frame,
-               text="Refresh",
-               command=refresh_student_list).pack(pady=5)
-
-    # Pack the tab control into content frame
-    tab_control.pack(expand=True, fill='both')
-
-    # ---------- FOOTER ----------
-    footer = tk.Frame(root, bg=BG_COLOR)
-    footer.pack(fill='x', padx=10, pady=4)
-    # Footer label on right
-    tk.Label(footer,
-             text="© NIET University Management System",
-             bg=BG_COLOR,
-             fg=PRIMARY_COLOR,
-             font=("Arial", 8)).pack(side='right')
-    # Logout button on left: destroys main window and re-shows login
-    tk.Button(footer,
-              text="Logout",
-              command=lambda: [root.destroy(), show_login()],
-              bg=PRIMARY_COLOR,
-              fg='white',
-              font=("Arial", 9, "bold")).pack(side='left')
-
-    # Start the Tkinter main loop for the main app window
-    root.mainloop()
-
-# --- Login Window ---
-def show_login():
-    """
-    Builds and displays the login window.
-    On successful login (ID "123", password "admin"), launches main app.
-    """
-    global login_win
-    login_win = tk.Tk()
-    login_win.title("Login")
-    # Slightly smaller login window
-    login_win.geometry("280x180")
-    login_win.resizable(False, False)
-    login_win.configure(bg=BG_COLOR)
-
-    # Label and entry for Login ID
-    tk.Label(login_win,
-             text="Login ID:",
-             bg=BG_COLOR,
-             fg=PRIMARY_COLOR,
-             font=("Arial", 10, "bold")).pack(pady=5)
-    login_id_entry = tk.Entry(login_win)
-    login_id_entry.pack()
-
-    # Label and entry for Password
-    tk.Label(login_win,
-             text="Password:",
-             bg=BG_COLOR,
-             fg=PRIMARY_COLOR,
-             font=("Arial", 10, "bold")).pack(pady=5)
-    login_pass_entry = tk.Entry(login_win, show='*')
-    login_pass_entry.pack()
-
-    def check_login():
-        """
-        Handler for Login button.
-        Checks credentials and either launches main app or shows error.
-        """
-        uid = login_id_entry.get()
-        pwd = login_pass_entry.get()
-        # Only valid combination: ID "123", password "admin"
-        if uid == "123" and pwd == "admin":
-            launch_main_app()
-        else:
-            messagebox.showerror("Login Failed", "Incorrect ID or Password")
-
-    # Login button
-    tk.Button(login_win,
-              text="Login",
-              command=check_login,
-              bg=PRIMARY_COLOR,
-              fg='white').pack(pady=10)
-
-    # Start Tkinter loop for login window
-    login_win.mainloop()
-
-# Start the application by showing login window first
-show_login()
\ No newline at end of file
+import time
+# Read before the other imports so the startup report includes them
+STARTUP_START = time.perf_counter()
+
+import argparse
+import bisect
+import csv
+import datetime
+import gc
+import getpass
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import traceback
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+from operator import itemgetter
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+import ums_core
+from ums_core import (
+    DAYS, DAY_START, EXPORT_FORMATS, FACULTY_MAX_LOAD, FUZZY_DEBOUNCE, IMPORT_BATCH,
+    LOGIN_MAX_FAILURES, ROLE_TABS, SCRYPT_N, SCRYPT_P, SCRYPT_R, SEARCH_KINDS,
+    SLOTS_PER_DAY, Student, add_classroom, add_enquiry, add_faculty, add_ledger_row,
+    add_room, add_section, add_student, answer_enquiry, apply_change, apply_enquiry,
+    assign_course, assign_hostel, assign_section, audit_events, authenticate,
+    auto_allocate, auto_assign_sections, check_counters, clear_database,
+    close_enquiry_queue, close_storage, commit, commit_many, compile_prereqs,
+    course_fee_map, course_roster, dashboard_totals, database, eligible_courses_for_all,
+    enquiries, enquiry_counts, enquiry_days, enquiry_stats, enroll, ensure_search_index,
+    export_database, export_eligibility, export_fee_report, faculty_load, fee_report,
+    fuzzy_search, import_students, ledger, list_enquiries, list_faculty, list_sections,
+    list_students, list_timetable, load_users, login_failures, missing_prereqs,
+    occupancy_report, open_enquiry_queue, open_storage, parquet_available,
+    plan_timetable, rebuild_indexes, record_payment, schedule_section, search_students,
+    set_course_capacity, set_prereqs, set_user, snapshot_tables, student_details,
+    sync_storage, timetable_entry, timetable_problems, unenroll, update_faculty, users,
+    write_stats,
+)
+from ums_api import ApiHandler, HTTP_PORT, serve_http
+
+# Theme Colors
+PRIMARY_COLOR = "#C8102E"  # NIET Red
+BG_COLOR = "#FFFFFF"       # White
+
+# --- Startup Timing ---
+# Seconds from the first import to each startup milestone, in the order
+# reached (reported with --startup-timing)
+startup_times = {}
+
+def mark_startup(milestone):
+    """
+    Records the first time a startup milestone is reached.
+    """
+    startup_times.setdefault(milestone, time.perf_counter() - STARTUP_START)
+
+def report_startup_timing(path=None):
+    """
+    Prints the startup milestones; with `path`, also appends them to that
+    file as one JSON line so runs can be compared across releases.
+    """
+    print(f"{'milestone':32s} {'seconds':>8s}")
+    for milestone, seconds in startup_times.items():
+        print(f"{milestone:32s} {seconds:8.3f}")
+    if path:
+        record = {'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                  'python': sys.version.split()[0],
+                  'milestones': {m: round(t, 4) for m, t in startup_times.items()}}
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+
+mark_startup('imports')
+
+# --- Background Work ---
+# Work for the same key (e.g. a student ID) always goes to the same
+# single-thread worker, so requests for one record are never reordered
+WORKER_COUNT = 4
+workers = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"ums-worker-{i}")
+           for i in range(WORKER_COUNT)]
+# Long jobs (bulk imports) run on their own thread so no record key queues
+# behind them; their cancel events are set when the app closes
+long_tasks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ums-long-task")
+long_task_cancels = set()
+
+# Future of the data load the GUI starts once the login window is up
+# (None until then); background work waits for it
+storage_loading = None
+
+def load_storage():
+    open_storage()
+    mark_startup('data loaded')
+
+def preload_storage():
+    """
+    Starts loading saved data on its own thread, once.
+    """
+    global storage_loading
+    if storage_loading is None:
+        loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ums-preload")
+        storage_loading = loader.submit(load_storage)
+        loader.shutdown(wait=False)
+
+def when_loaded(func, args):
+    """
+    Runs func(*args) after the background data load, if one was started,
+    and after catching up with changes other desks saved.
+    """
+    if storage_loading is not None:
+        storage_loading.result()
+    sync_storage()
+    if profilers is not None:
+        return run_profiled(func, args)
+    return func(*args)
+
+def run_in_background(key, func, *args):
+    """
+    Runs func(*args) on the worker that owns `key` and returns a Future.
+    """
+    return workers[hash(key) % WORKER_COUNT].submit(when_loaded, func, args)
+
+def run_long_task(cancel, func, *args):
+    """
+    Runs func(*args) on the long-task thread, after the data load as
+    run_in_background does, and returns a Future. The `cancel` event
+    (which func must watch) is set by cancel_long_tasks.
+    """
+    long_task_cancels.add(cancel)
+    future = long_tasks.submit(when_loaded, func, args)
+    future.add_done_callback(lambda f: long_task_cancels.discard(cancel))
+    return future
+
+def cancel_long_tasks():
+    """
+    Asks running long tasks to stop, drops queued ones and waits for them.
+    """
+    for cancel in list(long_task_cancels):
+        cancel.set()
+    long_tasks.shutdown(cancel_futures=True)
+
+
+# --- Metrics ---
+# Latency histograms of the GUI, shown in the Diagnostics tab, printed with
+# --ui-timing and written in the Prometheus text format with --metrics.
+# They are only touched on the Tk thread, so recording needs no lock.
+# Upper bounds (seconds) of the histogram buckets; one more bucket holds the rest
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# The Tk thread checks in every STALL_TICK ms; arriving more than
+# STALL_THRESHOLD seconds late means the event loop was stalled
+STALL_TICK = 100
+STALL_THRESHOLD = 0.05
+
+
+class Histogram:
+    """
+    Latency histogram over LATENCY_BUCKETS. Recording a call costs one
+    bisect, and memory does not grow with the number of calls.
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Estimates the q-quantile as the upper bound of the bucket it falls
+        in (never more than the slowest call).
+        """
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS + (self.max,), self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def prometheus(self, metric, labels=""):
+        """
+        Returns the histogram as Prometheus text lines (cumulative buckets).
+        """
+        prefix = labels + "," if labels else ""
+        lines = []
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts):
+            seen += n
+            lines.append(f'{metric}_bucket{{{prefix}le="{bound}"}} {seen}')
+        lines.append(f'{metric}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        labels = f"{{{labels}}}" if labels else ""
+        lines.append(f"{metric}_sum{labels} {self.total:.6f}")
+        lines.append(f"{metric}_count{labels} {self.count}")
+        return lines
+
+
+handler_metrics = defaultdict(Histogram)  # time each GUI handler blocked the Tk thread
+task_metrics = defaultdict(Histogram)     # time from queuing background work to
+                                          # handling its result, by function name
+stall_metrics = Histogram()               # Tk event-loop stalls
+
+def ui_handler(func):
+    """
+    Decorator for Tk callbacks that records how long each call blocks the
+    Tk thread in handler_metrics.
+    """
+    histogram = handler_metrics[func.__name__]
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+def watch_event_loop(widget, due=None):
+    """
+    Heartbeat on the Tk thread: each tick asks to run STALL_TICK ms later,
+    so arriving late means something held the event loop for that long.
+    """
+    now = time.perf_counter()
+    if due is not None and now - due > STALL_THRESHOLD:
+        stall_metrics.observe(now - due)
+    widget.after(STALL_TICK, watch_event_loop, widget, now + STALL_TICK / 1000)
+
+def metric_rows():
+    """
+    Returns one row per handler and background task:
+    (kind, name, calls, mean ms, p50 ms, p99 ms, max ms), slowest p99 first.
+    """
+    rows = []
+    for kind, family in (('handler', handler_metrics), ('task', task_metrics)):
+        for name, h in list(family.items()):
+            if h.count:
+                rows.append((kind, name, h.count, h.total / h.count * 1e3,
+                             h.quantile(0.5) * 1e3, h.quantile(0.99) * 1e3, h.max * 1e3))
+    rows.sort(key=itemgetter(5), reverse=True)
+    return rows
+
+def write_metrics(path):
+    """
+    Writes every histogram to `path` in the Prometheus text format (as
+    read by node_exporter's textfile collector), replacing it atomically.
+    """
+    lines = []
+    for metric, label, family, about in (
+            ('ums_handler_seconds', 'handler', handler_metrics,
+             "Time a GUI handler blocked the Tk thread."),
+            ('ums_task_seconds', 'task', task_metrics,
+             "Time from queuing background work to handling its result.")):
+        lines += [f"# HELP {metric} {about}", f"# TYPE {metric} histogram"]
+        for name, h in sorted(family.items()):
+            lines += h.prometheus(metric, f'{label}="{name}"')
+    lines += ["# HELP ums_tk_stall_seconds Tk event loop stalls longer than "
+              f"{STALL_THRESHOLD * 1e3:.0f} ms.", "# TYPE ums_tk_stall_seconds histogram"]
+    lines += stall_metrics.prometheus('ums_tk_stall_seconds')
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+def print_ui_timing():
+    """
+    Prints the Tk-thread time of each handler and the latency of each
+    background task called this session, and the event-loop stalls.
+    """
+    print(f"{'kind':8s} {'name':24s} {'calls':>6s} {'mean ms':>8s} {'p50 ms':>8s} "
+          f"{'p99 ms':>8s} {'max ms':>8s}")
+    for kind, name, calls, mean, p50, p99, slowest in metric_rows():
+        print(f"{kind:8s} {name:24s} {calls:6d} {mean:8.2f} {p50:8.2f} {p99:8.2f} {slowest:8.2f}")
+    print(f"Tk stalls over {STALL_THRESHOLD * 1e3:.0f} ms: {stall_metrics.count}, "
+          f"longest {stall_metrics.max * 1e3:.0f} ms")
+
+# --- Profiling ---
+# With --profile, every function the session runs on the Tk thread and the
+# workers is recorded by cProfile, one profiler per thread, and the merged
+# profile is saved for offline analysis (e.g. python -m pstats FILE).
+# Off by default: the only cost then is one check per background task.
+profilers = None       # this session's profilers, or None when off
+profile_local = None   # per thread: its profiler this session
+
+def start_profiling():
+    """
+    Starts profiling the calling (Tk) thread and, from now on, background tasks.
+    """
+    global profilers, profile_local
+    import cProfile
+    profiler = cProfile.Profile()
+    profilers = [profiler]
+    profile_local = threading.local()
+    profile_local.profiler = profiler
+    profiler.enable()
+
+def run_profiled(func, args):
+    """
+    Runs func(*args) under the current worker thread's profiler.
+    """
+    import cProfile
+    profiler = getattr(profile_local, 'profiler', None)
+    if profiler is profilers[0]:
+        # The thread that started profiling is profiled all session
+        return func(*args)
+    if profiler is None:
+        profiler = profile_local.profiler = cProfile.Profile()
+        profilers.append(profiler)
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler, which then sees every thread
+        return func(*args)
+    try:
+        return func(*args)
+    finally:
+        profiler.disable()
+
+def stop_profiling(directory):
+    """
+    Stops profiling and saves the merged profile of this session in
+    `directory`. Returns the file path.
+    """
+    global profilers
+    import pstats
+    profilers[0].disable()
+    stats = pstats.Stats(*profilers)
+    profilers = None
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(directory, f"ums-{stamp}-{os.getpid()}.prof")
+    stats.dump_stats(path)
+    return path
+
+
+# --- GUI Helpers ---
+# Rows kept as Treeview items beyond the visible window
+LIST_OVERSCAN = 5
+# Pixel height of one Treeview row (set on the style in build_main_gui)
+LIST_ROW_HEIGHT = 20
+# How often (ms) the Dashboard redraws its figures, and checks its counters
+# against a full recount
+DASHBOARD_REFRESH = 2000
+DASHBOARD_RECOUNT = 5 * 60 * 1000
+
+
+class PagedList:
+    """
+    Virtualized list view built on a ttk.Treeview.
+    Only the visible rows plus a small overscan exist as Treeview items;
+    scrolling refills those items from the key list instead of inserting
+    one item per record, so the cost of a redraw does not grow with the data.
+    """
+
+    def __init__(self, parent, columns, get_row, height=10):
+        self.get_row = get_row      # function: key -> tuple of column values
+        self.keys = []              # all keys in display order
+        self.offset = 0             # index of the first visible key
+        self.visible = height       # number of rows that fit in the widget
+
+        frame = tk.Frame(parent, bg=BG_COLOR)
+        frame.pack(fill='both', expand=True, padx=8, pady=4)
+        self.tree = ttk.Treeview(frame, columns=columns, show='headings',
+                                 height=height, selectmode='browse')
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=120, anchor='w')
+        self.scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.status = ttk.Label(parent, text="")
+        self.status.pack(anchor='w', padx=8)
+
+        # Mouse wheel on Windows/macOS and X11
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1))
+        self.tree.bind("<Configure>", self.on_resize)
+
+    def set_keys(self, keys):
+        """
+        Replaces the displayed keys and redraws from the top.
+        """
+        self.keys = keys
+        self.offset = 0
+        self.render()
+
+    def append(self, key):
+        """
+        Adds one key at the end; only redraws if it lands in the visible window.
+        """
+        self.keys.append(key)
+        if len(self.keys) - 1 < self.offset + self.visible + LIST_OVERSCAN:
+            self.render()
+        else:
+            self.update_scrollbar()
+
+    def selected(self):
+        """
+        Returns the key of the selected row, or None.
+        """
+        sel = self.tree.selection()
+        if not sel:
+            return None
+        index = self.offset + self.tree.index(sel[0])
+        return self.keys[index] if index < len(self.keys) else None
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.offset + rows)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(offset, len(self.keys) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scroll(self, action, amount, unit=None):
+        """
+        Scrollbar callback: ('moveto', fraction) or ('scroll', n, 'units'/'pages').
+        """
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self.keys)))
+        elif unit == 'pages':
+            self.scroll_by(int(amount) * self.visible)
+        else:
+            self.scroll_by(int(amount))
+
+    def on_resize(self, event):
+        visible = max(1, (event.height - LIST_ROW_HEIGHT) // LIST_ROW_HEIGHT)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def render(self):
+        """
+        Refills the existing Treeview items with the rows in the window.
+        """
+        keys = self.keys[self.offset:self.offset + self.visible + LIST_OVERSCAN]
+        items = self.tree.get_children()
+        for i, key in enumerate(keys):
+            values = self.get_row(key)
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert('', 'end', values=values)
+        if len(items) > len(keys):
+            self.tree.delete(*items[len(keys):])
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.keys)
+        if total:
+            self.scrollbar.set(self.offset / total,
+                               min(1.0, (self.offset + self.visible) / total))
+            last = min(total, self.offset + self.visible)
+            self.status.config(text=f"Showing {self.offset + 1:,}-{last:,} of {total:,}")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.status.config(text="No records")
+
+
+# --- Main Functions ---
+
+def launch_main_app(user):
+    """
+    Called after successful login.
+    Destroys the login window and builds the main application GUI.
+    """
+    global current_user
+    login_win.destroy()  # close login window
+    current_user = user['id']  # changes are audited under this user
+    build_main_gui(user) # open main GUI
+
+def build_main_gui(user):
+    """
+    Builds and displays the main University Management System GUI.
+    Contains tabs for adding/viewing students and faculty, enrolling students,
+    hostel details, enquiries, etc.; `user` only sees the tabs of their role.
+    """
+    root = tk.Tk()
+    root.title("University Management System")
+    # Wide enough for every tab title to fit on one row
+    root.geometry("1400x480")
+    # Set root background color to PRIMARY_COLOR so that any blank space shows red
+    root.configure(bg=PRIMARY_COLOR)
+
+    # ---------- STYLING ----------
+    style = ttk.Style()
+    style.theme_use("clam")  # use a clean theme
+
+    # Style for Notebook (tab container)
+    style.configure("TNotebook", background=BG_COLOR)
+    style.configure("TNotebook.Tab",
+                    background=PRIMARY_COLOR,
+                    foreground="white",
+                    padding=(8, 4))
+    style.map("TNotebook.Tab",
+              background=[("selected", PRIMARY_COLOR)],
+              foreground=[("selected", "white")])
+
+    # Style for Buttons
+    style.configure("TButton",
+                    background=PRIMARY_COLOR,
+                    foreground="white",
+                    font=("Arial", 9, "bold"))
+    # Change background slightly when button is active
+    style.map("TButton",
+              background=[("active", "#a50f24")])
+
+    # Style for Labels
+    style.configure("TLabel",
+                    background=BG_COLOR,
+                    foreground="black")
+    # Style for LabelFrame
+    style.configure("TLabelFrame",
+                    background=BG_COLOR,
+                    borderwidth=2,
+                    relief="groove")
+    style.configure("TLabelFrame.Label",
+                    font=("Arial", 11, "bold"),
+                    foreground=PRIMARY_COLOR)
+    # Fixed row height so list views can work out how many rows are visible
+    style.configure("Treeview", rowheight=LIST_ROW_HEIGHT)
+
+    # ---------- HEADER SECTION ----------
+    header_frame = tk.Frame(root, bg=BG_COLOR)
+    header_frame.pack(pady=8, fill='x', padx=10)
+
+    # Left: NIET title
+    tk.Label(header_frame,
+             text="NIET",
+             font=("Arial", 28, "bold"),
+             fg=PRIMARY_COLOR,
+             bg=BG_COLOR).pack(side='left')
+
+    # Left: Subtitle
+    tk.Label(header_frame,
+             text="UNIVERSITY MANAGEMENT SYSTEM",
+             font=("Arial", 14, "bold"),
+             fg=PRIMARY_COLOR,
+             bg=BG_COLOR).pack(side='left', padx=8)
+
+    # Right: Info frame (contact, slogan)
+    info_frame = tk.Frame(header_frame, bg=BG_COLOR)
+    info_frame.pack(side='right')
+    tk.Label(info_frame,
+             text="GET FUTURE READY!",
+             font=("Arial", 12, "bold"),
+             fg=PRIMARY_COLOR,
+             bg=BG_COLOR).pack()
+    tk.Label(info_frame,
+             text="Contact: +91 4445556667",
+             font=("Arial", 8),
+             fg="black",
+             bg=BG_COLOR).pack()
+
+    # Also place a bold "GET FUTURE READY!" label on top-right corner of root
+    root.update_idletasks()  # ensure geometry is calculated
+    tk.Label(root,
+             text="GET FUTURE READY!",
+             font=("Arial", 16, "bold"),
+             fg="white",
+             bg=PRIMARY_COLOR).place(relx=1.0, rely=0.0,
+                                     anchor='ne', x=-10, y=10)
+
+    # Separator line below header
+    tk.Frame(root, bg=PRIMARY_COLOR, height=2).pack(fill='x', padx=10)
+
+    # ---------- CONTENT FRAME ----------
+    content_frame = tk.Frame(root, bg=BG_COLOR)
+    content_frame.pack(expand=True, fill='both', padx=10, pady=5)
+
+    # ---------- TAB CONTROL ----------
+    tab_control = ttk.Notebook(content_frame)
+    # Tabs not built yet: frame path -> (frame, build function)
+    unbuilt_tabs = {}
+    allowed_tabs = ROLE_TABS[user['role']]
+
+    def make_tab(title, build):
+        """
+        Helper to create a new tab with given title, if the user's role may see it.
+        Its widgets are placed by build(frame) the first time the tab is selected.
+        """
+        if allowed_tabs is not None and title not in allowed_tabs:
+            return
+        frame = tk.Frame(tab_control, bg=BG_COLOR)
+        tab_control.add(frame, text=title)
+        unbuilt_tabs[str(frame)] = (frame, build)
+
+    @ui_handler
+    def build_selected_tab(e=None):
+        """
+        Builds the selected tab if this is the first time it is shown.
+        """
+        frame, build = unbuilt_tabs.pop(str(tab_control.select()), (None, None))
+        if build:
+            build(frame)
+
+    tab_control.bind("<<NotebookTabChanged>>", build_selected_tab)
+
+    # A tab that shows a list registers callbacks here when it is built,
+    # so other tabs can update the list without building it
+    listeners = defaultdict(list)
+
+    def notify(event, *args):
+        for callback in listeners[event]:
+            callback(*args)
+
+    # Finished background work waiting to be handled on the Tk thread
+    results = queue.Queue()
+    pending = [0]  # number of tasks still running
+
+    def run_task(key, func, args, on_done):
+        """
+        Runs func(*args) on a worker thread and later calls on_done(future)
+        on the Tk thread. Shows the busy indicator while work is pending.
+        """
+        pending[0] += 1
+        busy_label.config(text="Working...")
+        root.config(cursor="watch")
+        start = time.perf_counter()
+        future = run_in_background(key, func, *args)
+        future.add_done_callback(lambda f: results.put((on_done, f, func.__name__, start)))
+
+    def poll_results():
+        """
+        Hands finished background work back to its callback on the Tk thread.
+        Errors a callback lets through are shown instead of ending the loop.
+        """
+        while True:
+            try:
+                on_done, future, name, start = results.get_nowait()
+            except queue.Empty:
+                break
+            pending[0] -= 1
+            if not pending[0]:
+                busy_label.config(text="")
+                root.config(cursor="")
+            try:
+                on_done(future)
+            except ValueError as e:
+                # Refusals that a callback did not handle itself
+                messagebox.showerror("Error", str(e))
+            except Exception as e:
+                # A failed task or broken callback must not stop the polling,
+                # or every later result would be left in the queue
+                traceback.print_exc()
+                messagebox.showerror("Error", f"{name} failed: {e}")
+            finally:
+                task_metrics[name].observe(time.perf_counter() - start)
+        root.after(50, poll_results)
+
+    # ----- Dashboard Tab -----
+    def build_dashboard_tab(dashboard_tab):
+        dash_frame = ttk.LabelFrame(dashboard_tab, text="Overview")
+        dash_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        # One figure per row: caption on the left, value on the right
+        figures = {}
+        for row, (name, caption) in enumerate((
+                ('students', "Students:"), ('faculty', "Faculty:"),
+                ('enrollments', "Enrollments:"), ('hostel', "Hostel beds taken:"),
+                ('housed', "Students with a room:"), ('enquiries', "Enquiries today:"))):
+            ttk.Label(dash_frame, text=caption).grid(row=row, column=0, sticky='w', padx=8, pady=2)
+            figures[name] = ttk.Label(dash_frame, text="", font=("Arial", 10, "bold"))
+            figures[name].grid(row=row, column=1, sticky='w', padx=8, pady=2)
+        dash_status = ttk.Label(dash_frame, text="")
+        dash_status.grid(row=6, column=0, columnspan=2, sticky='w', padx=8, pady=4)
+
+        # Students per course (fixed-height list, so redrawing is O(visible rows))
+        course_frame = tk.Frame(dash_frame, bg=BG_COLOR)
+        course_frame.grid(row=0, column=2, rowspan=7, sticky='nsew', padx=8)
+        dash_frame.columnconfigure(2, weight=1)
+        totals = [dashboard_totals()]
+
+        def course_row(cid):
+            course = database['courses'][cid]
+            return (cid, course['name'], f"{totals[0]['courses'].get(cid, 0):,}",
+                    f"{course['capacity']:,}" if course.get('capacity') else "")
+
+        course_view = PagedList(course_frame, ("Course", "Name", "Students", "Seat limit"),
+                                course_row, height=6)
+        course_view.set_keys(list(database['courses']))
+
+        def show_dashboard():
+            """
+            Redraws the figures every DASHBOARD_REFRESH ms. Reading them is
+            O(1), so this runs on the Tk thread without waiting for any lock.
+            """
+            t = totals[0] = dashboard_totals()
+            figures['students'].config(text=f"{t['students']:,}")
+            figures['faculty'].config(text=f"{t['faculty']:,}")
+            figures['enrollments'].config(text=f"{sum(t['courses'].values()):,}")
+            used = f"{t['occupied'] / t['beds']:.0%}" if t['beds'] else "no rooms"
+            figures['hostel'].config(text=f"{t['occupied']:,} of {t['beds']:,} ({used})")
+            figures['housed'].config(text=f"{t['housed']:,}")
+            figures['enquiries'].config(text=f"{t['enquiries_today']:,} ({t['open_enquiries']:,} open)")
+            course_view.render()
+            root.after(DASHBOARD_REFRESH, show_dashboard)
+
+        def recount():
+            """
+            Checks the counters against a full recount on a worker thread
+            every DASHBOARD_RECOUNT ms.
+            """
+            def on_done(future):
+                drifted = future.result()
+                checked = datetime.datetime.now().strftime('%H:%M')
+                dash_status.config(text=f"Recounted at {checked}" + (
+                    f"; corrected {', '.join(drifted)}" if drifted else ""))
+
+            run_task('dashboard', check_counters, (), on_done)
+            root.after(DASHBOARD_RECOUNT, recount)
+
+        show_dashboard()
+        root.after(DASHBOARD_RECOUNT, recount)
+
+    make_tab("Dashboard", build_dashboard_tab)
+
+    # ----- Add Student Tab -----
+    def build_student_tab(student_tab):
+        student_frame = ttk.LabelFrame(student_tab, text="Add New Student")
+        student_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variables for student input fields
+        student_id = tk.StringVar()
+        student_name = tk.StringVar()
+        student_email = tk.StringVar()
+        student_phone = tk.StringVar()
+        student_course = tk.StringVar()
+        student_fees = tk.StringVar()
+
+        # Labels and associated StringVar list
+        labels = ["Student ID", "Name", "Email", "Phone", "Course", "Fees (INR)"]
+        vars = [student_id, student_name, student_email, student_phone, student_course, student_fees]
+
+        # Loop to create label+entry/combobox for each field
+        for i, (lbl, var) in enumerate(zip(labels, vars)):
+            ttk.Label(student_frame, text=lbl + ":").grid(row=i, column=0, sticky='w', padx=8, pady=4)
+            if lbl == "Course":
+                # Course selection via Combobox; values from course_fee_map keys
+                cb = ttk.Combobox(student_frame,
+                                  textvariable=var,
+                                  values=list(course_fee_map.keys()),
+                                  state="readonly",
+                                  width=15)
+                cb.grid(row=i, column=1, padx=8, pady=4)
+                # When course selected, update fee field
+                def on_course(e=None):
+                    fee = course_fee_map.get(student_course.get(), 0)
+                    # Format fee with commas
+                    student_fees.set(f"{fee:,}")
+                cb.bind("<<ComboboxSelected>>", on_course)
+            elif lbl == "Fees (INR)":
+                # Read-only entry for fees
+                ttk.Entry(student_frame,
+                          textvariable=var,
+                          state="readonly",
+                          width=17).grid(row=i, column=1, padx=8, pady=4)
+            else:
+                # Regular entry for other fields
+                ttk.Entry(student_frame,
+                          textvariable=var,
+                          width=17).grid(row=i, column=1, padx=8, pady=4)
+
+        @ui_handler
+        def save_student():
+            """
+            Handler for "Add Student" button.
+            Validates inputs, checks duplicate ID, then saves student info and updates database
+            in the background.
+            """
+            sid = student_id.get().strip()
+            name = student_name.get().strip()
+            email = student_email.get().strip()
+            phone = student_phone.get().strip()
+            course = student_course.get()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                # Show the new row without redrawing the whole list
+                notify('student_added', sid)
+                messagebox.showinfo("Success", f"Student {name} added.")
+                # Clear input fields
+                for v in vars:
+                    v.set("")
+
+            run_task(sid, add_student, (sid, name, email, phone, course), on_saved)
+
+        def bulk_import_students():
+            """
+            Handler for "Bulk Import" button.
+            Streams a CSV/XLSX file of students on its own thread (once the
+            saved data has loaded) and shows a progress window with a Cancel button.
+            """
+            path = filedialog.askopenfilename(
+                title="Import Students",
+                filetypes=[("CSV or Excel", "*.csv *.xlsx"), ("All files", "*.*")])
+            if not path:
+                return
+            dialog = tk.Toplevel(root)
+            dialog.title("Importing Students")
+            dialog.configure(bg=BG_COLOR)
+            dialog.transient(root)
+            bar = ttk.Progressbar(dialog, length=300, maximum=1.0)
+            bar.pack(padx=10, pady=10)
+            status = ttk.Label(dialog, text="Starting...")
+            status.pack(padx=10)
+            cancel = threading.Event()
+            ttk.Button(dialog, text="Cancel", command=cancel.set).pack(pady=8)
+
+            # Shared with the worker thread; only the Tk thread touches widgets
+            state = {'fraction': 0.0, 'imported': 0, 'rejected': 0}
+
+            def progress(fraction, imported, rejected):
+                state.update(fraction=fraction, imported=imported, rejected=rejected)
+
+            def poll():
+                bar['value'] = state['fraction']
+                status.config(text=f"Imported {state['imported']:,}, rejected {state['rejected']:,}")
+                if not future.done():
+                    root.after(100, poll)
+                    return
+                dialog.destroy()
+                notify('students_imported')
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Includes csv.Error and openpyxl errors for a malformed file
+                    messagebox.showerror("Import Failed", str(e))
+                    return
+                info = f"Imported {result['imported']:,} students."
+                if result['cancelled']:
+                    info = "Import cancelled. " + info
+                if result['error_file']:
+                    info += f"\n{result['rejected']:,} rows rejected, see:\n{result['error_file']}"
+                messagebox.showinfo("Import", info)
+
+            future = run_long_task(cancel, import_students, path, progress, cancel)
+            poll()
+
+        # Buttons to add one student or import many
+        ttk.Button(student_frame,
+                   text="Add Student",
+                   command=save_student).grid(row=6, column=0, pady=6)
+        ttk.Button(student_frame,
+                   text="Bulk Import...",
+                   command=bulk_import_students).grid(row=6, column=1, pady=6)
+
+    make_tab("Add Student", build_student_tab)
+
+    # ----- Add Faculty Tab -----
+    def build_faculty_tab(faculty_tab):
+        faculty_frame = ttk.LabelFrame(faculty_tab, text="Add New Faculty")
+        faculty_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variables for faculty input fields
+        faculty_id = tk.StringVar()
+        faculty_name = tk.StringVar()
+
+        # Faculty ID label+entry
+        ttk.Label(faculty_frame, text="Faculty ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(faculty_frame, textvariable=faculty_id, width=17).grid(row=0, column=1, padx=8, pady=4)
+
+        # Faculty Name label+entry
+        ttk.Label(faculty_frame, text="Name:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(faculty_frame, textvariable=faculty_name, width=17).grid(row=1, column=1, padx=8, pady=4)
+
+        # Courses they may teach (comma-separated, blank = any) and weekly hours
+        faculty_qualified = tk.StringVar()
+        faculty_max_load = tk.StringVar(value=str(FACULTY_MAX_LOAD))
+        ttk.Label(faculty_frame, text="Qualified Courses:").grid(row=2, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(faculty_frame, textvariable=faculty_qualified, width=17).grid(row=2, column=1, padx=8, pady=4)
+        ttk.Label(faculty_frame, text="Max Hours/Week:").grid(row=3, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(faculty_frame, textvariable=faculty_max_load, width=17).grid(row=3, column=1, padx=8, pady=4)
+
+        def limits():
+            qualified = [c.strip().upper() for c in faculty_qualified.get().split(',')]
+            return qualified, faculty_max_load.get().strip()
+
+        @ui_handler
+        def save_faculty():
+            """
+            Handler for "Add Faculty" button.
+            Validates inputs, checks duplicate ID, then saves faculty info in the background.
+            """
+            fid = faculty_id.get().strip()
+            name = faculty_name.get().strip()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                notify('faculty_added', fid)
+                messagebox.showinfo("Success", "Faculty added.")
+                # Clear fields
+                faculty_id.set("")
+                faculty_name.set("")
+                faculty_qualified.set("")
+
+            run_task(fid, add_faculty, (fid, name) + limits(), on_saved)
+
+        @ui_handler
+        def save_limits():
+            """
+            Handler for "Update Limits" button.
+            Changes an existing faculty member's qualified courses and max hours.
+            """
+            fid = faculty_id.get().strip()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                notify('workload_changed')
+                messagebox.showinfo("Success", f"Limits for {fid} updated.")
+
+            run_task(fid, update_faculty, (fid,) + limits(), on_saved)
+
+        # Buttons to add faculty or change their limits
+        ttk.Button(faculty_frame,
+                   text="Add Faculty",
+                   command=save_faculty).grid(row=4, column=0, pady=6)
+        ttk.Button(faculty_frame,
+                   text="Update Limits",
+                   command=save_limits).grid(row=4, column=1, pady=6)
+
+    make_tab("Add Faculty", build_faculty_tab)
+
+    # ----- Enroll Student Tab -----
+    def build_enroll_tab(enroll_tab):
+        enroll_frame = ttk.LabelFrame(enroll_tab, text="Enroll Student in Course")
+        enroll_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variables for enrollment
+        enroll_student_id = tk.StringVar()
+        enroll_course_id = tk.StringVar()
+
+        # Student ID label+entry
+        ttk.Label(enroll_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(enroll_frame, textvariable=enroll_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
+        # Course ID label+entry
+        ttk.Label(enroll_frame, text="Course ID:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(enroll_frame, textvariable=enroll_course_id, width=17).grid(row=1, column=1, padx=8, pady=4)
+
+        @ui_handler
+        def enroll_student():
+            """
+            Handler for "Enroll" button.
+            Checks if student and course IDs exist; if not already enrolled, adds enrollment
+            in the background.
+            """
+            sid = enroll_student_id.get().strip()
+            cid = enroll_course_id.get().strip()
+
+            def on_enrolled(future):
+                try:
+                    enrolled = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                if not enrolled:
+                    messagebox.showinfo("Info", "Already enrolled.")
+                    return
+                notify('enrolled', sid, cid)
+                messagebox.showinfo("Success", f"Enrolled {sid} in {cid}.")
+                # Clear fields
+                enroll_student_id.set("")
+                enroll_course_id.set("")
+
+            run_task(sid, enroll, (sid, cid), on_enrolled)
+
+        @ui_handler
+        def unenroll_student():
+            """
+            Handler for "Unenroll" button.
+            Removes an existing enrollment from both the student and the course.
+            """
+            sid = enroll_student_id.get().strip()
+            cid = enroll_course_id.get().strip()
+
+            def on_unenrolled(future):
+                try:
+                    unenrolled = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                if not unenrolled:
+                    messagebox.showinfo("Info", "Not enrolled.")
+                    return
+                notify('unenrolled', sid, cid)
+                messagebox.showinfo("Success", f"Unenrolled {sid} from {cid}.")
+                enroll_student_id.set("")
+                enroll_course_id.set("")
+
+            run_task(sid, unenroll, (sid, cid), on_unenrolled)
+
+        # Buttons to enroll / unenroll student
+        ttk.Button(enroll_frame,
+                   text="Enroll",
+                   command=enroll_student).grid(row=2, column=0, pady=6)
+        ttk.Button(enroll_frame,
+                   text="Unenroll",
+                   command=unenroll_student).grid(row=2, column=1, pady=6)
+
+    make_tab("Enroll Student", build_enroll_tab)
+
+    # ----- View Student Details Tab -----
+    def build_details_tab(details_tab):
+        details_frame = ttk.LabelFrame(details_tab, text="Student Details")
+        details_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variable for student ID to view
+        detail_student_id = tk.StringVar()
+
+        # Label+entry for student ID
+        ttk.Label(details_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(details_frame, textvariable=detail_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
+
+        @ui_handler
+        def show_student_details():
+            """
+            Handler for "Show Details" button.
+            Retrieves and displays student info in a messagebox, including courses and hostel if any.
+            """
+            sid = detail_student_id.get().strip()
+
+            def on_loaded(future):
+                try:
+                    s = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                # Build info string
+                courses = ', '.join(s['courses'])
+                info = (
+                    f"ID: {sid}\n"
+                    f"Name: {s['name']}\n"
+                    f"Email: {s['email']}\n"
+                    f"Phone: {s['phone']}\n"
+                    f"Courses: {courses}"
+                )
+                # Fees paid against fees due over all courses
+                due = sum(d for d, p in s['fees'].values())
+                paid = sum(p for d, p in s['fees'].values())
+                info += f"\nFees paid: {paid:,} of {due:,} INR"
+                # If hostel info exists for this student, append it
+                if s['hostel']:
+                    h = s['hostel']
+                    info += f"\nHostel: {h.get('hostel_name')} Room: {h.get('room_no')}"
+                # Show info
+                messagebox.showinfo("Details", info)
+
+            run_task(sid, student_details, (sid,), on_loaded)
+
+        # Button to show student details
+        ttk.Button(details_frame,
+                   text="Show Details",
+                   command=show_student_details).grid(row=1, columnspan=2, pady=6)
+
+    make_tab("View Student Details", build_details_tab)
+
+    # ----- Enquiry Tab -----
+    def build_enquiry_tab(enquiry_tab):
+        enquiry_frame = ttk.LabelFrame(enquiry_tab, text="Submit Enquiry")
+        enquiry_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variables and Text widget for enquiry
+        enquiry_name = tk.StringVar()
+        enquiry_email = tk.StringVar()
+
+        # Name label+entry
+        ttk.Label(enquiry_frame, text="Name:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(enquiry_frame, textvariable=enquiry_name, width=17).grid(row=0, column=1, padx=8, pady=4)
+        # Email label+entry
+        ttk.Label(enquiry_frame, text="Email:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(enquiry_frame, textvariable=enquiry_email, width=17).grid(row=1, column=1, padx=8, pady=4)
+        # Query label+text area
+        ttk.Label(enquiry_frame, text="Query:").grid(row=2, column=0, sticky='nw', padx=8, pady=4)
+        enquiry_query = tk.Text(enquiry_frame, width=30, height=4)
+        enquiry_query.grid(row=2, column=1, padx=8, pady=4)
+
+        @ui_handler
+        def submit_enquiry():
+            """
+            Handler for "Submit" button in Enquiry tab.
+            Validates fields, saves the enquiry to the queue and shows confirmation.
+            """
+            name = enquiry_name.get().strip()
+            email = enquiry_email.get().strip()
+            query = enquiry_query.get("1.0", tk.END).strip()
+
+            def on_submitted(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Received", f"Enquiry submitted (ID {future.result()}).")
+                # Clear fields after submission
+                enquiry_name.set("")
+                enquiry_email.set("")
+                enquiry_query.delete("1.0", tk.END)
+
+            run_task(email, add_enquiry, (name, email, query), on_submitted)
+
+        # Button to submit enquiry
+        ttk.Button(enquiry_frame,
+                   text="Submit",
+                   command=submit_enquiry).grid(row=3, columnspan=2, pady=6)
+
+    make_tab("Enquiry", build_enquiry_tab)
+
+    # ----- Enquiry Triage Tab -----
+    def build_triage_tab(triage_tab):
+        triage_frame = ttk.LabelFrame(triage_tab, text="Enquiries")
+        triage_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        triage_top = tk.Frame(triage_frame, bg=BG_COLOR)
+        triage_top.pack(fill='x', padx=8, pady=4)
+        triage_status = tk.StringVar(value='open')
+        triage_text = tk.StringVar()
+        ttk.Label(triage_top, text="Show:").pack(side='left')
+        triage_cb = ttk.Combobox(triage_top,
+                                 textvariable=triage_status,
+                                 values=['open', 'answered', 'all'],
+                                 state="readonly",
+                                 width=9)
+        triage_cb.pack(side='left', padx=4)
+        ttk.Label(triage_top, text="Filter:").pack(side='left')
+        triage_entry = ttk.Entry(triage_top, textvariable=triage_text, width=16)
+        triage_entry.pack(side='left', padx=4)
+        # Queue depth: open enquiries and records waiting for the next disk sync
+        queue_depth = ttk.Label(triage_top, text="")
+        queue_depth.pack(side='right')
+
+        def enquiry_row(eid):
+            e = enquiries[eid]
+            return (eid, e['time'].replace('T', ' '), e['name'], e['email'], e['status'])
+
+        # Virtualized, paged list of matching enquiries
+        triage_view = PagedList(triage_frame, ("ID", "Received", "Name", "Email", "Status"),
+                                enquiry_row, height=6)
+
+        @ui_handler
+        def refresh_enquiries(e=None):
+            """
+            Reloads the enquiry list with the chosen status and filter text.
+            """
+            run_task('enquiries', list_enquiries, (triage_status.get(), triage_text.get().strip()),
+                     lambda future: triage_view.set_keys(future.result()))
+
+        def selected_enquiry():
+            eid = triage_view.selected()
+            if eid is None:
+                messagebox.showerror("Error", "Select an enquiry.")
+            return eid
+
+        @ui_handler
+        def view_enquiry():
+            """
+            Handler for "View" button: shows the full query text.
+            """
+            eid = selected_enquiry()
+            if eid:
+                e = enquiries[eid]
+                messagebox.showinfo(f"Enquiry {eid}",
+                                    f"From: {e['name']} <{e['email']}>\n"
+                                    f"Received: {e['time'].replace('T', ' ')}\n\n{e['query']}")
+
+        @ui_handler
+        def mark_answered():
+            """
+            Handler for "Mark Answered" button.
+            """
+            eid = selected_enquiry()
+            if not eid:
+                return
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                refresh_enquiries()
+
+            run_task('enquiries', answer_enquiry, (eid,), on_saved)
+
+        def show_queue_depth():
+            """
+            Updates the queue-depth figures every second.
+            """
+            stats = enquiry_stats()
+            queue_depth.config(text=f"Open: {stats['open']:,}  Unsynced: {stats['unflushed']:,}")
+            root.after(1000, show_queue_depth)
+
+        triage_cb.bind("<<ComboboxSelected>>", refresh_enquiries)
+        triage_entry.bind("<Return>", refresh_enquiries)
+        triage_buttons = tk.Frame(triage_frame, bg=BG_COLOR)
+        triage_buttons.pack(pady=4)
+        for text, command in (("Refresh", refresh_enquiries), ("View", view_enquiry),
+                              ("Mark Answered", mark_answered)):
+            ttk.Button(triage_buttons, text=text, command=command).pack(side='left', padx=4)
+        refresh_enquiries()
+        show_queue_depth()
+
+    make_tab("Enquiry Triage", build_triage_tab)
+
+    # ----- Hostel Details Tab -----
+    def build_hostel_tab(hostel_tab):
+        hostel_frame = ttk.LabelFrame(hostel_tab, text="Hostel Info")
+        hostel_frame.pack(side='left', anchor='n', padx=5, pady=5)
+
+        # Variables for hostel assignment
+        hostel_student_id = tk.StringVar()
+        hostel_name_var = tk.StringVar()
+        room_no_var = tk.StringVar()
+
+        # Student ID label+entry
+        ttk.Label(hostel_frame, text="Student ID:").grid(row=0, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(hostel_frame, textvariable=hostel_student_id, width=17).grid(row=0, column=1, padx=8, pady=4)
+        # Hostel Name label+entry
+        ttk.Label(hostel_frame, text="Hostel Name:").grid(row=1, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(hostel_frame, textvariable=hostel_name_var, width=17).grid(row=1, column=1, padx=8, pady=4)
+        # Room No label+entry
+        ttk.Label(hostel_frame, text="Room No:").grid(row=2, column=0, sticky='w', padx=8, pady=4)
+        ttk.Entry(hostel_frame, textvariable=room_no_var, width=17).grid(row=2, column=1, padx=8, pady=4)
+
+        @ui_handler
+        def save_hostel():
+            """
+            Handler for "Save" button in Hostel Details tab.
+            Validates student exists, then saves hostel info in the background.
+            """
+            sid = hostel_student_id.get().strip()
+            hname = hostel_name_var.get().strip()
+            rno = room_no_var.get().strip()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Saved", "Hostel details saved.")
+                # Clear fields
+                hostel_student_id.set("")
+                hostel_name_var.set("")
+                room_no_var.set("")
+                show_occupancy()
+
+            run_task(sid, assign_hostel, (sid, hname, rno), on_saved)
+
+        # Button to save hostel info
+        ttk.Button(hostel_frame,
+                   text="Save",
+                   command=save_hostel).grid(row=3, columnspan=2, pady=6)
+
+        # Rooms: add rooms, auto-allocate beds and show occupancy
+        rooms_frame = ttk.LabelFrame(hostel_tab, text="Rooms")
+        rooms_frame.pack(side='left', fill='both', expand=True, padx=5, pady=5)
+        room_form = tk.Frame(rooms_frame, bg=BG_COLOR)
+        room_form.pack(fill='x', padx=4, pady=2)
+
+        # Variables for new room fields
+        new_room_hostel = tk.StringVar()
+        new_room_no = tk.StringVar()
+        new_room_beds = tk.StringVar()
+        new_room_course = tk.StringVar()
+        for i, (lbl, var) in enumerate([("Hostel", new_room_hostel), ("Room", new_room_no),
+                                         ("Beds", new_room_beds)]):
+            ttk.Label(room_form, text=lbl + ":").grid(row=0, column=2 * i, sticky='w', padx=2)
+            ttk.Entry(room_form, textvariable=var, width=7).grid(row=0, column=2 * i + 1, padx=2)
+        ttk.Label(room_form, text="Course:").grid(row=1, column=0, sticky='w', padx=2, pady=4)
+        # Optional course the room is kept for ('' = any course)
+        ttk.Combobox(room_form,
+                     textvariable=new_room_course,
+                     values=[''] + list(database['courses'].keys()),
+                     state="readonly",
+                     width=9).grid(row=1, column=1, columnspan=2, sticky='w', padx=2, pady=4)
+
+        @ui_handler
+        def save_room():
+            """
+            Handler for "Add Room" button.
+            Adds a room with its number of beds to a hostel.
+            """
+            args = (new_room_hostel.get().strip(), new_room_no.get().strip(),
+                    new_room_beds.get().strip(), new_room_course.get())
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                new_room_no.set("")
+                show_occupancy()
+
+            run_task('rooms', add_room, args, on_saved)
+
+        @ui_handler
+        def allocate_rooms():
+            """
+            Handler for "Auto Allocate" button.
+            Gives every student without a room the next free bed, preferring rooms
+            kept for their course.
+            """
+            def on_done(future):
+                try:
+                    assigned, unplaced = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                info = f"Assigned {assigned:,} students."
+                if unplaced:
+                    info += f"\n{len(unplaced):,} students could not be placed (no free beds)."
+                messagebox.showinfo("Auto Allocate", info)
+                show_occupancy()
+
+            run_task('rooms', auto_allocate, (), on_done)
+
+        ttk.Button(room_form,
+                   text="Add Room",
+                   command=save_room).grid(row=1, column=3, columnspan=2, pady=4)
+        ttk.Button(room_form,
+                   text="Auto Allocate",
+                   command=allocate_rooms).grid(row=1, column=5, pady=4)
+
+        # Occupancy per hostel
+        occupancy_columns = ("Hostel", "Rooms", "Beds", "Occupied", "Free")
+        occupancy_tree = ttk.Treeview(rooms_frame, columns=occupancy_columns, show='headings', height=5)
+        for col in occupancy_columns:
+            occupancy_tree.heading(col, text=col)
+            occupancy_tree.column(col, width=60, anchor='e')
+        occupancy_tree.pack(fill='both', expand=True, padx=4, pady=4)
+
+        def show_occupancy():
+            """
+            Refreshes the occupancy table in the background.
+            """
+            def on_loaded(future):
+                occupancy_tree.delete(*occupancy_tree.get_children())
+                for r in future.result():
+                    occupancy_tree.insert('', 'end', values=(
+                        r['hostel'], f"{r['rooms']:,}", f"{r['capacity']:,}",
+                        f"{r['occupied']:,}", f"{r['free']:,}"))
+
+            run_task('rooms', occupancy_report, (), on_loaded)
+
+        show_occupancy()
+
+    make_tab("Hostel Details", build_hostel_tab)
+
+    # ----- View Faculty Tab -----
+    def build_view_faculty_tab(view_faculty_tab):
+        vf_frame = ttk.LabelFrame(view_faculty_tab, text="Faculty List")
+        vf_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        def faculty_row(fid):
+            f = database['faculty'][fid]
+            load = faculty_load[fid]
+            return (fid, f.name, f"{load} / {f.max_load}",
+                    "Over-assigned" if load > f.max_load else "",
+                    ", ".join(f.qualified) or "Any")
+
+        # Virtualized list to display faculty entries with their weekly hours
+        faculty_view = PagedList(vf_frame, ("ID", "Name", "Hours", "Status", "Qualified"),
+                                 faculty_row)
+
+        @ui_handler
+        def refresh_faculty_list():
+            """
+            Reloads the faculty list view with current faculty data.
+            Only the visible rows are drawn.
+            """
+            run_task('faculty', list_faculty, (),
+                     lambda future: faculty_view.set_keys(future.result()))
+
+        # Button to refresh faculty list display
+        ttk.Button(vf_frame,
+                   text="Refresh",
+                   command=refresh_faculty_list).pack(pady=5)
+        listeners['faculty_added'].append(faculty_view.append)
+        listeners['workload_changed'].append(faculty_view.render)
+        refresh_faculty_list()
+
+    make_tab("View Faculty", build_view_faculty_tab)
+
+    # ----- Teaching Tab -----
+    def build_teaching_tab(teaching_tab):
+        teach_frame = ttk.LabelFrame(teaching_tab, text="Sections and Teaching Assignments")
+        teach_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        # Row 1: add a section of a course
+        teach_top = tk.Frame(teach_frame, bg=BG_COLOR)
+        teach_top.pack(fill='x', padx=8, pady=4)
+        teach_course = tk.StringVar()
+        teach_hours = tk.StringVar(value="3")
+        ttk.Label(teach_top, text="Course:").pack(side='left')
+        ttk.Combobox(teach_top,
+                     textvariable=teach_course,
+                     values=list(database['courses'].keys()),
+                     state="readonly",
+                     width=10).pack(side='left', padx=4)
+        ttk.Label(teach_top, text="Hours/Week:").pack(side='left')
+        ttk.Entry(teach_top, textvariable=teach_hours, width=5).pack(side='left', padx=4)
+
+        # Row 2: assign the selected section, or the course, to a faculty member
+        teach_assign = tk.Frame(teach_frame, bg=BG_COLOR)
+        teach_assign.pack(fill='x', padx=8, pady=4)
+        teach_faculty = tk.StringVar()
+        ttk.Label(teach_assign, text="Faculty ID:").pack(side='left')
+        ttk.Entry(teach_assign, textvariable=teach_faculty, width=10).pack(side='left', padx=4)
+        teach_rebalance = tk.BooleanVar()
+
+        def section_row(section):
+            sec = database['sections'][section]
+            return (section, sec['course'], sec['hours'], sec['faculty'] or "")
+
+        # Virtualized list of sections
+        section_view = PagedList(teach_frame, ("Section", "Course", "Hours", "Faculty"),
+                                 section_row, height=6)
+
+        @ui_handler
+        def refresh_sections():
+            """
+            Reloads the section list.
+            """
+            run_task('sections', list_sections, (),
+                     lambda future: section_view.set_keys(future.result()))
+
+        def show_result(message):
+            # Callback maker for the assignment buttons
+            def on_done(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                section_view.render()
+                notify('workload_changed')
+                if message:
+                    messagebox.showinfo("Saved", message)
+            return on_done
+
+        @ui_handler
+        def save_section():
+            """
+            Handler for "Add Section" button.
+            """
+            def on_saved(future):
+                try:
+                    section = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                section_view.append(section)
+                notify('section_added', section)
+
+            run_task('sections', add_section, (teach_course.get(), teach_hours.get().strip()),
+                     on_saved)
+
+        @ui_handler
+        def save_assignment():
+            """
+            Handler for "Assign Section" button: gives the selected section to
+            the faculty member (blank Faculty ID unassigns it).
+            """
+            section = section_view.selected()
+            if section is None:
+                messagebox.showerror("Error", "Select a section.")
+                return
+            run_task('sections', assign_section, (section, teach_faculty.get().strip()),
+                     show_result(""))
+
+        @ui_handler
+        def save_course_lead():
+            """
+            Handler for "Make Course Lead" button.
+            """
+            cid = teach_course.get()
+            fid = teach_faculty.get().strip()
+            run_task('sections', assign_course, (cid, fid),
+                     show_result(f"{fid or 'Nobody'} now leads {cid}."))
+
+        @ui_handler
+        def balance_workload():
+            """
+            Handler for "Auto Assign" button.
+            Spreads unassigned sections (or all, with Rebalance) across
+            qualified faculty by load.
+            """
+            def on_done(future):
+                try:
+                    result = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                section_view.render()
+                notify('workload_changed')
+                info = f"Assigned {result['assigned']:,} sections."
+                if result['unassigned']:
+                    info += (f"\n{len(result['unassigned']):,} sections have no qualified "
+                             f"faculty with hours left.")
+                if result['overloaded']:
+                    info += f"\nOver-assigned: {', '.join(result['overloaded'])}"
+                messagebox.showinfo("Auto Assign", info)
+
+            run_task('sections', auto_assign_sections, (teach_rebalance.get(),), on_done)
+
+        ttk.Button(teach_top,
+                   text="Add Section",
+                   command=save_section).pack(side='left', padx=4)
+        for text, command in (("Assign Section", save_assignment),
+                              ("Make Course Lead", save_course_lead),
+                              ("Auto Assign", balance_workload)):
+            ttk.Button(teach_assign, text=text, command=command).pack(side='left', padx=4)
+        ttk.Checkbutton(teach_assign, text="Rebalance all",
+                        variable=teach_rebalance).pack(side='left', padx=4)
+        refresh_sections()
+
+    make_tab("Teaching", build_teaching_tab)
+
+    # ----- Timetable Tab -----
+    def build_timetable_tab(timetable_tab):
+        tt_frame = ttk.LabelFrame(timetable_tab, text="Rooms and Time Slots")
+        tt_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        # Row 1: teaching rooms and the planner
+        tt_top = tk.Frame(tt_frame, bg=BG_COLOR)
+        tt_top.pack(fill='x', padx=8, pady=4)
+        tt_new_room = tk.StringVar()
+        tt_capacity = tk.StringVar(value="60")
+        tt_rebuild = tk.BooleanVar()
+        ttk.Label(tt_top, text="Classroom:").pack(side='left')
+        ttk.Entry(tt_top, textvariable=tt_new_room, width=10).pack(side='left', padx=4)
+        ttk.Label(tt_top, text="Seats:").pack(side='left')
+        ttk.Entry(tt_top, textvariable=tt_capacity, width=5).pack(side='left', padx=4)
+
+        # Row 2: place the selected section by hand
+        tt_place = tk.Frame(tt_frame, bg=BG_COLOR)
+        tt_place.pack(fill='x', padx=8, pady=4)
+        tt_room = tk.StringVar()
+        tt_day = tk.StringVar(value=DAYS[0])
+        tt_hour = tk.StringVar(value=str(DAY_START))
+        ttk.Label(tt_place, text="Room:").pack(side='left')
+        ttk.Entry(tt_place, textvariable=tt_room, width=10).pack(side='left', padx=4)
+        ttk.Combobox(tt_place, textvariable=tt_day, values=DAYS,
+                     state="readonly", width=5).pack(side='left', padx=4)
+        ttk.Combobox(tt_place, textvariable=tt_hour,
+                     values=[str(DAY_START + h) for h in range(SLOTS_PER_DAY)],
+                     state="readonly", width=4).pack(side='left', padx=4)
+        tt_status = ttk.Label(tt_place, text="")
+
+        def timetable_row(section):
+            entry = timetable_entry(section)
+            return (section, entry['course'], entry['faculty'] or "",
+                    entry['room'] or "", entry['time'] or "Unscheduled")
+
+        # Virtualized list of sections by start time
+        timetable_view = PagedList(tt_frame, ("Section", "Course", "Faculty", "Room", "Time"),
+                                   timetable_row, height=6)
+
+        @ui_handler
+        def refresh_timetable():
+            """
+            Reloads the timetable and counts sections breaking a hard constraint.
+            """
+            def on_done(future):
+                problems = future.result()
+                tt_status.config(text=f"{len(problems):,} conflicts" if problems else "No conflicts")
+
+            run_task('timetable', list_timetable, (),
+                     lambda future: timetable_view.set_keys(future.result()))
+            run_task('timetable', timetable_problems, (), on_done)
+
+        def show_result(future):
+            # Callback for the classroom and scheduling buttons
+            try:
+                future.result()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            refresh_timetable()
+
+        @ui_handler
+        def save_classroom():
+            """
+            Handler for "Add Classroom" button.
+            """
+            run_task('timetable', add_classroom,
+                     (tt_new_room.get().strip(), tt_capacity.get().strip()), show_result)
+
+        @ui_handler
+        def save_schedule():
+            """
+            Handler for "Schedule Section" button: puts the selected section in
+            the room at the chosen day and hour (blank Room unschedules it).
+            """
+            section = timetable_view.selected()
+            if section is None:
+                messagebox.showerror("Error", "Select a section.")
+                return
+            run_task('timetable', schedule_section,
+                     (section, tt_room.get().strip(), tt_day.get(), tt_hour.get()), show_result)
+
+        @ui_handler
+        def run_planner():
+            """
+            Handler for "Plan Timetable" button.
+            Places unscheduled and conflicting sections around the rest, or
+            every section with Re-plan all.
+            """
+            def on_done(future):
+                try:
+                    result = future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                refresh_timetable()
+                info = (f"Placed {result['placed']:,} sections ({result['moved']:,} changed, "
+                        f"{result['kept']:,} kept).\nPreference penalty: {result['penalty']:,}")
+                if result['unplaced']:
+                    info += f"\n{len(result['unplaced']):,} sections did not fit."
+                messagebox.showinfo("Plan Timetable", info)
+
+            run_task('timetable', plan_timetable, (tt_rebuild.get(),), on_done)
+
+        ttk.Button(tt_top, text="Add Classroom", command=save_classroom).pack(side='left', padx=4)
+        ttk.Button(tt_top, text="Plan Timetable", command=run_planner).pack(side='left', padx=4)
+        ttk.Checkbutton(tt_top, text="Re-plan all", variable=tt_rebuild).pack(side='left', padx=4)
+        ttk.Button(tt_place, text="Schedule Section", command=save_schedule).pack(side='left', padx=4)
+        tt_status.pack(side='left', padx=8)
+        listeners['section_added'].append(timetable_view.append)
+        listeners['workload_changed'].append(timetable_view.render)
+        refresh_timetable()
+
+    make_tab("Timetable", build_timetable_tab)
+
+    # ----- View Students Tab -----
+    def build_view_students_tab(view_students_tab):
+        vs_frame = ttk.LabelFrame(view_students_tab, text="Student List")
+        vs_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        # Search box: exact email, exact phone, or name prefix
+        search_frame = tk.Frame(vs_frame, bg=BG_COLOR)
+        search_frame.pack(fill='x', padx=8, pady=4)
+        student_search = tk.StringVar()
+        ttk.Label(search_frame, text="Search:").pack(side='left')
+        search_entry = ttk.Entry(search_frame, textvariable=student_search, width=30)
+        search_entry.pack(side='left', padx=8)
+
+        @ui_handler
+        def search_student_list(e=None):
+            """
+            Handler for "Search" button: shows students matching the search text
+            using the secondary indexes.
+            """
+            text = student_search.get().strip()
+            if text:
+                run_task('students', search_students, (text,),
+                         lambda future: student_view.set_keys(future.result()))
+            else:
+                refresh_student_list()
+
+        search_entry.bind("<Return>", search_student_list)
+        ttk.Button(search_frame,
+                   text="Search",
+                   command=search_student_list).pack(side='left')
+
+        # Virtualized list to display student entries
+        student_view = PagedList(vs_frame, ("ID", "Name"),
+                                 lambda sid: (sid, database['students'][sid].name))
+
+        @ui_handler
+        def refresh_student_list():
+            """
+            Reloads the student list view with current student data.
+            Only the visible rows are drawn.
+            """
+            student_search.set("")
+            run_task('students', list_students, (),
+                     lambda future: student_view.set_keys(future.result()))
+
+        # Button to refresh student list display
+        ttk.Button(vs_frame,
+                   text="Refresh",
+                   command=refresh_student_list).pack(pady=5)
+        listeners['student_added'].append(student_view.append)
+        listeners['students_imported'].append(refresh_student_list)
+        refresh_student_list()
+
+    make_tab("View Students", build_view_students_tab)
+
+    # ----- Search Tab -----
+    def build_search_tab(search_tab):
+        fs_frame = ttk.LabelFrame(search_tab, text="Find Students, Faculty and Enquiries")
+        fs_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        # Search box: part of a name, email or enquiry text, typos allowed
+        fs_top = tk.Frame(fs_frame, bg=BG_COLOR)
+        fs_top.pack(fill='x', padx=8, pady=4)
+        fs_text = tk.StringVar()
+        fs_kind = tk.StringVar(value="All")
+        fs_kinds = {"All": SEARCH_KINDS, "Students": ('student',),
+                    "Faculty": ('faculty',), "Enquiries": ('enquiry',)}
+        ttk.Label(fs_top, text="Search:").pack(side='left')
+        fs_entry = ttk.Entry(fs_top, textvariable=fs_text, width=40)
+        fs_entry.pack(side='left', padx=8)
+        fs_combo = ttk.Combobox(fs_top, textvariable=fs_kind, values=list(fs_kinds),
+                                state="readonly", width=10)
+        fs_combo.pack(side='left', padx=4)
+        fs_status = ttk.Label(fs_top, text="Building search index...")
+        fs_status.pack(side='left', padx=8)
+
+        # Results are shown as (type, ID, label, score) rows
+        result_view = PagedList(fs_frame, ("Type", "ID", "Match", "Score"), lambda row: row)
+        pending_search = [None]  # Tk after() ID of the search waiting to run
+        latest = [0]             # number of the latest search started
+
+        def run_search():
+            pending_search[0] = None
+            text = fs_text.get().strip()
+            if not text:
+                result_view.set_keys([])
+                fs_status.config(text="")
+                return
+            latest[0] += 1
+            number = latest[0]
+
+            def on_done(future):
+                # A slower, older search must not replace newer results
+                if number != latest[0]:
+                    return
+                found = future.result()
+                result_view.set_keys([(r['kind'].title(), r['id'], r['label'], f"{r['score']:.2f}")
+                                      for r in found])
+                fs_status.config(text=f"{len(found)} matches" if found else "No matches")
+
+            run_task('search', fuzzy_search, (text, fs_kinds[fs_kind.get()]), on_done)
+
+        @ui_handler
+        def search_as_you_type(e=None):
+            """
+            Handler for typing in the search box: searches once typing pauses
+            for FUZZY_DEBOUNCE ms rather than on every key.
+            """
+            if pending_search[0] is not None:
+                root.after_cancel(pending_search[0])
+            pending_search[0] = root.after(FUZZY_DEBOUNCE, run_search)
+
+        fs_entry.bind("<KeyRelease>", search_as_you_type)
+        fs_combo.bind("<<ComboboxSelected>>", search_as_you_type)
+        # Build the index on the search worker before the first query needs it
+        run_task('search', ensure_search_index, (),
+                 lambda future: fs_status.config(text=""))
+
+    make_tab("Search", build_search_tab)
+
+    # ----- Course Rosters Tab -----
+    def build_roster_tab(roster_tab):
+        roster_frame = ttk.LabelFrame(roster_tab, text="Course Roster")
+        roster_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        roster_top = tk.Frame(roster_frame, bg=BG_COLOR)
+        roster_top.pack(fill='x', padx=8, pady=4)
+        roster_course = tk.StringVar()
+        ttk.Label(roster_top, text="Course:").pack(side='left')
+        roster_cb = ttk.Combobox(roster_top,
+                                 textvariable=roster_course,
+                                 values=list(database['courses'].keys()),
+                                 state="readonly",
+                                 width=15)
+        roster_cb.pack(side='left', padx=8)
+        roster_count = ttk.Label(roster_top, text="")
+        roster_count.pack(side='left', padx=8)
+        # Seat limit of the selected course (blank = no limit)
+        roster_capacity = tk.StringVar()
+        ttk.Label(roster_top, text="Seat limit:").pack(side='left')
+        ttk.Entry(roster_top, textvariable=roster_capacity, width=6).pack(side='left', padx=4)
+
+        # Prerequisites of the selected course (comma-separated course IDs)
+        prereq_row = tk.Frame(roster_frame, bg=BG_COLOR)
+        prereq_row.pack(fill='x', padx=8, pady=2)
+        roster_prereqs = tk.StringVar()
+        ttk.Label(prereq_row, text="Prerequisites:").pack(side='left')
+        ttk.Entry(prereq_row, textvariable=roster_prereqs, width=25).pack(side='left', padx=8)
+
+        # Virtualized list of students enrolled in the selected course
+        roster_view = PagedList(roster_frame, ("ID", "Name"),
+                                lambda sid: (sid, database['students'][sid].name))
+
+        def update_roster_count():
+            course = database['courses'][roster_course.get()]
+            text = f"Enrolled: {len(course['students']):,}"
+            if course.get('capacity'):
+                text += f" / {course['capacity']:,}"
+            roster_count.config(text=text)
+
+        @ui_handler
+        def show_roster(e=None):
+            """
+            Shows the students enrolled in the selected course.
+            """
+            cid = roster_course.get()
+
+            def on_loaded(future):
+                roster_view.set_keys(future.result())
+                update_roster_count()
+
+            if cid in database['courses']:
+                roster_prereqs.set(", ".join(database['courses'][cid]['prereq']))
+                roster_capacity.set(database['courses'][cid].get('capacity') or "")
+                run_task(cid, course_roster, (cid,), on_loaded)
+
+        roster_cb.bind("<<ComboboxSelected>>", show_roster)
+
+        def roster_enrolled(sid, cid):
+            if roster_course.get() == cid:
+                roster_view.append(sid)
+                update_roster_count()
+
+        def roster_unenrolled(sid, cid):
+            if roster_course.get() == cid:
+                show_roster()
+
+        listeners['enrolled'].append(roster_enrolled)
+        listeners['unenrolled'].append(roster_unenrolled)
+
+        @ui_handler
+        def save_prereqs():
+            """
+            Handler for "Save Prerequisites" button.
+            Rejects unknown courses and cycles.
+            """
+            cid = roster_course.get()
+            prereqs = [p.strip().upper() for p in roster_prereqs.get().split(',')]
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Saved", f"Prerequisites for {cid} saved.")
+
+            run_task('courses', set_prereqs, (cid, prereqs), on_saved)
+
+        @ui_handler
+        def save_capacity():
+            """
+            Handler for "Set Limit" button.
+            """
+            cid = roster_course.get()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                update_roster_count()
+
+            run_task('courses', set_course_capacity, (cid, roster_capacity.get().strip()), on_saved)
+
+        @ui_handler
+        def export_eligible():
+            """
+            Handler for "Eligibility Report" button.
+            Writes every student's eligible courses to a CSV file in the background.
+            """
+            path = filedialog.asksaveasfilename(title="Export Eligible Courses",
+                                                defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")])
+            if not path:
+                return
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except OSError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Export", f"Eligible courses saved to:\n{path}")
+
+            run_task('courses', export_eligibility, (path,), on_saved)
+
+        ttk.Button(roster_top,
+                   text="Set Limit",
+                   command=save_capacity).pack(side='left', padx=4)
+        ttk.Button(prereq_row,
+                   text="Save Prerequisites",
+                   command=save_prereqs).pack(side='left', padx=4)
+        ttk.Button(prereq_row,
+                   text="Eligibility Report",
+                   command=export_eligible).pack(side='left', padx=4)
+
+    make_tab("Course Rosters", build_roster_tab)
+
+    # ----- Reports Tab -----
+    def build_reports_tab(reports_tab):
+        payment_frame = ttk.LabelFrame(reports_tab, text="Record Fee Payment")
+        payment_frame.pack(padx=5, pady=5, fill='x')
+
+        # Variables for payment input fields
+        pay_student_id = tk.StringVar()
+        pay_course_id = tk.StringVar()
+        pay_amount = tk.StringVar()
+        for i, (lbl, var) in enumerate([("Student ID", pay_student_id),
+                                         ("Course ID", pay_course_id),
+                                         ("Amount (INR)", pay_amount)]):
+            ttk.Label(payment_frame, text=lbl + ":").grid(row=0, column=2 * i, sticky='w', padx=8, pady=4)
+            ttk.Entry(payment_frame, textvariable=var, width=12).grid(row=0, column=2 * i + 1, padx=4, pady=4)
+
+        @ui_handler
+        def save_payment():
+            """
+            Handler for "Record Payment" button.
+            Adds a payment to the student's fee ledger row for the course.
+            """
+            sid = pay_student_id.get().strip()
+            cid = pay_course_id.get().strip().upper()
+            amount = pay_amount.get().strip()
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except ValueError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Saved", "Payment recorded.")
+                pay_student_id.set("")
+                pay_course_id.set("")
+                pay_amount.set("")
+
+            run_task(sid, record_payment, (sid, cid, amount), on_saved)
+
+        ttk.Button(payment_frame,
+                   text="Record Payment",
+                   command=save_payment).grid(row=1, columnspan=6, pady=6)
+
+        report_frame = ttk.LabelFrame(reports_tab, text="Fee Collection by Course")
+        report_frame.pack(padx=5, pady=5, fill='both', expand=True)
+        report_columns = ("Course", "Enrolled", "Due", "Paid", "Outstanding", "With Dues", "Collected")
+        report_tree = ttk.Treeview(report_frame, columns=report_columns, show='headings', height=7)
+        for col in report_columns:
+            report_tree.heading(col, text=col)
+            report_tree.column(col, width=85, anchor='e')
+        report_tree.pack(fill='both', expand=True, padx=8, pady=4)
+
+        @ui_handler
+        def show_fee_report():
+            """
+            Handler for "Generate Report" button.
+            Totals the fee ledger in the background and fills the report table.
+            """
+            def on_loaded(future):
+                report_tree.delete(*report_tree.get_children())
+                for r in future.result():
+                    report_tree.insert('', 'end', values=(
+                        r['course'], f"{r['enrollments']:,}", f"{r['due']:,}", f"{r['paid']:,}",
+                        f"{r['outstanding']:,}", f"{r['with_dues']:,}", f"{r['rate']:.1%}"))
+
+            run_task('reports', fee_report, (), on_loaded)
+
+        @ui_handler
+        def export_report():
+            """
+            Handler for "Export CSV" button.
+            Writes the fee report to a CSV file chosen by the user.
+            """
+            path = filedialog.asksaveasfilename(title="Export Fee Report",
+                                                defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")])
+            if not path:
+                return
+
+            def on_saved(future):
+                try:
+                    future.result()
+                except OSError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                messagebox.showinfo("Export", f"Report saved to:\n{path}")
+
+            run_task('reports', export_fee_report, (path,), on_saved)
+
+        @ui_handler
+        def export_data():
+            """
+            Handler for "Export Data" button.
+            Streams every table to a folder chosen by the user, in the background.
+            """
+            directory = filedialog.askdirectory(title="Export Data To")
+            if not directory:
+                return
+
+            def on_saved(future):
+                try:
+                    result = future.result()
+                except OSError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
+                info = "\n".join(f"{rows:,} rows: {path}" for path, rows in result['files'].values())
+                if result['format'] != export_format.get():
+                    info = f"pyarrow is not installed, saved as {result['format']}.\n" + info
+                messagebox.showinfo("Export", info)
+
+            run_task('reports', export_database, (directory, export_format.get()), on_saved)
+
+        report_buttons = tk.Frame(report_frame, bg=BG_COLOR)
+        report_buttons.pack(pady=5)
+        ttk.Button(report_buttons,
+                   text="Generate Report",
+                   command=show_fee_report).pack(side='left', padx=4)
+        ttk.Button(report_buttons,
+                   text="Export CSV",
+                   command=export_report).pack(side='left', padx=4)
+        export_format = tk.StringVar(value='csv')
+        ttk.Combobox(report_buttons,
+                     textvariable=export_format,
+                     values=('csv', 'jsonl', 'parquet'),
+                     state="readonly",
+                     width=8).pack(side='left', padx=(16, 4))
+        ttk.Button(report_buttons,
+                   text="Export Data...",
+                   command=export_data).pack(side='left', padx=4)
+
+    make_tab("Reports", build_reports_tab)
+
+    # ----- Diagnostics Tab -----
+    def build_diagnostics_tab(diagnostics_tab):
+        diag_frame = ttk.LabelFrame(diagnostics_tab, text="Handler and Task Latency")
+        diag_frame.pack(padx=5, pady=5, fill='both', expand=True)
+
+        diag_top = tk.Frame(diag_frame, bg=BG_COLOR)
+        diag_top.pack(fill='x', padx=8, pady=4)
+        stall_label = ttk.Label(diag_top, text="")
+        stall_label.pack(side='left')
+        profile_label = ttk.Label(diag_top, text="Profiling: on" if profilers is not None
+                                  else "Profiling: off (start with --profile DIR)")
+        profile_label.pack(side='right')
+
+        # Rows are metric_rows() tuples, slowest p99 first
+        metric_view = PagedList(diag_frame, ("Kind", "Name", "Calls", "Mean ms", "p50 ms",
+                                             "p99 ms", "Max ms"),
+                                lambda r: r[:3] + tuple(f"{ms:.2f}" for ms in r[3:]))
+
+        @ui_handler
+        def refresh_metrics():
+            """
+            Handler for "Refresh" button: reloads the latency table.
+            Only the Tk thread records metrics, so reading them here is safe.
+            """
+            metric_view.set_keys(metric_rows())
+            stall_label.config(text=f"Tk stalls over {STALL_THRESHOLD * 1e3:.0f} ms: "
+                                    f"{stall_metrics.count:,}, longest "
+                                    f"{stall_metrics.max * 1e3:.0f} ms")
+
+        @ui_handler
+        def export_metrics():
+            """
+            Handler for "Export Metrics" button.
+            Writes the histograms in the Prometheus text format.
+            """
+            path = filedialog.asksaveasfilename(title="Export Metrics",
+                                                defaultextension=".prom",
+                                                filetypes=[("Prometheus text", "*.prom")])
+            if not path:
+                return
+            try:
+                write_metrics(path)
+            except OSError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            messagebox.showinfo("Export", f"Metrics saved to:\n{path}")
+
+        diag_buttons = tk.Frame(diag_frame, bg=BG_COLOR)
+        diag_buttons.pack(pady=4)
+        ttk.Button(diag_buttons, text="Refresh", command=refresh_metrics).pack(side='left', padx=4)
+        ttk.Button(diag_buttons, text="Export Metrics...",
+                   command=export_metrics).pack(side='left', padx=4)
+        refresh_metrics()
+
+    make_tab("Diagnostics", build_diagnostics_tab)
+
+    # Pack the tab control into content frame
+    tab_control.pack(expand=True, fill='both')
+
+    # ---------- FOOTER ----------
+    footer = tk.Frame(root, bg=BG_COLOR)
+    footer.pack(fill='x', padx=10, pady=4)
+    # Footer label on right
+    tk.Label(footer,
+             text="© NIET University Management System",
+             bg=BG_COLOR,
+             fg=PRIMARY_COLOR,
+             font=("Arial", 8)).pack(side='right')
+    # Logout button on left: destroys main window and re-shows login
+    tk.Button(footer,
+              text="Logout",
+              command=lambda: [root.destroy(), show_login()],
+              bg=PRIMARY_COLOR,
+              fg='white',
+              font=("Arial", 9, "bold")).pack(side='left')
+    # Busy indicator shown while background work is running
+    busy_label = tk.Label(footer, text="", bg=BG_COLOR, fg=PRIMARY_COLOR,
+                          font=("Arial", 8, "italic"))
+    busy_label.pack(side='left', padx=10)
+    tk.Label(footer,
+             text=f"Signed in as {user['id']} ({user['role']})",
+             bg=BG_COLOR,
+             fg='black',
+             font=("Arial", 8)).pack(side='right', padx=10)
+
+    # Handle finished background work; build the first tab now and note
+    # when the window first responds to input
+    poll_results()
+    watch_event_loop(root)
+    build_selected_tab()
+    root.after_idle(mark_startup, 'main window interactive')
+
+    # Start the Tkinter main loop for the main app window
+    root.mainloop()
+
+# --- Login Window ---
+def show_login():
+    """
+    Builds and displays the login window.
+    On successful login against the user store, launches main app.
+    """
+    global login_win
+    login_win = tk.Tk()
+    login_win.title("Login")
+    # Slightly smaller login window
+    login_win.geometry("280x180")
+    login_win.resizable(False, False)
+    login_win.configure(bg=BG_COLOR)
+
+    # Label and entry for Login ID
+    tk.Label(login_win,
+             text="Login ID:",
+             bg=BG_COLOR,
+             fg=PRIMARY_COLOR,
+             font=("Arial", 10, "bold")).pack(pady=5)
+    login_id_entry = tk.Entry(login_win)
+    login_id_entry.pack()
+
+    # Label and entry for Password
+    tk.Label(login_win,
+             text="Password:",
+             bg=BG_COLOR,
+             fg=PRIMARY_COLOR,
+             font=("Arial", 10, "bold")).pack(pady=5)
+    login_pass_entry = tk.Entry(login_win, show='*')
+    login_pass_entry.pack()
+
+    @ui_handler
+    def check_login(e=None):
+        """
+        Handler for Login button.
+        Checks credentials on a background thread (password hashing takes a
+        moment) and either launches main app or shows error.
+        """
+        # Enter in the password box still works while the button is disabled
+        if str(login_button['state']) == 'disabled':
+            return
+        uid = login_id_entry.get().strip()
+        pwd = login_pass_entry.get()
+        login_button.config(state='disabled')
+        # Filled in by the worker thread
+        state = {}
+
+        def worker():
+            try:
+                state['user'] = authenticate(uid, pwd)
+            except Exception as e:
+                # Any failure must reach poll, or the button stays disabled
+                state['error'] = e
+
+        def poll():
+            if not state:
+                login_win.after(50, poll)
+                return
+            login_button.config(state='normal')
+            if 'error' in state:
+                login_pass_entry.delete(0, tk.END)
+                messagebox.showerror("Login Failed", str(state['error']))
+            else:
+                launch_main_app(state['user'])
+
+        threading.Thread(target=worker, daemon=True).start()
+        poll()
+
+    # Login button (Enter in the password box works too)
+    login_button = tk.Button(login_win,
+                             text="Login",
+                             command=check_login,
+                             bg=PRIMARY_COLOR,
+                             fg='white')
+    login_button.pack(pady=10)
+    login_pass_entry.bind("<Return>", check_login)
+
+    def login_shown():
+        # Load saved data once the login window is up, while the user types
+        mark_startup('login window interactive')
+        preload_storage()
+
+    login_win.after_idle(login_shown)
+
+    # Start Tkinter loop for login window
+    login_win.mainloop()
+
+# --- Benchmarks ---
+
+def bench_storage(count=200000):
+    """
+    Builds a snapshot of `count` students in a temporary folder, then reports
+    cold-start load time and per-write latency of the write-ahead log.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        open_storage(tmp)
+        for i in range(count):
+            apply_change({'op': 'add_student', 'sid': f"S{i}", 'name': f"Student {i}",
+                          'email': f"s{i}@niet.ac.in", 'phone': f"9{i:09d}",
+                          'course': 'BTECH'})
+        ums_core.storage.compact(snapshot_tables())
+        close_storage()
+        clear_database()
+
+        start = time.perf_counter()
+        open_storage(tmp)
+        load_time = time.perf_counter() - start
+
+        writes = 2000
+        start = time.perf_counter()
+        for i in range(writes):
+            commit({'op': 'add_student', 'sid': f"N{i}", 'name': f"New {i}",
+                    'email': f"n{i}@niet.ac.in", 'phone': f"8{i:09d}",
+                    'course': 'BCA'})
+        write_time = time.perf_counter() - start
+        ums_core.storage.close()
+        ums_core.storage = None
+    print(f"Loaded {count:,} students in {load_time:.3f} s")
+    print(f"Write latency: {write_time / writes * 1e6:.1f} us per student")
+
+def contention_desk(db_path, data_dir, desk, requests, students):
+    """
+    One simulated desk of bench_contention, run in its own process. Half
+    its requests add a student with an ID other desks may also pick, half
+    enroll a random student in a random course. Returns its counts.
+    """
+    import random
+    rng = random.Random(desk)
+    # A forked copy of the parent's connections must not be used
+    ums_core.storage = None
+    clear_database()
+    write_stats.clear()
+    open_storage(data_dir, db_path)
+    courses = list(course_fee_map)
+    added = refused = 0
+    start = time.perf_counter()
+    for i in range(requests):
+        # As the GUI does before each task
+        sync_storage()
+        n = rng.randrange(students)
+        try:
+            if i % 2:
+                enroll(f"S{n}", rng.choice(courses))
+            else:
+                add_student(f"S{n}", f"Student {n}", f"s{n}@niet.ac.in", f"9{n:09d}",
+                            rng.choice(courses))
+                added += 1
+        except ValueError:
+            refused += 1
+    elapsed = time.perf_counter() - start
+    ums_core.storage.close()
+    ums_core.storage = None
+    close_storage()
+    return {'commits': write_stats['commits'], 'conflicts': write_stats['conflicts'],
+            'added': added, 'refused': refused, 'time': elapsed}
+
+def bench_contention(count=8000, clients=8):
+    """
+    Runs `clients` desks as separate processes against one shared SQLite
+    database, making `count` requests between them over a small pool of
+    student IDs and courses with seat limits. Reports commits/sec and the
+    share of commits refused for a conflict, then checks that no student
+    was saved twice and no course holds more students than its limit.
+    """
+    import multiprocessing
+    students = count // 4
+    clear_database()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "shared.db")
+        open_storage(tmp, db_path)
+        for cid in course_fee_map:
+            set_course_capacity(cid, students // 4)
+        close_storage()
+        clear_database()
+
+        desks = [(db_path, os.path.join(tmp, f"desk{i}"), i, count // clients, students)
+                 for i in range(clients)]
+        start = time.perf_counter()
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.starmap(contention_desk, desks)
+        elapsed = time.perf_counter() - start
+
+        open_storage(tmp, db_path)
+        saved = len(database['students'])
+        over = [cid for cid, course in database['courses'].items()
+                if len(course['students']) > course['capacity']]
+        ums_core.storage.close()
+        ums_core.storage = None
+        close_storage()
+    clear_database()
+    total = Counter()
+    for result in results:
+        total.update(result)
+    attempts = total['commits'] + total['conflicts']
+    print(f"{clients} desks, {count:,} requests in {elapsed:.2f} s: "
+          f"{total['commits'] / elapsed:,.0f} commits/sec")
+    print(f"Conflicts: {total['conflicts']:,} of {attempts:,} commit attempts "
+          f"({total['conflicts'] / attempts:.1%}), retried; "
+          f"{total['refused']:,} requests refused (ID taken, course full...)")
+    print(f"Students saved: {saved:,} ({total['added']:,} adds succeeded); "
+          f"courses over their limit: {', '.join(over) or 'none'}")
+
+def bench_dashboard(count=1000000):
+    """
+    Reports the time to read the Dashboard figures with count // 100 and then
+    `count` students, each in a hostel bed, plus one enquiry per ten
+    students, and the time of the full recount that checks the counters.
+    """
+    today = datetime.date.today().isoformat()
+    for size in (count // 100, count):
+        clear_database()
+        enquiries.clear()
+        enquiry_counts['open'] = 0
+        enquiry_days.clear()
+        for r in range(size // 4):
+            apply_change({'op': 'add_room', 'hostel': "H", 'room': str(r), 'capacity': 4})
+        for i in range(size):
+            database['students'][f"S{i}"] = Student(f"Student {i}", f"s{i}@niet.ac.in",
+                                                    f"9{i:09d}", ('BTECH',))
+            apply_change({'op': 'set_hostel', 'sid': f"S{i}", 'hostel_name': "H",
+                          'room_no': str(i // 4)})
+        for i in range(size // 10):
+            apply_enquiry({'op': 'enquiry', 'id': f"E{i}", 'time': f"{today}T09:00:00",
+                           'name': "N", 'email': "e@x", 'query': "Q"})
+        reads = 10000
+        start = time.perf_counter()
+        for _ in range(reads):
+            totals = dashboard_totals()
+        elapsed = time.perf_counter() - start
+        print(f"{size:>9,} students: figures read in {elapsed / reads * 1e6:.1f} us "
+              f"({totals['occupied']:,} of {totals['beds']:,} beds, "
+              f"{totals['enquiries_today']:,} enquiries today)")
+    start = time.perf_counter()
+    drifted = check_counters()
+    print(f"Full recount: {time.perf_counter() - start:.3f} s; "
+          f"counters corrected: {', '.join(drifted) or 'none'}")
+    clear_database()
+    enquiries.clear()
+    enquiry_counts['open'] = 0
+    enquiry_days.clear()
+
+def bench_metrics(count=1000000):
+    """
+    Reports the overhead per call of the latency metrics on a GUI handler,
+    and of a background task with profiling off and on.
+    """
+    def handler():
+        pass
+
+    for label, func in (("plain call", handler), ("with ui_handler", ui_handler(handler))):
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        print(f"{label:24s}: {(time.perf_counter() - start) / count * 1e9:6.0f} ns per call")
+    del handler_metrics['handler']
+    tasks = count // 10
+    for label in ("task, profiling off", "task, profiling on"):
+        if label.endswith("on"):
+            start_profiling()
+        start = time.perf_counter()
+        for _ in range(tasks):
+            when_loaded(handler, ())
+        elapsed = time.perf_counter() - start
+        if profilers is not None:
+            with tempfile.TemporaryDirectory() as tmp:
+                stop_profiling(tmp)
+        print(f"{label:24s}: {elapsed / tasks * 1e9:6.0f} ns per call")
+
+def bench_search(count=500000):
+    """
+    Loads `count` students into the indexes and reports average lookup time
+    for email, phone and name-prefix searches.
+    """
+    clear_database()
+    for i in range(count):
+        database['students'][f"S{i}"] = Student(f"Student {i:07d}", f"s{i}@niet.ac.in",
+                                                f"9{i:09d}", ('BTECH',))
+    rebuild_indexes()
+    queries = {
+        'email': [f"s{i}@niet.ac.in" for i in range(0, count, count // 1000)],
+        'phone': [f"9{i:09d}" for i in range(0, count, count // 1000)],
+        'name prefix': [f"student {i:05d}" for i in range(0, count // 100, count // 100000 or 1)][:1000],
+    }
+    for kind, texts in queries.items():
+        start = time.perf_counter()
+        for text in texts:
+            search_students(text)
+        elapsed = time.perf_counter() - start
+        print(f"{kind:12s}: {elapsed / len(texts) * 1e6:.1f} us per search")
+    clear_database()
+
+def bench_import(count=200000):
+    """
+    Writes a CSV of `count` students (1% invalid) and reports import rows/sec.
+    """
+    clear_database()
+    courses = list(course_fee_map)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "students.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            out = csv.writer(f)
+            out.writerow(["Student ID", "Name", "Email", "Phone", "Course"])
+            for i in range(count):
+                course = "NOPE" if i % 100 == 99 else courses[i % len(courses)]
+                out.writerow([f"S{i}", f"Student {i}", f"s{i}@niet.ac.in", f"9{i:09d}", course])
+        open_storage(os.path.join(tmp, "data"))
+        start = time.perf_counter()
+        stats = import_students(path)
+        elapsed = time.perf_counter() - start
+        ums_core.storage.close()
+        ums_core.storage = None
+    clear_database()
+    print(f"Imported {stats['imported']:,}, rejected {stats['rejected']:,} "
+          f"in {elapsed:.2f} s ({count / elapsed:,.0f} rows/sec)")
+
+def bench_http(count=20000, clients=8):
+    """
+    Serves the HTTP API on a free port with temporary storage and reports
+    requests/sec for `clients` concurrent keep-alive clients adding and then
+    reading `count` students, next to the same calls made in-process.
+    """
+    clear_database()
+    with tempfile.TemporaryDirectory() as tmp:
+        open_storage(tmp)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ApiHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+
+        def client(n, method, make_request):
+            conn = HTTPConnection("127.0.0.1", port)
+            for i in range(n, count, clients):
+                path, body = make_request(i)
+                conn.request(method, path, body=body and json.dumps(body),
+                             headers={'Content-Type': 'application/json'})
+                conn.getresponse().read()
+            conn.close()
+
+        def run(label, method, make_request):
+            threads = [threading.Thread(target=client, args=(n, method, make_request))
+                       for n in range(clients)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            print(f"HTTP {label:16s}: {count / elapsed:10,.0f} requests/sec")
+
+        run("add student", 'POST', lambda i: ('/students', {
+            'sid': f"S{i}", 'name': f"Student {i}", 'email': f"s{i}@niet.ac.in",
+            'phone': f"9{i:09d}", 'course': 'BTECH'}))
+        run("student details", 'GET', lambda i: (f'/students/S{i}', None))
+        server.shutdown()
+        server.server_close()
+
+        start = time.perf_counter()
+        for i in range(count):
+            add_student(f"N{i}", f"New {i}", f"n{i}@niet.ac.in", f"8{i:09d}", 'BCA')
+        elapsed = time.perf_counter() - start
+        print(f"In-process add student : {count / elapsed:10,.0f} calls/sec")
+        start = time.perf_counter()
+        for i in range(count):
+            student_details(f"N{i}")
+        elapsed = time.perf_counter() - start
+        print(f"In-process details     : {count / elapsed:10,.0f} calls/sec")
+        ums_core.storage.close()
+        ums_core.storage = None
+    clear_database()
+
+def bench_export(count=1000000):
+    """
+    Exports `count` students (each with one enrollment) in every format and
+    reports rows/sec, then the peak memory of a CSV export measured with
+    tracemalloc, which stays flat however many students there are.
+    """
+    import tracemalloc
+    clear_database()
+    courses = list(course_fee_map)
+    students = database['students']
+    for i in range(count):
+        sid, cid = f"S{i}", courses[i % len(courses)]
+        students[sid] = Student(f"Student {i:07d}", f"s{i}@niet.ac.in", f"9{i:09d}", (cid,))
+        add_ledger_row(sid, cid, course_fee_map[cid])
+    formats = ['csv', 'jsonl', 'parquet' if parquet_available() else 'columns']
+    tables = ['students', 'enrollments']
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            start = time.perf_counter()
+            result = export_database(tmp, fmt, tables)
+            elapsed = time.perf_counter() - start
+            rows = sum(rows for _, rows in result['files'].values())
+            size = sum(os.path.getsize(path) for path, _ in result['files'].values())
+            print(f"{fmt:8s}: {rows:,} rows in {elapsed:.2f} s ({rows / elapsed:,.0f} rows/s), "
+                  f"{size / 2 ** 20:.0f} MiB")
+        gc.collect()
+        tracemalloc.start()
+        export_database(tmp, 'csv', ['students'])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"Peak memory during a CSV export of {count:,} students: {peak / 2 ** 20:.1f} MiB")
+    clear_database()
+
+def bench_fees(count=1000000):
+    """
+    Fills the fee ledger with `count` enrollments (a third part-paid) and
+    reports the time to build the full fee report.
+    """
+    clear_database()
+    courses = list(course_fee_map)
+    for i in range(count):
+        cid = courses[i % len(courses)]
+        add_ledger_row(f"S{i}", cid, course_fee_map[cid])
+        if i % 3 == 0:
+            ledger['paid'][i] = course_fee_map[cid] // 2
+    start = time.perf_counter()
+    rows = fee_report()
+    elapsed = time.perf_counter() - start
+    try:
+        import numpy  # noqa: F401 (only reported)
+        engine = "NumPy"
+    except ImportError:
+        engine = "pure Python"
+    print(f"Fee report over {count:,} ledger rows in {elapsed:.3f} s ({engine})")
+    print(f"Outstanding: {rows[-1]['outstanding']:,} INR, collected {rows[-1]['rate']:.1%}")
+    clear_database()
+
+def bench_fuzzy(count=500000, queries=500):
+    """
+    Indexes `count` students with generated names and reports the index
+    build time, then the p50/p99 latency of misspelled name queries and how
+    often the student meant is among the top five results.
+    """
+    import random
+    rng = random.Random(1)
+    syllables = ["ka", "ri", "an", "sha", "ma", "de", "vi", "ra", "ya", "no", "su", "li",
+                 "pre", "ta", "ku", "mi", "ar", "jo", "ne", "ha", "ro", "sa", "bi", "el"]
+
+    def word():
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 3))).title()
+
+    clear_database()
+    first = [word() for _ in range(500)]
+    last = [word() for _ in range(2000)]
+    students = database['students']
+    for i in range(count):
+        name = f"{rng.choice(first)} {rng.choice(last)}"
+        students[f"S{i}"] = Student(name, f"{name.replace(' ', '.').lower()}{i}@niet.ac.in",
+                                    f"9{i:09d}", ('BTECH',))
+    start = time.perf_counter()
+    ensure_search_index()
+    print(f"Indexed {count:,} students in {time.perf_counter() - start:.2f} s")
+
+    def misspell(text):
+        # Drop or replace one letter inside a word
+        i = rng.choice([i for i in range(1, len(text) - 1) if text[i] != " "])
+        return text[:i] + text[i + 1:] if rng.random() < 0.5 else text[:i] + "x" + text[i + 1:]
+
+    latencies = []
+    found = 0
+    for _ in range(queries):
+        sid = f"S{rng.randrange(count)}"
+        start = time.perf_counter()
+        results = fuzzy_search(misspell(students[sid].name), ('student',), limit=5)
+        latencies.append(time.perf_counter() - start)
+        found += any(students[r['id']].name == students[sid].name for r in results)
+    latencies.sort()
+    print(f"Misspelled name queries: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms; "
+          f"name meant in top 5: {found / queries:.0%}")
+    clear_database()
+
+def bench_hostel(count=100000):
+    """
+    Creates beds for `count` students in 4-bed rooms (half kept for a course)
+    and reports the time to auto-allocate the whole intake in one pass.
+    """
+    clear_database()
+    courses = list(course_fee_map)
+    for i in range(count):
+        apply_change({'op': 'add_student', 'sid': f"S{i}", 'name': f"Student {i}",
+                      'email': f"s{i}@niet.ac.in", 'phone': f"9{i:09d}",
+                      'course': courses[i % len(courses)]})
+    for r in range(count // 4 + 1):
+        apply_change({'op': 'add_room', 'hostel': f"H{r % 20:02d}", 'room': f"{r:06d}",
+                      'capacity': 4, 'course': courses[r % len(courses)] if r % 2 else ''})
+    start = time.perf_counter()
+    assigned, unplaced = auto_allocate()
+    elapsed = time.perf_counter() - start
+    print(f"Allocated {assigned:,} students ({len(unplaced):,} unplaced) "
+          f"in {elapsed:.3f} s")
+    clear_database()
+
+def bench_enquiries(count=100000, clients=8):
+    """
+    Submits `count` enquiries from `clients` threads at once and reports
+    submissions/sec and how many fsyncs the batched writer needed.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        open_enquiry_queue(tmp)
+
+        def client(n):
+            for i in range(n, count, clients):
+                add_enquiry(f"Visitor {i}", f"v{i}@mail.com", "When does admission open?")
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        syncs = ums_core.enquiry_queue.syncs
+        close_enquiry_queue()
+        print(f"{count:,} enquiries in {elapsed:.2f} s ({count / elapsed:,.0f}/sec), "
+              f"{syncs:,} fsyncs while submitting")
+        open_enquiry_queue(tmp)
+        print(f"Reloaded {len(enquiries):,} enquiries, {enquiry_stats()['open']:,} open")
+        close_enquiry_queue()
+    enquiries.clear()
+    enquiry_counts['open'] = 0
+    enquiry_days.clear()
+
+def bench_prereq(count=100000, courses=2000):
+    """
+    Builds a catalog of `courses` courses with random prerequisites and
+    `count` students, then reports prerequisite compile time, single
+    eligibility-check time and the batch eligible-courses computation.
+    """
+    import random
+    rng = random.Random(1)
+    cohorts = 500
+    saved_courses = database['courses']
+    clear_database()
+    # Each course may require up to 3 earlier courses, so the graph is acyclic
+    database['courses'] = {
+        f"C{i:04d}": {'name': f"Course {i}", 'students': {}, 'faculty': None,
+                      'prereq': [f"C{j:04d}" for j in rng.sample(range(i), min(i, rng.randint(0, 3)))]}
+        for i in range(courses)}
+    start = time.perf_counter()
+    compile_prereqs()
+    print(f"Compiled {courses:,} courses in {time.perf_counter() - start:.3f} s")
+    # Students in the same programme and year take the same courses:
+    # each cohort has three entry-level courses
+    entry = [cid for cid, c in database['courses'].items() if not c['prereq']]
+    plans = [rng.sample(entry, 3) for _ in range(cohorts)]
+    for i in range(count):
+        sid = f"S{i}"
+        database['students'][sid] = Student(sid, '', '', plans[i % cohorts])
+    checks = min(10000, count)
+    start = time.perf_counter()
+    for i in range(checks):
+        missing_prereqs(database['students'][f"S{i}"].courses, f"C{i % courses:04d}")
+    print(f"Eligibility check: {(time.perf_counter() - start) / checks * 1e6:.1f} us")
+    start = time.perf_counter()
+    eligible = eligible_courses_for_all()
+    elapsed = time.perf_counter() - start
+    average = sum(map(len, eligible.values())) / len(eligible)
+    print(f"Eligible courses for {count:,} students in {cohorts} cohorts "
+          f"in {elapsed:.2f} s (average {average:.0f} each)")
+    database['courses'] = saved_courses
+    clear_database()
+
+def bench_login(count=20):
+    """
+    Reports login latency at the configured scrypt cost over `count`
+    logins, and how quickly a locked-out ID is refused.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        load_users(tmp)
+        set_user("bench", "secret", 'registrar')
+        times = []
+        for _ in range(count):
+            start = time.perf_counter()
+            authenticate("bench", "secret")
+            times.append(time.perf_counter() - start)
+        for _ in range(LOGIN_MAX_FAILURES):
+            try:
+                authenticate("bench", "wrong")
+            except ValueError:
+                pass
+        start = time.perf_counter()
+        try:
+            authenticate("bench", "secret")
+        except ValueError:
+            pass
+        locked_time = time.perf_counter() - start
+    users.clear()
+    ums_core.users_path = None
+    login_failures.clear()
+    times.sort()
+    print(f"scrypt N={SCRYPT_N}, r={SCRYPT_R}, p={SCRYPT_P} "
+          f"({128 * SCRYPT_N * SCRYPT_R // 2 ** 20} MiB per hash)")
+    print(f"Login latency over {count} logins: median {times[count // 2] * 1e3:.1f} ms, "
+          f"max {times[-1] * 1e3:.1f} ms")
+    print(f"Locked-out attempt refused in {locked_time * 1e6:.1f} us")
+
+def bench_memory(count=200000):
+    """
+    Measures memory per student with tracemalloc for the old layout (a
+    dict per student holding a dict of courses) and for Student records,
+    counting the ID, field strings and table entry in both. Then measures
+    the full cost of adding a student through apply_change, which also
+    fills the secondary indexes, the course roster and the fee ledger.
+    """
+    import tracemalloc
+
+    def as_dicts():
+        return {f"S{i}": {'name': f"Student {i:07d}", 'email': f"s{i}@niet.ac.in",
+                          'phone': f"9{i:09d}", 'courses': {'BTECH': None}}
+                for i in range(count)}
+
+    def as_records():
+        return {f"S{i}": Student(f"Student {i:07d}", f"s{i}@niet.ac.in",
+                                 f"9{i:09d}", ('BTECH',))
+                for i in range(count)}
+
+    sizes = {}
+    for label, build in (("dict per student", as_dicts), ("Student records", as_records)):
+        gc.collect()
+        tracemalloc.start()
+        table = build()
+        sizes[label] = tracemalloc.get_traced_memory()[0] / count
+        tracemalloc.stop()
+        del table
+    for label, size in sizes.items():
+        print(f"{label:18s}: {size:6.0f} bytes per student, "
+              f"{size * 1e6 / 2 ** 20:6.0f} MiB per million")
+    before, after = sizes.values()
+    print(f"Saved {1 - after / before:.0%}")
+
+    clear_database()
+    gc.collect()
+    tracemalloc.start()
+    for i in range(count):
+        apply_change({'op': 'add_student', 'sid': f"S{i}", 'name': f"Student {i:07d}",
+                      'email': f"s{i}@niet.ac.in", 'phone': f"9{i:09d}", 'course': 'BTECH'})
+    # Merge the name insert buffer, as the next snapshot load would
+    rebuild_indexes()
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] / count
+    tracemalloc.stop()
+    clear_database()
+    print(f"{'with indexes':18s}: {total:6.0f} bytes per student, "
+          f"{total * 1e6 / 2 ** 20:6.0f} MiB per million (record, indexes, roster, fee row)")
+
+def bench_workload(count=3000, courses=100):
+    """
+    Assigns `count` sections of `courses` courses across count // 5 faculty
+    qualified for a few courses each, and reports the balancer's run time
+    and how evenly the hours were spread.
+    """
+    import random
+    rng = random.Random(1)
+    saved_courses = database['courses']
+    clear_database()
+    database['courses'] = {f"C{i:03d}": {'name': f"Course {i}", 'students': {}, 'faculty': None,
+                                         'prereq': []} for i in range(courses)}
+    catalog = list(database['courses'])
+    changes = [{'op': 'add_faculty', 'fid': f"F{i}", 'name': f"Faculty {i}",
+                'qualified': rng.sample(catalog, rng.randint(2, 6)),
+                'max_load': rng.randint(12, 20)} for i in range(count // 5)]
+    changes += [{'op': 'add_section', 'section': f"X{i}", 'course': rng.choice(catalog),
+                 'hours': rng.randint(2, 4)} for i in range(count)]
+    commit_many(changes)
+    start = time.perf_counter()
+    result = auto_assign_sections(rebalance=True)
+    elapsed = time.perf_counter() - start
+    ratios = sorted(faculty_load[fid] / f.max_load for fid, f in database['faculty'].items())
+    print(f"Assigned {result['assigned']:,} of {count:,} sections to {count // 5:,} faculty "
+          f"in {elapsed:.3f} s")
+    print(f"Load / max hours: min {ratios[0]:.0%}, median {ratios[len(ratios) // 2]:.0%}, "
+          f"max {ratios[-1]:.0%}; over-assigned: {len(result['overloaded'])}")
+    database['courses'] = saved_courses
+    clear_database()
+
+def bench_timetable(count=2000):
+    """
+    Plans a term of `count` sections: cohorts of 60 students taking five
+    core courses plus an elective, count // 10 classrooms from seminar rooms
+    to lecture halls and count // 5 faculty.
+    Reports the full plan's run time, then breaks 1% of the timetable and
+    times the incremental re-plan that repairs it.
+    """
+    import random
+    rng = random.Random(1)
+    saved_courses = database['courses']
+    clear_database()
+    cohorts = count // 8
+    courses = count * 3 // 4
+    database['courses'] = {f"C{i:04d}": {'name': f"Course {i}", 'students': {}, 'faculty': None,
+                                         'prereq': []} for i in range(courses)}
+    catalog = list(database['courses'])
+    core, electives = catalog[:cohorts * 5], catalog[cohorts * 5:]
+    for cohort in range(cohorts):
+        options = rng.sample(electives, 3)
+        for n in range(60):
+            sid = f"S{cohort:04d}{n:02d}"
+            taken = core[cohort * 5:cohort * 5 + 5] + [rng.choice(options)]
+            database['students'][sid] = Student(f"Student {sid}", f"{sid}@example.com", "", taken)
+            for cid in taken:
+                database['courses'][cid]['students'][sid] = None
+    changes = [{'op': 'add_classroom', 'room': f"R{i:03d}",
+                'capacity': rng.choice((30, 40, 60, 60, 80, 120, 200))}
+                for i in range(count // 10)]
+    changes += [{'op': 'add_faculty', 'fid': f"F{i}", 'name': f"Faculty {i}",
+                 'qualified': [], 'max_load': 20} for i in range(count // 5)]
+    changes += [{'op': 'add_section', 'section': f"X{i}",
+                 'course': catalog[i] if i < courses else rng.choice(catalog),
+                 'hours': rng.randint(2, 4)} for i in range(count)]
+    commit_many(changes)
+    auto_assign_sections()
+    start = time.perf_counter()
+    result = plan_timetable(rebuild=True)
+    elapsed = time.perf_counter() - start
+    print(f"Planned {result['placed']:,} of {count:,} sections in {count // 10:,} rooms "
+          f"in {elapsed:.3f} s; unplaced: {len(result['unplaced'])}, "
+          f"penalty: {result['penalty']:,}")
+    # Break the timetable: 1% of the sections all moved into one room and slot
+    broken = rng.sample(list(database['sections']), count // 100)
+    commit_many([{'op': 'schedule', 'section': s, 'room': "R000", 'start': 0} for s in broken])
+    start = time.perf_counter()
+    conflicts = len(timetable_problems())
+    result = plan_timetable()
+    elapsed = time.perf_counter() - start
+    print(f"Re-planned after {len(broken)} sections moved ({conflicts} in conflict): "
+          f"{result['moved']} changed, {result['kept']:,} kept in {elapsed:.3f} s; "
+          f"conflicts left: {len(timetable_problems())}")
+    database['courses'] = saved_courses
+    clear_database()
+
+# --- Benchmark Suite ---
+# Sizes generate_university derives from the student count when not given
+SUITE_STUDENTS_PER_FACULTY = 25
+SUITE_STUDENTS_PER_COURSE = 200
+SUITE_BEDS_PER_ROOM = 4
+# An operation regresses when its p99 latency grows, or its throughput
+# falls, by more than this fraction against the compared run
+SUITE_TOLERANCE = 0.2
+
+def generate_university(students, faculty=None, courses=None, rooms=None, seed=1):
+    """
+    Replaces the database (and course_fee_map) with a synthetic university:
+    `courses` courses each led by one of `faculty` faculty, `students`
+    students enrolled in one to three courses, and `rooms` hostel rooms of
+    SUITE_BEDS_PER_ROOM beds with the first half of the students in them.
+    Changes are committed in batches, as by a bulk import.
+    """
+    import random
+    rng = random.Random(seed)
+    faculty = faculty or max(1, students // SUITE_STUDENTS_PER_FACULTY)
+    courses = courses or max(1, students // SUITE_STUDENTS_PER_COURSE)
+    rooms = rooms or max(1, -(-students // SUITE_BEDS_PER_ROOM))
+    clear_database()
+    database['courses'] = {f"C{i:04d}": {'name': f"Course {i}", 'students': {}, 'faculty': None,
+                                         'prereq': []} for i in range(courses)}
+    course_fee_map.clear()
+    course_fee_map.update((cid, rng.randrange(50, 300) * 1000) for cid in database['courses'])
+    compile_prereqs()
+    catalog = list(database['courses'])
+    changes = []
+
+    def stage(change):
+        changes.append(change)
+        if len(changes) >= IMPORT_BATCH:
+            commit_many(changes)
+            changes.clear()
+
+    for i in range(faculty):
+        stage({'op': 'add_faculty', 'fid': f"F{i:05d}", 'name': f"Faculty {i}",
+             'qualified': rng.sample(catalog, min(3, courses)), 'max_load': FACULTY_MAX_LOAD})
+    for i, cid in enumerate(catalog):
+        stage({'op': 'assign_course', 'cid': cid, 'fid': f"F{i % faculty:05d}"})
+    for i in range(rooms):
+        stage({'op': 'add_room', 'hostel': f"H{i // 100}", 'room': str(i % 100),
+             'capacity': SUITE_BEDS_PER_ROOM, 'course': ''})
+    for i in range(students):
+        sid = f"S{i:07d}"
+        taken = rng.sample(catalog, min(rng.randint(1, 3), courses))
+        stage({'op': 'add_student', 'sid': sid, 'name': f"Student {i:07d}",
+             'email': f"s{i}@niet.ac.in", 'phone': f"9{i:09d}", 'course': taken[0]})
+        for cid in taken[1:]:
+            stage({'op': 'enroll', 'sid': sid, 'cid': cid})
+        room = i // SUITE_BEDS_PER_ROOM
+        if i < students // 2 and room < rooms:
+            stage({'op': 'set_hostel', 'sid': sid, 'hostel_name': f"H{room // 100}",
+                 'room_no': str(room % 100)})
+    commit_many(changes)
+
+def time_operation(func, calls):
+    """
+    Calls func(*args) for each args in `calls`, timing every call.
+    ValueErrors (refused operations) are counted, not raised.
+    Returns a dict of count, errors, seconds, per_sec, p50_ms and p99_ms.
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for args in calls:
+        began = time.perf_counter()
+        try:
+            func(*args)
+        except ValueError:
+            errors += 1
+        latencies.append(time.perf_counter() - began)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3)
+
+    return {'count': len(latencies), 'errors': errors, 'seconds': round(elapsed, 3),
+            'per_sec': round(len(latencies) / elapsed), 'p50_ms': percentile(0.5),
+            'p99_ms': percentile(0.99)}
+
+def peak_memory_mib():
+    """
+    Returns the process's peak resident memory in MiB, or None where the
+    resource module is missing (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+def compare_suite(old, new, tolerance=SUITE_TOLERANCE):
+    """
+    Prints each operation of a suite run next to an earlier run.
+    Returns the names of operations that regressed by more than `tolerance`.
+    """
+    regressed = []
+    print(f"\n{'vs earlier run':20s} {'ops/s':>9s} {'p99 ms':>9s}")
+    for name, now in new['ops'].items():
+        before = old.get('ops', {}).get(name)
+        if before is None:
+            continue
+        speed = now['per_sec'] / before['per_sec'] - 1 if before['per_sec'] else 0.0
+        p99 = now['p99_ms'] / before['p99_ms'] - 1 if before['p99_ms'] else 0.0
+        flag = ""
+        if speed < -tolerance or p99 > tolerance:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:20s} {speed:+9.0%} {p99:+9.0%}{flag}")
+    return regressed
+
+def bench_suite(count=20000, ops=2000, save=None, compare=None):
+    """
+    Load test of a synthetic university of `count` students (see
+    generate_university) backed by a temporary storage folder. Drives the
+    operations behind the GUI (add, enroll and hostel saves, list refreshes,
+    detail lookups, search) `ops` times each, reporting throughput, p50/p99
+    latency and peak memory. With `save` the results are written as JSON;
+    with `compare` they are checked against an earlier saved run.
+    Returns the names of regressed operations (empty without `compare`).
+    """
+    import random
+    rng = random.Random(2)
+    saved_courses, saved_fees = database['courses'], dict(course_fee_map)
+    results = {'size': count, 'ops_per_operation': ops, 'python': sys.version.split()[0],
+               'time': datetime.datetime.now().isoformat(timespec='seconds')}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            open_storage(tmp)
+            start = time.perf_counter()
+            generate_university(count)
+            results['generate_seconds'] = round(time.perf_counter() - start, 3)
+            sids = list(database['students'])
+            catalog = list(database['courses'])
+            # Students without a bed, and the free beds kept for them
+            homeless = sids[count // 2:count // 2 + ops]
+            refreshes = max(10, ops // 100)
+            plans = {
+                'save_student': (add_student, [
+                    (f"N{i:07d}", f"New {i}", f"n{i}@niet.ac.in", f"8{i:09d}", rng.choice(catalog))
+                    for i in range(ops)]),
+                'enroll_student': (enroll, [(rng.choice(sids), rng.choice(catalog))
+                                            for _ in range(ops)]),
+                'save_hostel': (assign_hostel, [
+                    (sid, f"H{(i // SUITE_BEDS_PER_ROOM) // 100}", str((i // SUITE_BEDS_PER_ROOM) % 100))
+                    for i, sid in enumerate(homeless, start=count // 2)]),
+                'student_details': (student_details, [(rng.choice(sids),) for _ in range(ops)]),
+                'search_students': (search_students, [(f"Student {rng.randrange(count):07d}"[:11],)
+                                                      for _ in range(ops)]),
+                'refresh_students': (list_students, [()] * refreshes),
+                'refresh_faculty': (list_faculty, [()] * refreshes),
+            }
+            results['ops'] = {name: time_operation(func, calls)
+                              for name, (func, calls) in plans.items()}
+            close_storage()
+    finally:
+        database['courses'] = saved_courses
+        course_fee_map.clear()
+        course_fee_map.update(saved_fees)
+        clear_database()
+    results['peak_memory_mib'] = peak_memory_mib()
+
+    print(f"Generated {count:,} students in {results['generate_seconds']:.2f} s; "
+          f"peak memory {results['peak_memory_mib'] or 'n/a'} MiB")
+    print(f"{'operation':20s} {'count':>7s} {'ops/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+    for name, r in results['ops'].items():
+        print(f"{name:20s} {r['count']:7,} {r['per_sec']:9,} {r['p50_ms']:8.3f} "
+              f"{r['p99_ms']:8.3f} {r['errors']:7,}")
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if compare:
+        with open(compare, encoding="utf-8") as f:
+            return compare_suite(json.load(f), results)
+    return []
+
+# Benchmarks runnable from the command line: --bench NAME [--size N]
+BENCHMARKS = {
+    'contention': bench_contention,
+    'dashboard': bench_dashboard,
+    'enquiries': bench_enquiries,
+    'export': bench_export,
+    'fees': bench_fees,
+    'fuzzy': bench_fuzzy,
+    'hostel': bench_hostel,
+    'http': bench_http,
+    'import': bench_import,
+    'login': bench_login,
+    'memory': bench_memory,
+    'metrics': bench_metrics,
+    'prereq': bench_prereq,
+    'search': bench_search,
+    'storage': bench_storage,
+    'suite': bench_suite,
+    'timetable': bench_timetable,
+    'workload': bench_workload,
+}
+
+def main():
+    """
+    Command-line entry point: runs the GUI, the HTTP API with --serve,
+    or a benchmark with --bench.
+    """
+    parser = argparse.ArgumentParser(description="NIET University Management System")
+    parser.add_argument("--bench", choices=sorted(BENCHMARKS),
+                        help="run a benchmark instead of the GUI")
+    parser.add_argument("--size", type=int, help="benchmark data size")
+    parser.add_argument("--save", metavar="FILE",
+                        help="with --bench suite, write the results to FILE as JSON")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="with --bench suite, compare against results saved with --save "
+                             "and exit with status 1 on a regression")
+    parser.add_argument("--serve", type=int, nargs='?', const=HTTP_PORT, metavar="PORT",
+                        help=f"serve the HTTP/JSON API instead of the GUI (default port {HTTP_PORT})")
+    parser.add_argument("--ui-timing", action="store_true",
+                        help="print GUI handler and background task latency on exit")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="write GUI latency histograms to FILE in the Prometheus text format on exit")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="profile the GUI session with cProfile and save it in DIR on exit")
+    parser.add_argument("--add-user", nargs=2, metavar=("ID", "ROLE"),
+                        help=f"add a user or reset their password and role ({', '.join(ROLE_TABS)})")
+    parser.add_argument("--audit", nargs='?', const='', metavar="ID",
+                        help="print the audit log as JSON lines, optionally only events for one record ID")
+    parser.add_argument("--export", metavar="DIR",
+                        help="export students, faculty, enrollments and hostel records to DIR")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default='csv',
+                        help="file format for --export (parquet needs pyarrow, default csv)")
+    parser.add_argument("--shared-db", metavar="FILE",
+                        help="keep data in this SQLite database, shared by several desks at once")
+    parser.add_argument("--startup-timing", nargs='?', const='', metavar="FILE",
+                        help="print startup milestones on exit; with FILE, also append them as JSON")
+    args = parser.parse_args()
+    ums_core.shared_db_path = args.shared_db
+    if args.add_user:
+        uid, role = args.add_user
+        password = getpass.getpass(f"Password for {uid}: ")
+        if password != getpass.getpass("Repeat password: "):
+            parser.error("passwords do not match")
+        try:
+            set_user(uid, password, role)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Saved user {uid} ({role}).")
+        return
+    if args.audit is not None:
+        for event in audit_events():
+            ids = (event.get('sid'), event.get('fid'), event.get('cid'), event.get('id'))
+            if not args.audit or args.audit in ids:
+                print(json.dumps(event))
+        return
+    if args.export:
+        open_storage()
+        try:
+            result = export_database(args.export, args.format)
+        finally:
+            close_storage()
+        if result['format'] != args.format:
+            print(f"pyarrow is not installed; wrote the {result['format']} format instead.")
+        for path, rows in result['files'].values():
+            print(f"{rows:>10,} rows  {path}")
+        return
+    if (args.save or args.compare) and args.bench != 'suite':
+        parser.error("--save and --compare need --bench suite")
+    if args.bench:
+        bench = BENCHMARKS[args.bench]
+        options = {'save': args.save, 'compare': args.compare} if args.bench == 'suite' else {}
+        if args.size:
+            options['count'] = args.size
+        if bench(**options):
+            sys.exit(1)
+        return
+    if args.serve:
+        open_storage()
+        try:
+            serve_http(args.serve)
+        finally:
+            close_storage()
+        return
+    # Start the application by showing login window first; saved data is
+    # loaded in the background once it is up
+    if args.profile:
+        start_profiling()
+    try:
+        show_login()
+    finally:
+        # Let queued background writes finish before the final snapshot;
+        # an import stops after its current batch
+        cancel_long_tasks()
+        for worker in workers:
+            worker.shutdown()
+        if storage_loading is not None:
+            # Re-raises a failed load instead of saving partial data over it
+            storage_loading.result()
+            close_storage()
+        if args.profile:
+            print(f"Profile saved to {stop_profiling(args.profile)}")
+        if args.ui_timing:
+            print_ui_timing()
+        if args.metrics:
+            write_metrics(args.metrics)
+        if args.startup_timing is not None:
+            report_startup_timing(args.startup_timing)
+
+if __name__ == "__main__":
+    main()